@@ -5,14 +5,14 @@ from flask import Flask, request, g, url_for
 from datetime import datetime
 from config import config_dict
 from flask_babel import Babel, _
-from flask_caching import Cache
 from flask_wtf.csrf import CSRFProtect
 from flask_talisman import Talisman
 from app.context_processors import inject_translation
 from flask_user import SQLAlchemyAdapter, UserManager
 
 # Змінні оточення вже завантажує Dynaconf у config.py
-cache = Cache()
+# Єдиний екземпляр кешу, яким користуються сервіси (app.extensions.cache)
+from app.extensions import cache
 babel = Babel()
 csrf = CSRFProtect()
 talisman = Talisman()
@@ -60,8 +60,33 @@ def create_app(config_name="development"):
 
     # Set up Flask-User
     from app.models import User
+    # Реєструємо хуки сесії для таблиці user_compatibility
+    from app import compatibility_store  # noqa: F401
     user_manager = UserManager(SQLAlchemyAdapter(db, User), app)
     
+    # Створюємо спільні екземпляри типологій один раз при старті
+    from app.typologies.registry import get_typology_classes, get_typology_instance
+    for typology_name in get_typology_classes():
+        get_typology_instance(typology_name)
+
+    # Завантажуємо чат-провайдера (і локальну модель) заздалегідь, якщо увімкнено
+    if app.config.get("CHAT_WARMUP") and not app.config.get("TESTING"):
+        from app.chat_providers import warm_chat_provider
+        with app.app_context():
+            try:
+                warm_chat_provider()
+            except Exception as e:
+                app.logger.warning(f"Chat provider warmup failed: {e}")
+
+    # Будуємо знімок користувачів для пошуку пар до першого запиту
+    if app.config.get("USER_SNAPSHOT_ENABLED") and not app.config.get("TESTING"):
+        from app.user_snapshot import refresh_user_snapshot
+        with app.app_context():
+            try:
+                refresh_user_snapshot()
+            except Exception as e:
+                app.logger.warning(f"User snapshot build failed: {e}")
+
     # Регіструємо blueprint'и
     from app.routes import main
     from app.admin import admin_bp
@@ -1,9 +1,9 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required
 from .forms import WeightsForm, ComfortScoreForm, TypologyStatusForm
-from sqlalchemy import func
-from .extensions import db
-from .models import User, UserType
+from .chat_cache import get_chat_cache_stats
+from .type_distribution import get_distribution
+from .user_snapshot import get_user_snapshot_stats
 from .statistics_utils import (
     load_typology_weights,
     update_typology_weight,
@@ -73,34 +73,21 @@ def statistics():
 @admin_bp.route('/distribution')
 @login_required
 def distribution():
-    city_results = (
-        db.session.query(User.city, UserType.type_value, func.count(User.id))
-        .join(UserType, User.type_id == UserType.id)
-        .filter(User.city.isnot(None))
-        .group_by(User.city, UserType.type_value)
-        .all()
-    )
-    country_results = (
-        db.session.query(User.country, UserType.type_value, func.count(User.id))
-        .join(UserType, User.type_id == UserType.id)
-        .filter(User.country.isnot(None))
-        .group_by(User.country, UserType.type_value)
-        .all()
+    data = get_distribution()
+    return render_template(
+        'admin_distribution.html', city_data=data['city'], country_data=data['country']
     )
 
-    def prepare_chart_data(results):
-        labels = sorted({r[0] for r in results})
-        types = sorted({r[1] for r in results})
-        datasets = []
-        for t in types:
-            data = []
-            for label in labels:
-                count = next((r[2] for r in results if r[0] == label and r[1] == t), 0)
-                data.append(count)
-            datasets.append({'label': t, 'data': data})
-        return {'labels': labels, 'datasets': datasets}
 
-    city_data = prepare_chart_data(city_results)
-    country_data = prepare_chart_data(country_results)
+@admin_bp.route('/chat_cache')
+@login_required
+def chat_cache_stats():
+    """Hit rate and generation time saved by the chat reply cache."""
+    return jsonify(get_chat_cache_stats())
 
-    return render_template('admin_distribution.html', city_data=city_data, country_data=country_data)
+
+@admin_bp.route('/user_snapshot')
+@login_required
+def user_snapshot_stats():
+    """Size, memory footprint and staleness of the match user snapshot."""
+    return jsonify(get_user_snapshot_stats())
@@ -1,5 +1,17 @@
-from flask import Blueprint, request, jsonify
-from .services import get_types_by_typology, calculate_relationship
+import json
+
+import numpy as np
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from flask_login import current_user
+from .services import (
+    get_types_by_typology,
+    calculate_relationship,
+    calculate_relationship_pairs,
+    encode_type,
+    encode_types,
+)
+from .recommendations import incoming_matches, top_matches
+from .typologies.matrix import get_relationship_matrix
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -11,7 +23,9 @@ def get_types_api():
     types = get_types_by_typology(typology)
     if types is None:
         return jsonify({'error': f'Unknown typology: {typology}'}), 400
-    return jsonify({'types': types})
+    # Type codes can be sent to /api/calculate instead of the type names
+    codes = [encode_type(typology, t) for t in types]
+    return jsonify({'types': types, 'codes': codes})
 
 @api_bp.route('/calculate', methods=['POST'])
 def calculate_api():
@@ -20,7 +34,7 @@ def calculate_api():
     user2 = data.get('user2')
     typology = data.get('typology')
 
-    if not user1 or not user2 or not typology:
+    if user1 in (None, '') or user2 in (None, '') or not typology:
         return jsonify({'error': 'Missing parameters'}), 400
 
     try:
@@ -29,3 +43,256 @@ def calculate_api():
         return jsonify({'error': str(exc)}), 400
 
     return jsonify({'relationship_type': relationship, 'comfort_score': score})
+
+
+@api_bp.route('/typologies/<name>/matrix', methods=['GET'])
+def typology_matrix_api(name):
+    """Return the relationship and comfort score of every ordered type pair.
+
+    ``relationships[i][j]`` indexes ``relationship_names`` and, like
+    ``scores[i][j]``, describes type code ``i`` towards type code ``j``.
+    The ETag is a digest of the content, so it changes only when the
+    matrix does and is the same on every host.
+    """
+    try:
+        matrix = get_relationship_matrix(name)
+    except ValueError:
+        return jsonify({'error': f'Unknown typology: {name}'}), 404
+
+    response = jsonify({
+        'typology': matrix.typology_name,
+        'types': list(matrix.type_names),
+        'relationship_names': list(matrix.relationship_names),
+        'relationships': matrix.relationships.tolist(),
+        'scores': matrix.scores.tolist(),
+    })
+    response.set_etag(matrix.fingerprint)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get('API_MATRIX_MAX_AGE', 3600)
+    return response.make_conditional(request)
+
+
+# Number of results computed and written per NDJSON chunk
+BATCH_STREAM_CHUNK = 1000
+
+
+def _batch_groups(data):
+    """Split a batch request into ``(typology, mode, types1, types2)`` groups.
+
+    ``mode`` is ``'pairs'`` when ``types1`` and ``types2`` are matched
+    element-wise and ``'cross'`` when every type of ``types1`` is matched
+    with every type of ``types2``. Raises ValueError on malformed input.
+    """
+    typologies = data.get('typologies')
+    if typologies is None:
+        typologies = [data['typology']] if data.get('typology') else []
+    if not isinstance(typologies, list) or not all(isinstance(t, str) and t for t in typologies):
+        raise ValueError('typologies must be a list of typology names')
+
+    groups = []
+    if 'pairs' in data:
+        pairs = data['pairs']
+        if not isinstance(pairs, list):
+            raise ValueError('pairs must be a list')
+        by_typology = {name: ([], []) for name in typologies}
+        for pair in pairs:
+            if isinstance(pair, dict):
+                user1, user2 = pair.get('user1'), pair.get('user2')
+                pair_typologies = [pair['typology']] if pair.get('typology') else typologies
+            elif isinstance(pair, list) and len(pair) == 2:
+                (user1, user2), pair_typologies = pair, typologies
+            else:
+                raise ValueError('Each pair must be [user1, user2] or an object')
+            if not pair_typologies:
+                raise ValueError('Missing typology')
+            for name in pair_typologies:
+                types1, types2 = by_typology.setdefault(name, ([], []))
+                types1.append(user1)
+                types2.append(user2)
+        groups = [(name, 'pairs', t1, t2) for name, (t1, t2) in by_typology.items() if t1]
+    elif 'sources' in data and 'targets' in data:
+        sources, targets = data['sources'], data['targets']
+        if not isinstance(sources, list) or not isinstance(targets, list):
+            raise ValueError('sources and targets must be lists')
+        if not typologies:
+            raise ValueError('Missing typology')
+        groups = [(name, 'cross', sources, targets) for name in typologies]
+    else:
+        raise ValueError('Provide either pairs or sources and targets')
+    return groups
+
+
+def _group_size(group):
+    _, mode, types1, types2 = group
+    return len(types1) if mode == 'pairs' else len(types1) * len(types2)
+
+
+def _encode_groups(groups):
+    """Attach type codes to each group, validating every type up front."""
+    return [
+        (typology, mode, types1, types2, encode_types(types1, typology), encode_types(types2, typology))
+        for typology, mode, types1, types2 in groups
+    ]
+
+
+def _iter_batch_results(encoded_groups, chunk_size):
+    """Yield lists of result dicts, at most ``chunk_size`` per list."""
+    for typology, mode, types1, types2, codes1, codes2 in encoded_groups:
+        total = len(codes1) if mode == 'pairs' else len(codes1) * len(codes2)
+        for start in range(0, total, chunk_size):
+            index = np.arange(start, min(start + chunk_size, total))
+            if mode == 'pairs':
+                first, second = index, index
+            else:
+                first, second = np.divmod(index, len(codes2))
+            relationships, scores = calculate_relationship_pairs(
+                codes1[first], codes2[second], typology
+            )
+            yield [
+                {
+                    'typology': typology,
+                    'user1': types1[i],
+                    'user2': types2[j],
+                    'relationship_type': relationship,
+                    'comfort_score': score,
+                }
+                for i, j, relationship, score in zip(
+                    first.tolist(), second.tolist(), relationships, scores
+                )
+            ]
+
+
+@api_bp.route('/calculate/batch', methods=['POST'])
+def calculate_batch_api():
+    """Calculate many relationships in one request.
+
+    The body holds ``typology`` (or a ``typologies`` list) and either
+    ``pairs`` - ``[user1, user2]`` lists or objects with ``user1``, ``user2``
+    and an optional ``typology`` - or ``sources`` and ``targets`` lists that
+    are matched every-to-every. Types are names or codes as returned by
+    ``/api/types``. With ``"stream": true`` or ``Accept: application/x-ndjson``
+    the results are streamed one JSON object per line.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Missing parameters'}), 400
+
+    stream = bool(data.get('stream')) or (
+        request.accept_mimetypes.best == 'application/x-ndjson'
+    )
+    try:
+        groups = _batch_groups(data)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    count = sum(_group_size(group) for group in groups)
+    limit_key = 'API_BATCH_MAX_STREAM_PAIRS' if stream else 'API_BATCH_MAX_PAIRS'
+    limit = current_app.config.get(limit_key, 10000)
+    if count > limit:
+        return jsonify({'error': f'Too many pairs: {count} (limit {limit})'}), 413
+
+    # Validate every type before the first byte is sent
+    try:
+        encoded_groups = _encode_groups(groups)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    if stream:
+        def generate():
+            for chunk in _iter_batch_results(encoded_groups, BATCH_STREAM_CHUNK):
+                yield ''.join(json.dumps(result) + '\n' for result in chunk)
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    results = []
+    for chunk in _iter_batch_results(encoded_groups, max(count, 1)):
+        results.extend(chunk)
+    return jsonify({'results': results, 'count': len(results)})
+
+
+def _parse_weights(raw):
+    """Parse ``Typology:0`` (exclude) and ``Typology:1`` (include) pairs separated by commas."""
+    weights = {}
+    for item in filter(None, (part.strip() for part in raw.split(','))):
+        typology, weight = item.split(':')
+        weights[typology.strip()] = float(weight)
+    return weights
+
+
+@api_bp.route('/matches/top', methods=['GET'])
+def top_matches_api():
+    """Return the best matches for the logged-in user, best first.
+
+    Query parameters: ``k`` (number of matches), ``radius`` (km, defaults to
+    the user's ``max_distance``), ``weights`` (``Typology:0`` to exclude or
+    ``Typology:1`` to include a typology, separated by commas; other values
+    are rejected), ``distance_weight`` (0-1) and ``half_life`` (km).
+    """
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Authentication required'}), 401
+
+    args = request.args
+    try:
+        k = int(args.get('k', 10))
+        radius = args.get('radius')
+        options = {
+            'radius_km': float(radius) if radius is not None else None,
+            'weights': _parse_weights(args.get('weights', '')),
+            'distance_weight': float(args.get('distance_weight', 0.3)),
+            'half_life_km': float(args.get('half_life', 25.0)),
+        }
+    except ValueError:
+        return jsonify({'error': 'Invalid parameters'}), 400
+    max_k = current_app.config.get('API_TOP_MATCHES_MAX_K', 100)
+    if k > max_k:
+        return jsonify({'error': f'k must be at most {max_k}'}), 400
+
+    try:
+        matches = top_matches(current_user, k=k, **options)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    return jsonify({
+        'matches': [
+            {
+                'user_id': match.user.id,
+                'username': match.user.username,
+                'score': round(match.score, 4),
+                'comfort_score': match.comfort,
+                'relationship_type': match.relationship,
+                'distance_km': round(match.distance, 3),
+            }
+            for match in matches
+        ],
+        'count': len(matches),
+    })
+
+
+@api_bp.route('/matches/incoming', methods=['GET'])
+def incoming_matches_api():
+    """Return users who have the logged-in user within their search radius.
+
+    Only users whose type is compatible towards the logged-in user are
+    listed, closest first.
+    """
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Authentication required'}), 401
+
+    try:
+        matches = incoming_matches(current_user)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    return jsonify({
+        'matches': [
+            {
+                'user_id': other.id,
+                'username': other.username,
+                'comfort_score': comfort,
+                'relationship_type': relationship,
+                'distance_km': round(distance, 3),
+            }
+            for other, distance, comfort, relationship in matches
+        ],
+        'count': len(matches),
+    })
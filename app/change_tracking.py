@@ -0,0 +1,104 @@
+# app/change_tracking.py
+"""Session hooks shared by everything that follows changes of users.
+
+Several modules keep data derived from users and their types: the cached
+type distribution chart, the user snapshot and the compatibility table.
+Instead of each installing its own hooks, they register a collector and an
+apply function with :func:`on_commit`:
+
+* after every flush, ``collect(session, pending)`` returns the module's
+  updated pending value (``pending`` is ``None`` on the first flush of a
+  transaction, returning ``None`` records nothing);
+* once the outermost transaction has been committed and the session has
+  released its connection, ``apply(pending)`` receives the value, so work
+  it starts never shares the committed transaction;
+* values of rolled back transactions are dropped. Savepoints are part of
+  their transaction: a released savepoint hands nothing over yet, and a
+  rolled back one keeps what was collected, so ``apply`` may see changes
+  that were undone and must tolerate them.
+"""
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from sqlalchemy import event, inspect
+
+from .extensions import db
+from .models import User, UserType
+
+# Fields match queries read from users and from their types
+USER_MATCH_FIELDS = ("latitude", "longitude", "max_distance", "type_id")
+TYPE_FIELDS = ("typology_name", "type_value")
+
+_PENDING = "change_tracking_pending"
+_COMMITTED = "change_tracking_committed"
+
+Collect = Callable[[Any, Any], Any]
+Apply = Callable[[Any], None]
+
+_listeners: Dict[str, Tuple[Collect, Apply]] = {}
+
+
+def on_commit(name: str, collect: Collect, apply: Apply) -> None:
+    """Register ``collect`` and ``apply`` under ``name`` (see module docs)."""
+    _listeners[name] = (collect, apply)
+
+
+def history_changed(obj, fields: Iterable[str]) -> bool:
+    """Return whether any of ``fields`` of ``obj`` changed in the current flush."""
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+def users_changed(session, user_fields: Iterable[str] = USER_MATCH_FIELDS) -> bool:
+    """Return whether the flush added or removed users, or changed ``user_fields``.
+
+    Renamed or deleted types count as well, since their users change with them.
+    """
+    user_fields = tuple(user_fields)
+    for obj in session.new:
+        if isinstance(obj, User):
+            return True
+    for obj in session.deleted:
+        if isinstance(obj, (User, UserType)):
+            return True
+    for obj in session.dirty:
+        if (isinstance(obj, User) and history_changed(obj, user_fields)) or (
+            isinstance(obj, UserType) and history_changed(obj, TYPE_FIELDS)
+        ):
+            return True
+    return False
+
+
+@event.listens_for(db.session, "after_flush")
+def _collect(session, flush_context):
+    pending = session.info.setdefault(_PENDING, {})
+    for name, (collect, _) in _listeners.items():
+        value = collect(session, pending.get(name))
+        if value is not None:
+            pending[name] = value
+
+
+def _is_savepoint(session) -> bool:
+    return session.transaction is not None and session.transaction.parent is not None
+
+
+@event.listens_for(db.session, "after_commit")
+def _commit(session):
+    if _is_savepoint(session):
+        return
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        session.info[_COMMITTED] = pending
+
+
+@event.listens_for(db.session, "after_transaction_end")
+def _apply(session, transaction):
+    if transaction.parent is not None or _COMMITTED not in session.info:
+        return
+    for name, value in session.info.pop(_COMMITTED).items():
+        _listeners[name][1](value)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _discard(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING, None)
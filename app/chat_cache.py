@@ -0,0 +1,267 @@
+# app/chat_cache.py
+"""Cache of assistant replies for repeated chat questions.
+
+Lookups go through up to three tiers:
+
+1. a per-process LRU of recent replies, bounded by ``CHAT_CACHE_MAX_ENTRIES``;
+2. the shared Flask-Caching backend, where replies expire after
+   ``CHAT_CACHE_TTL`` seconds;
+3. optionally, the reply to a semantically similar earlier question, found by
+   comparing sentence embeddings (``CHAT_CACHE_EMBEDDING_MODEL``, requires the
+   ``sentence-transformers`` package).
+
+Replies are keyed on the provider, its model and the normalized message.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+from flask import current_app
+
+from .extensions import cache
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return " ".join(message.lower().split()).rstrip("?!. ")
+
+
+def _cache_key(provider, normalized: str) -> str:
+    raw = f"{provider.name}\0{provider.model_name}\0{normalized}"
+    return "chat_reply:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _LRUCache:
+    """Thread-safe LRU mapping whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class _SemanticIndex:
+    """Normalized embeddings of cached questions for one provider and model."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._vectors: Optional[np.ndarray] = None
+        self._keys = []
+        self._lock = threading.Lock()
+
+    def find(self, vector: np.ndarray, threshold: float) -> Optional[str]:
+        """Return the key of the most similar question above ``threshold``."""
+        with self._lock:
+            if self._vectors is None:
+                return None
+            similarities = self._vectors @ vector
+            best = int(np.argmax(similarities))
+            return self._keys[best] if similarities[best] >= threshold else None
+
+    def add(self, vector: np.ndarray, key: str) -> None:
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = vector[np.newaxis, :]
+            else:
+                self._vectors = np.vstack([self._vectors, vector])
+            self._keys.append(key)
+            if len(self._keys) > self.max_entries:
+                self._vectors = self._vectors[1:]
+                self._keys.pop(0)
+
+
+class _Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits: Dict[str, int] = {"local": 0, "shared": 0, "semantic": 0}
+        self.misses = 0
+        self.saved_seconds = 0.0
+        # Provider name -> (generated replies, total generation seconds)
+        self.generation: Dict[str, tuple] = {}
+
+    def record_hit(self, tier: str, provider_name: str) -> None:
+        with self.lock:
+            self.hits[tier] += 1
+            count, total = self.generation.get(provider_name, (0, 0.0))
+            if count:
+                self.saved_seconds += total / count
+
+    def record_generation(self, provider_name: str, elapsed: float) -> None:
+        with self.lock:
+            count, total = self.generation.get(provider_name, (0, 0.0))
+            self.generation[provider_name] = (count + 1, total + elapsed)
+
+
+_local: Optional[_LRUCache] = None
+_semantic: Dict[tuple, _SemanticIndex] = {}
+_embedders: Dict[str, object] = {}
+_state_lock = threading.Lock()
+_stats = _Stats()
+
+
+def _enabled() -> bool:
+    return current_app.config.get("CHAT_CACHE_ENABLED", True)
+
+
+def _ttl() -> int:
+    return int(current_app.config.get("CHAT_CACHE_TTL", 86400))
+
+
+def _local_cache() -> _LRUCache:
+    global _local
+    if _local is None:
+        with _state_lock:
+            if _local is None:
+                _local = _LRUCache(
+                    int(current_app.config.get("CHAT_CACHE_MAX_ENTRIES", 1024)), _ttl()
+                )
+    return _local
+
+
+def _embed(normalized: str) -> Optional[np.ndarray]:
+    """Return the unit-length embedding of a message, or None if disabled."""
+    model_path = current_app.config.get("CHAT_CACHE_EMBEDDING_MODEL")
+    if not model_path:
+        return None
+    embedder = _embedders.get(model_path)
+    if embedder is None:
+        with _state_lock:
+            embedder = _embedders.get(model_path)
+            if embedder is None:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                except ModuleNotFoundError:
+                    current_app.logger.warning(
+                        "sentence-transformers is not installed; semantic chat cache disabled"
+                    )
+                    embedder = False
+                else:
+                    embedder = SentenceTransformer(model_path)
+                _embedders[model_path] = embedder
+    if embedder is False:
+        return None
+    vector = np.asarray(embedder.encode(normalized), dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+
+def _semantic_index(provider) -> _SemanticIndex:
+    key = (provider.name, provider.model_name)
+    index = _semantic.get(key)
+    if index is None:
+        with _state_lock:
+            index = _semantic.setdefault(
+                key, _SemanticIndex(int(current_app.config.get("CHAT_CACHE_MAX_ENTRIES", 1024)))
+            )
+    return index
+
+
+def _lookup_key(key: str):
+    """Return ``(reply, tier)`` for an exact key, or ``(None, None)``."""
+    reply = _local_cache().get(key)
+    if reply is not None:
+        return reply, "local"
+    reply = cache.get(key)
+    if reply is not None:
+        _local_cache().set(key, reply)
+        return reply, "shared"
+    return None, None
+
+
+def get_cached_reply(provider, message: str) -> Optional[str]:
+    """Return a cached reply to ``message`` from ``provider``, if any."""
+    if not _enabled():
+        return None
+    normalized = normalize_message(message)
+    reply, tier = _lookup_key(_cache_key(provider, normalized))
+    if reply is None:
+        vector = _embed(normalized)
+        if vector is not None:
+            similar = _semantic_index(provider).find(
+                vector, float(current_app.config.get("CHAT_CACHE_SIMILARITY", 0.92))
+            )
+            if similar is not None:
+                reply, _ = _lookup_key(similar)
+                tier = "semantic"
+    if reply is None:
+        with _stats.lock:
+            _stats.misses += 1
+        return None
+    _stats.record_hit(tier, provider.name)
+    return reply
+
+
+def cache_reply(provider, message: str, reply: str, elapsed: float) -> None:
+    """Store a freshly generated reply that took ``elapsed`` seconds."""
+    _stats.record_generation(provider.name, elapsed)
+    if not _enabled() or not reply:
+        return
+    normalized = normalize_message(message)
+    key = _cache_key(provider, normalized)
+    _local_cache().set(key, reply)
+    cache.set(key, reply, timeout=_ttl())
+    vector = _embed(normalized)
+    if vector is not None:
+        _semantic_index(provider).add(vector, key)
+
+
+def cache_stream(provider, message: str, pieces: Iterator[str]) -> Iterator[str]:
+    """Pass ``pieces`` through and cache the full reply once it completed."""
+    start = time.monotonic()
+    received = []
+    try:
+        for piece in pieces:
+            received.append(piece)
+            yield piece
+    finally:
+        close = getattr(pieces, "close", None)
+        if close is not None:
+            close()
+    cache_reply(provider, message, "".join(received), time.monotonic() - start)
+
+
+def get_chat_cache_stats() -> dict:
+    """Return hit/miss counters and the generation time saved by hits."""
+    with _stats.lock:
+        hits = sum(_stats.hits.values())
+        lookups = hits + _stats.misses
+        return {
+            "lookups": lookups,
+            "hits": hits,
+            "misses": _stats.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "hits_by_tier": dict(_stats.hits),
+            "saved_seconds": round(_stats.saved_seconds, 3),
+        }
+
+
+def clear_chat_cache() -> None:
+    """Forget locally cached replies, embeddings and statistics."""
+    global _local, _stats
+    with _state_lock:
+        _local = None
+        _semantic.clear()
+        _stats = _Stats()
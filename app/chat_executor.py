@@ -0,0 +1,167 @@
+# app/chat_executor.py
+"""Bounded execution of chat provider calls.
+
+Every provider gets its own small thread pool, so a slow or overloaded model
+only queues its own requests. Each pool accepts at most ``concurrency +
+max_queue`` requests at a time; anything beyond that is rejected immediately
+with :class:`ChatBusyError` instead of tying up another web worker behind a
+backlog of LLM calls.
+
+A timeout only stops the wait: Python threads cannot be interrupted, so a
+provider call that has already started keeps its worker until the provider
+returns. Its slot stays taken until then, so under load timed-out calls lead
+to ChatBusyError rather than to an unbounded pile of threads. Providers
+should therefore set their own request timeouts, and streams are stopped
+between items (see :meth:`ChatExecutor.stream`).
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterator, Optional
+
+from flask import current_app
+
+
+class ChatBusyError(RuntimeError):
+    """Raised when a provider's queue is full."""
+
+
+class ChatTimeoutError(TimeoutError):
+    """Raised when a provider does not answer in time."""
+
+
+# Marks the end of a stream in the hand-over queue
+_END = object()
+
+
+class ChatExecutor:
+    """Thread pool with a bounded queue for one chat provider."""
+
+    def __init__(self, name: str, concurrency: int, max_queue: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix=f"chat-{name}"
+        )
+        self._slots = threading.BoundedSemaphore(concurrency + max_queue)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Schedule ``fn``; raises ChatBusyError if the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            raise ChatBusyError(f"Chat provider '{self.name}' is busy")
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def call(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """Run ``fn`` in the pool and wait for its result.
+
+        Raises:
+            ChatBusyError: If the queue is full.
+            ChatTimeoutError: If no result arrives within ``timeout`` seconds.
+                A call that has not started yet is cancelled; one that is
+                running cannot be and keeps its worker and queue slot until
+                ``fn`` returns.
+        """
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise ChatTimeoutError(f"Chat provider '{self.name}' timed out")
+
+    def stream(self, factory: Callable[[], Iterator[str]], timeout: Optional[float] = None) -> Iterator[str]:
+        """Consume ``factory()`` in the pool and yield its items.
+
+        The pool slot is taken right away, so ChatBusyError is raised by this
+        call and not on first iteration. Closing the returned generator, as
+        WSGI servers do when the client disconnects, stops the provider
+        stream after its current item. ``timeout`` limits the whole stream.
+        """
+        items: queue.Queue = queue.Queue()
+        cancelled = threading.Event()
+
+        def produce():
+            if cancelled.is_set():
+                return
+            source = factory()
+            try:
+                for item in source:
+                    if cancelled.is_set():
+                        break
+                    items.put(item)
+            except Exception as exc:
+                items.put(exc)
+            finally:
+                close = getattr(source, "close", None)
+                if close is not None:
+                    close()
+                items.put(_END)
+
+        future = self.submit(produce)
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def consume():
+            try:
+                while True:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise ChatTimeoutError(f"Chat provider '{self.name}' timed out")
+                    try:
+                        item = items.get(timeout=remaining)
+                    except queue.Empty:
+                        raise ChatTimeoutError(f"Chat provider '{self.name}' timed out")
+                    if item is _END:
+                        return
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+            finally:
+                cancelled.set()
+                future.cancel()
+
+        return consume()
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+_executors: Dict[str, ChatExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _provider_limit(config, provider_name: str) -> int:
+    limits = config.get("CHAT_PROVIDER_CONCURRENCY") or {}
+    return int(limits.get(provider_name, config.get("CHAT_CONCURRENCY", 4)))
+
+
+def get_chat_executor(provider_name: str) -> ChatExecutor:
+    """Return the process-wide executor for a provider, sized from the config."""
+    executor = _executors.get(provider_name)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(provider_name)
+            if executor is None:
+                config = current_app.config
+                executor = ChatExecutor(
+                    provider_name,
+                    _provider_limit(config, provider_name),
+                    int(config.get("CHAT_MAX_QUEUE", 8)),
+                )
+                _executors[provider_name] = executor
+    return executor
+
+
+def clear_chat_executors() -> None:
+    """Shut down all executors, e.g. after the limits were reconfigured."""
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown()
+        _executors.clear()
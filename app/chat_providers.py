@@ -1,40 +1,96 @@
 # Chat providers for the assistant
+# Provider SDKs are imported when a provider is created: importing all of them
+# costs seconds and hundreds of MB per worker, and only one is ever used.
 import os
-import openai
-import requests
-import google.generativeai as genai
-import anthropic
+import queue
+import threading
+import time
+from concurrent.futures import Future
 from flask import current_app
-from typing import Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 class ChatProvider:
     """Abstract provider for chat models."""
+    # Key for per-provider settings such as concurrency limits
+    name = "default"
+    # Model identifier, part of the reply cache key
+    model_name = ""
+
     def reply(self, message: str) -> str:
         raise NotImplementedError
 
+    def stream(self, message: str) -> Iterator[str]:
+        """Yield the reply in pieces as the model produces them.
+
+        Providers without a streaming API yield the whole reply at once.
+        """
+        yield self.reply(message)
+
+    def warmup(self) -> None:
+        """Prepare the provider before the first request (no-op by default)."""
+
 class OpenAIProvider(ChatProvider):
+    name = "openai"
+
     def __init__(self, model: str, api_key: str):
         self.model = model
-        openai.api_key = api_key
+        self.model_name = model
+        self.api_key = api_key
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """The SDK client, created on first use.
+
+        ``openai.OpenAI`` raises without an API key, so a missing key fails
+        the request instead of creating the provider.
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import openai
+
+                    # The client keeps its HTTP connections alive between requests
+                    self._client = openai.OpenAI(api_key=self.api_key)
+        return self._client
 
     def reply(self, message: str) -> str:
-        response = openai.chat.completions.create(
+        response = self.client.chat.completions.create(
             model=self.model,
             messages=[{"role": "user", "content": message}],
             temperature=0.7,
         )
         return response.choices[0].message.content.strip()
 
+    def stream(self, message: str) -> Iterator[str]:
+        chunks = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": message}],
+            temperature=0.7,
+            stream=True,
+        )
+        for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
 class HuggingFaceProvider(ChatProvider):
+    name = "huggingface"
+
     def __init__(self, model: str, api_token: Optional[str] = None):
+        import requests
+
         self.model = model
+        self.model_name = model
         self.api_url = f"https://api-inference.huggingface.co/models/{model}"
         self.headers = {"Authorization": f"Bearer {api_token}"} if api_token else {}
+        # Shared session so consecutive requests reuse the TLS connection
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
 
     def reply(self, message: str) -> str:
-        resp = requests.post(
+        resp = self.session.post(
             self.api_url,
-            headers=self.headers,
             json={"inputs": message},
             timeout=30,
         )
@@ -45,18 +101,34 @@ class HuggingFaceProvider(ChatProvider):
         return data.get("generated_text", "")
 
 class GeminiProvider(ChatProvider):
+    name = "gemini"
+
     def __init__(self, model: str, api_key: str):
+        import google.generativeai as genai
+
         genai.configure(api_key=api_key)
+        self.model_name = model
         self.model = genai.GenerativeModel(model)
 
     def reply(self, message: str) -> str:
         response = self.model.generate_content(message)
         return getattr(response, "text", str(response))
 
+    def stream(self, message: str) -> Iterator[str]:
+        for chunk in self.model.generate_content(message, stream=True):
+            text = getattr(chunk, "text", "")
+            if text:
+                yield text
+
 class AnthropicProvider(ChatProvider):
+    name = "anthropic"
+
     def __init__(self, model: str, api_key: str):
-        self.client = anthropic.Client(api_key)
+        import anthropic
+
+        self.client = anthropic.Client(api_key=api_key)
         self.model = model
+        self.model_name = model
 
     def reply(self, message: str) -> str:
         resp = self.client.messages.create(
@@ -71,37 +143,236 @@ class AnthropicProvider(ChatProvider):
                 return part.text
         return str(content)
 
+    def stream(self, message: str) -> Iterator[str]:
+        with self.client.messages.stream(
+            model=self.model,
+            max_tokens=1024,
+            messages=[{"role": "user", "content": message}],
+        ) as stream:
+            yield from stream.text_stream
+
+class MicroBatcher:
+    """Collect concurrent calls into batches for a function over lists.
+
+    A background thread waits for the first item, then gathers more for up to
+    ``max_wait`` seconds or until ``max_batch_size`` items arrived, and calls
+    ``fn`` once with all of them. ``fn`` must return one result per item.
+    """
+
+    def __init__(self, fn: Callable[[List], List], max_batch_size: int, max_wait: float):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, item) -> Future:
+        """Queue ``item``; the returned future resolves to its result."""
+        future: Future = Future()
+        self._queue.put((item, future))
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="micro-batcher", daemon=True
+                    )
+                    self._thread.start()
+        return future
+
+    def __call__(self, item):
+        return self.submit(item).result()
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = [
+                (item, future)
+                for item, future in self._collect()
+                if future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+            try:
+                results = list(self.fn([item for item, _ in batch]))
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            # Never leave a caller waiting for a result that will not come
+            for _, future in batch[len(results):]:
+                future.set_exception(
+                    RuntimeError(f"Batch returned {len(results)} results for {len(batch)} items")
+                )
+
 class LocalHFProvider(ChatProvider):
-    """Run open-source models locally via transformers."""
+    """Run open-source models locally via transformers.
+
+    With ``max_batch_size`` above one, concurrent replies that arrive within
+    ``max_wait`` seconds of each other are generated in a single batch.
+    Streamed replies cannot be batched; they and the batches take turns on
+    the model, one generation at a time.
+    """
 
-    def __init__(self, model_path: str):
+    name = "localhf"
+
+    def __init__(self, model_path: str, max_batch_size: int = 1, max_wait: float = 0.0):
         from transformers import pipeline
 
+        self.model_name = model_path
         self.pipeline = pipeline("text-generation", model=model_path, tokenizer=model_path)
+        # Held by the generation currently using the model
+        self._generate_lock = threading.Lock()
+        self.batcher = None
+        if max_batch_size > 1:
+            tokenizer = self.pipeline.tokenizer
+            # Batched prompts are padded on the left so generation continues
+            # right after each prompt
+            if tokenizer.pad_token_id is None:
+                tokenizer.pad_token_id = tokenizer.eos_token_id
+            tokenizer.padding_side = "left"
+            self.batcher = MicroBatcher(self._reply_batch, max_batch_size, max_wait)
+
+    def _reply_batch(self, messages: List[str]) -> List[str]:
+        with self._generate_lock:
+            outputs = self.pipeline(messages, max_new_tokens=128, batch_size=len(messages))
+        return [output[0]["generated_text"] if output else "" for output in outputs]
 
     def reply(self, message: str) -> str:
-        outputs = self.pipeline(message, max_new_tokens=128)
+        if self.batcher is not None:
+            return self.batcher(message)
+        with self._generate_lock:
+            outputs = self.pipeline(message, max_new_tokens=128)
         if outputs:
             return outputs[0]["generated_text"]
         return ""
 
-def get_chat_provider() -> ChatProvider:
-    provider = current_app.config.get("CHAT_PROVIDER", "openai")
+    def stream(self, message: str) -> Iterator[str]:
+        from transformers import TextIteratorStreamer
+
+        # Generation runs in a thread and hands decoded text to the streamer
+        streamer = TextIteratorStreamer(self.pipeline.tokenizer, skip_prompt=True)
+        errors = []
+
+        def generate():
+            try:
+                self.pipeline(message, max_new_tokens=128, streamer=streamer)
+            except Exception as exc:
+                errors.append(exc)
+                streamer.end()
+            finally:
+                # Released here: generation outlives a client that stops reading
+                self._generate_lock.release()
+
+        self._generate_lock.acquire()
+        worker = threading.Thread(target=generate, daemon=True)
+        try:
+            worker.start()
+        except BaseException:
+            self._generate_lock.release()
+            raise
+        for text in streamer:
+            if text:
+                yield text
+        worker.join()
+        if errors:
+            raise errors[0]
+
+    def warmup(self) -> None:
+        """Run a one-token generation so the first real request is not slow."""
+        self.pipeline("Hello", max_new_tokens=1)
+
+def _provider_settings(config) -> Tuple:
+    """Return the settings that identify a provider instance."""
+    provider = config.get("CHAT_PROVIDER", "openai")
+    if provider == "huggingface":
+        return (
+            provider,
+            config.get("HUGGINGFACE_MODEL", "google/flan-t5-small"),
+            config.get("HUGGINGFACE_API_TOKEN") or os.environ.get("HUGGINGFACE_API_TOKEN"),
+        )
+    if provider == "gemini":
+        return (
+            provider,
+            config.get("GEMINI_MODEL", "gemini-pro"),
+            config.get("GEMINI_API_KEY") or os.environ.get("GEMINI_API_KEY"),
+        )
+    if provider == "anthropic":
+        return (
+            provider,
+            config.get("ANTHROPIC_MODEL", "claude-3-haiku-20240307"),
+            config.get("ANTHROPIC_API_KEY") or os.environ.get("ANTHROPIC_API_KEY"),
+        )
+    if provider == "localhf":
+        return (
+            provider,
+            config.get("LOCAL_MODEL_PATH", "./model"),
+            int(config.get("LOCAL_MODEL_MAX_BATCH_SIZE", 1)),
+            float(config.get("LOCAL_MODEL_MAX_WAIT_MS", 0)) / 1000,
+        )
+    return (
+        "openai",
+        config.get("OPENAI_MODEL", "gpt-3.5-turbo"),
+        config.get("OPENAI_API_KEY") or os.environ.get("OPENAI_API_KEY"),
+    )
+
+
+def create_chat_provider(settings: Tuple) -> ChatProvider:
+    """Create a new provider from settings built by ``_provider_settings``."""
+    provider, *args = settings
     if provider == "huggingface":
-        model = current_app.config.get("HUGGINGFACE_MODEL", "google/flan-t5-small")
-        token = current_app.config.get("HUGGINGFACE_API_TOKEN") or os.environ.get("HUGGINGFACE_API_TOKEN")
-        return HuggingFaceProvider(model, token)
+        return HuggingFaceProvider(*args)
     if provider == "gemini":
-        model = current_app.config.get("GEMINI_MODEL", "gemini-pro")
-        api_key = current_app.config.get("GEMINI_API_KEY") or os.environ.get("GEMINI_API_KEY")
-        return GeminiProvider(model, api_key)
+        return GeminiProvider(*args)
     if provider == "anthropic":
-        model = current_app.config.get("ANTHROPIC_MODEL", "claude-3-haiku-20240307")
-        api_key = current_app.config.get("ANTHROPIC_API_KEY") or os.environ.get("ANTHROPIC_API_KEY")
-        return AnthropicProvider(model, api_key)
+        return AnthropicProvider(*args)
     if provider == "localhf":
-        model_path = current_app.config.get("LOCAL_MODEL_PATH", "./model")
-        return LocalHFProvider(model_path)
-    model = current_app.config.get("OPENAI_MODEL", "gpt-3.5-turbo")
-    api_key = current_app.config.get("OPENAI_API_KEY") or os.environ.get("OPENAI_API_KEY")
-    return OpenAIProvider(model, api_key)
+        return LocalHFProvider(*args)
+    return OpenAIProvider(*args)
+
+
+# Providers hold SDK clients, HTTP sessions and possibly a loaded model, so
+# one instance per distinct configuration is shared by all requests
+_providers: Dict[Tuple, ChatProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_chat_provider() -> ChatProvider:
+    """Return the shared provider for the current app configuration."""
+    settings = _provider_settings(current_app.config)
+    provider = _providers.get(settings)
+    if provider is None:
+        with _providers_lock:
+            provider = _providers.get(settings)
+            if provider is None:
+                provider = create_chat_provider(settings)
+                _providers[settings] = provider
+    return provider
+
+
+def warm_chat_provider() -> ChatProvider:
+    """Create the configured provider and let it prepare, e.g. load its model."""
+    provider = get_chat_provider()
+    provider.warmup()
+    return provider
+
+
+def clear_chat_providers() -> None:
+    """Drop shared providers, e.g. after API keys were rotated."""
+    with _providers_lock:
+        _providers.clear()
+
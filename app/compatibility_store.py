@@ -0,0 +1,286 @@
+# app/compatibility_store.py
+"""Materialized per-user compatibility rows.
+
+``user_compatibility`` holds one row per ordered pair of users that share a
+typology where the second user lies within the first user's search radius.
+Rows are rebuilt in full by :func:`rebuild_user_compatibility` (see
+``scripts/refresh_compatibility.py``). With ``MATERIALIZE_COMPATIBILITY``
+enabled, rows of every user whose coordinates, ``max_distance`` or type
+changed are refreshed after the commit by a background thread, so saving a
+profile does not wait for the refresh. A refresh that fails or is lost on
+shutdown is repaired by the next full rebuild.
+
+Once the table is filled, ``/nearby_compatibles`` and
+``/api/matches/incoming`` read their results from it
+(:func:`is_materialized_available`).
+"""
+from __future__ import annotations
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from typing import Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from flask import current_app, has_app_context
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
+
+from .change_tracking import TYPE_FIELDS, USER_MATCH_FIELDS, history_changed, on_commit
+from .extensions import db
+from .models import User, UserType, UserCompatibility
+from .repositories.user_repository import get_covering_candidates, get_nearby_candidates
+from .services import get_users_distances
+from .typologies.matrix import get_relationship_matrix
+
+
+def _is_matchable(user) -> bool:
+    return (
+        user.latitude is not None
+        and user.longitude is not None
+        and user.user_type is not None
+        and user.user_type.type_code is not None
+    )
+
+
+def _pair_rows(user, others: Iterable, outgoing: bool) -> List[dict]:
+    """Build rows between ``user`` and ``others`` of the same typology.
+
+    With ``outgoing`` the rows describe ``user`` towards each other user and
+    are limited by ``user.max_distance``; otherwise they describe each other
+    user towards ``user`` and are limited by the other user's radius.
+    """
+    typology_name = user.user_type.typology_name
+    others = [
+        other
+        for other in others
+        if other.id != user.id
+        and _is_matchable(other)
+        and other.user_type.typology_name == typology_name
+    ]
+    matched = []
+    for other, distance in zip(others, get_users_distances(user, others).tolist()):
+        radius = user.max_distance if outgoing else other.max_distance
+        if radius is not None and distance > radius:
+            continue
+        matched.append((other, distance))
+    if not matched:
+        return []
+
+    matrix = get_relationship_matrix(typology_name)
+    code = user.user_type.type_code
+    other_codes = np.fromiter((o.user_type.type_code for o, _ in matched), dtype=np.intp)
+    if outgoing:
+        relationships = matrix.relationships[code][other_codes]
+        scores = matrix.scores[code][other_codes]
+    else:
+        relationships = matrix.relationships[other_codes, code]
+        scores = matrix.scores[other_codes, code]
+
+    rows = []
+    for (other, distance), relationship, score in zip(matched, relationships, scores):
+        user_a, user_b = (user, other) if outgoing else (other, user)
+        rows.append(
+            {
+                "user_a_id": user_a.id,
+                "user_b_id": user_b.id,
+                "typology_name": typology_name,
+                "relationship_code": int(relationship),
+                "comfort_score": int(score),
+                "distance": distance,
+            }
+        )
+    return rows
+
+
+def refresh_user_compatibility(user, session=None) -> int:
+    """Recompute all rows in which ``user`` takes part.
+
+    Candidates on both sides are read from the database rather than the
+    in-memory indexes, which may lag behind other processes. The caller is
+    responsible for committing. Returns the number of rows written.
+    """
+    session = session or db.session
+    session.query(UserCompatibility).filter(
+        or_(
+            UserCompatibility.user_a_id == user.id,
+            UserCompatibility.user_b_id == user.id,
+        )
+    ).delete(synchronize_session=False)
+    if not _is_matchable(user):
+        return 0
+
+    rows = _pair_rows(user, get_nearby_candidates(user), outgoing=True)
+    rows += _pair_rows(user, get_covering_candidates(user), outgoing=False)
+    if rows:
+        session.bulk_insert_mappings(UserCompatibility, rows)
+    return len(rows)
+
+
+def rebuild_user_compatibility(commit_every: int = 500) -> int:
+    """Rebuild the whole ``user_compatibility`` table.
+
+    Intended for a periodic background job. Every directed pair is produced
+    from its source user, so only outgoing rows are computed. Returns the
+    number of rows written.
+    """
+    db.session.query(UserCompatibility).delete(synchronize_session=False)
+    total = 0
+    users = (
+        User.query.options(joinedload(User.user_type))
+        .filter(User.latitude.isnot(None), User.longitude.isnot(None))
+        .all()
+    )
+    for index, user in enumerate(users, start=1):
+        if not _is_matchable(user):
+            continue
+        rows = _pair_rows(user, get_nearby_candidates(user), outgoing=True)
+        if rows:
+            db.session.bulk_insert_mappings(UserCompatibility, rows)
+            total += len(rows)
+        if index % commit_every == 0:
+            db.session.commit()
+    db.session.commit()
+    return total
+
+
+def get_materialized_compatibles(user, min_score: int = 50) -> List[Tuple[User, float]]:
+    """Return ``(user, distance)`` pairs compatible with ``user`` sorted by distance.
+
+    Only pairs with a comfort score above ``min_score`` are returned, matching
+    :func:`app.services.get_distance_if_compatible`.
+    """
+    rows = (
+        db.session.query(User, UserCompatibility.distance)
+        .join(UserCompatibility, UserCompatibility.user_b_id == User.id)
+        .filter(
+            UserCompatibility.user_a_id == user.id,
+            UserCompatibility.comfort_score > min_score,
+        )
+        .order_by(UserCompatibility.distance, User.id)
+        .all()
+    )
+    return [(other, distance) for other, distance in rows]
+
+
+def get_materialized_incoming(user, min_score: int = 50) -> List[Tuple[User, float, int, int]]:
+    """Return users who have ``user`` within their radius and are compatible towards them.
+
+    Returns ``(other, distance, comfort_score, relationship_code)`` tuples
+    sorted by distance.
+    """
+    rows = (
+        db.session.query(
+            User,
+            UserCompatibility.distance,
+            UserCompatibility.comfort_score,
+            UserCompatibility.relationship_code,
+        )
+        .join(UserCompatibility, UserCompatibility.user_a_id == User.id)
+        .filter(
+            UserCompatibility.user_b_id == user.id,
+            UserCompatibility.comfort_score > min_score,
+        )
+        .order_by(UserCompatibility.distance, User.id)
+        .all()
+    )
+    return [tuple(row) for row in rows]
+
+
+def _is_enabled() -> bool:
+    return has_app_context() and current_app.config.get("MATERIALIZE_COMPATIBILITY", False)
+
+
+def is_materialized_available() -> bool:
+    """Return whether match reads should be served from ``user_compatibility``.
+
+    True when ``MATERIALIZE_COMPATIBILITY`` is on and the table has been
+    filled (see ``scripts/refresh_compatibility.py``). Rows of a change are
+    written shortly after its commit, so reads may lag behind it briefly.
+    """
+    return _is_enabled() and db.session.query(UserCompatibility.user_a_id).first() is not None
+
+
+def _collect_changes(session, pending):
+    """Remember users whose compatibility rows became stale.
+
+    ``pending`` holds the ids of changed users, renamed types and deleted users.
+    """
+    if not _is_enabled():
+        return pending
+    user_ids, type_ids, deleted_ids = pending or (set(), set(), set())
+    for obj in session.new:
+        if isinstance(obj, User):
+            user_ids.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, User) and history_changed(obj, USER_MATCH_FIELDS):
+            user_ids.add(obj.id)
+        elif isinstance(obj, UserType) and history_changed(obj, TYPE_FIELDS):
+            type_ids.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            deleted_ids.add(obj.id)
+    if user_ids or type_ids or deleted_ids:
+        return user_ids, type_ids, deleted_ids
+    return None
+
+
+def _refresh_changed(app, user_ids: Set[int], type_ids: Set[int], deleted_ids: Set[int]) -> None:
+    """Refresh rows of changed users in a transaction of its own."""
+    with app.app_context():
+        session = db.session
+        try:
+            if deleted_ids:
+                session.query(UserCompatibility).filter(
+                    or_(
+                        UserCompatibility.user_a_id.in_(deleted_ids),
+                        UserCompatibility.user_b_id.in_(deleted_ids),
+                    )
+                ).delete(synchronize_session=False)
+            if type_ids:
+                user_ids.update(
+                    user_id
+                    for (user_id,) in session.query(User.id).filter(User.type_id.in_(type_ids))
+                )
+            user_ids -= deleted_ids
+            for user_id in user_ids:
+                user = session.query(User).get(user_id)
+                if user is not None:
+                    refresh_user_compatibility(user, session)
+            session.commit()
+        except Exception:
+            session.rollback()
+            app.logger.exception("Failed to refresh compatibility rows")
+
+
+_refresh_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="compatibility-refresh")
+_refresh_futures: Set[Future] = set()
+_refresh_lock = threading.Lock()
+
+
+def wait_for_compatibility_refresh(timeout: Optional[float] = None) -> None:
+    """Block until the refreshes scheduled so far have finished."""
+    with _refresh_lock:
+        futures = set(_refresh_futures)
+    wait_futures(futures, timeout=timeout)
+
+
+def _schedule_refresh(pending):
+    """Hand the changed users of a committed transaction to the refresh thread.
+
+    Runs once the session has released its connection, so the refresh never
+    shares a transaction with the request that made the change.
+    """
+    if not _is_enabled():
+        return
+    future = _refresh_pool.submit(_refresh_changed, current_app._get_current_object(), *pending)
+    with _refresh_lock:
+        _refresh_futures.add(future)
+
+    def forget(done):
+        with _refresh_lock:
+            _refresh_futures.discard(done)
+
+    future.add_done_callback(forget)
+
+
+on_commit("compatibility_store", _collect_changes, _schedule_refresh)
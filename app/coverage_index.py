@@ -0,0 +1,196 @@
+# app/coverage_index.py
+"""Reverse radius index: which users' search disks contain a point.
+
+Every located user searches a disk around their coordinates with radius
+``max_distance``. The index files each user under the latitude/longitude
+grid cells their disk touches, so "whose radius contains P" only looks at
+the users filed under P's cells and checks their exact distance, instead
+of scanning the whole population.
+
+Disks that contain a pole or have no radius at all (such users see
+everybody) are kept in a separate list that every lookup checks.
+
+Like :mod:`app.type_index`, the index is built from the user snapshot
+(:mod:`app.user_snapshot`) and replaced together with it. It may therefore
+lag behind the database and only serves reads that are shown, never written
+back (see :func:`app.recommendations.incoming_matches`).
+"""
+import math
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from flask import current_app
+
+from .geo import bounding_box, distances_km, unit_vector
+from .user_snapshot import UserSnapshot, get_user_snapshot
+
+# Search disk of a user: (latitude, longitude, max_distance or None)
+Disk = Tuple[float, float, Optional[float]]
+# (level, row, column)
+Cell = Tuple[int, int, int]
+
+
+class CoverageIndex:
+    """User ids filed by the grid cells their search disk touches.
+
+    Cells come in levels of ``cell_degrees * 2 ** level`` degrees; each disk
+    is filed on the finest level where it touches at most ``max_cells``
+    cells, so small and large radii both cost a handful of cells. A lookup
+    reads one cell per level and checks the exact distance of the users
+    found there in one NumPy operation.
+    """
+
+    def __init__(self, cell_degrees: float = 0.5, max_cells: int = 16):
+        if cell_degrees <= 0:
+            raise ValueError("cell_degrees must be positive")
+        self.cell_degrees = cell_degrees
+        self.max_cells = max_cells
+        self.levels = max(int(math.ceil(math.log2(180.0 / cell_degrees))), 0) + 1
+        # (level, row, column) -> slots of the disks filed there
+        self._cells: Dict[Cell, Set[int]] = {}
+        # Slots checked by every lookup
+        self._wide: Set[int] = set()
+        self._slots: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._cells_of_slot: Dict[int, Optional[List[Cell]]] = {}
+        self._user_ids = np.zeros(0, dtype=np.int64)
+        self._vectors = np.zeros((0, 3))
+        self._radii = np.zeros(0)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _size(self, level: int) -> float:
+        return self.cell_degrees * 2 ** level
+
+    def _row(self, level: int, latitude: float) -> int:
+        rows = int(math.ceil(180.0 / self._size(level)))
+        return min(max(int(math.floor((latitude + 90.0) / self._size(level))), 0), rows - 1)
+
+    def _column(self, level: int, longitude: float) -> int:
+        columns = int(math.ceil(360.0 / self._size(level)))
+        return min(max(int(math.floor((longitude + 180.0) / self._size(level))), 0), columns - 1)
+
+    def cells(self, latitude: float, longitude: float) -> List[Cell]:
+        """Return the cell containing a point on every level."""
+        return [
+            (level, self._row(level, latitude), self._column(level, longitude))
+            for level in range(self.levels)
+        ]
+
+    def disk_cells(self, disk: Disk) -> Optional[List[Cell]]:
+        """Return the cells ``disk`` is filed under, or ``None`` if it is too wide."""
+        latitude, longitude, radius_km = disk
+        if radius_km is None:
+            return None
+        min_lat, max_lat, lon_ranges = bounding_box(latitude, longitude, radius_km)
+        if lon_ranges is None:
+            return None
+        for level in range(self.levels):
+            rows = range(self._row(level, min_lat), self._row(level, max_lat) + 1)
+            columns = sorted({
+                column
+                for lo, hi in lon_ranges
+                for column in range(self._column(level, lo), self._column(level, hi) + 1)
+            })
+            if len(rows) * len(columns) <= self.max_cells:
+                return [(level, row, column) for row in rows for column in columns]
+        return None
+
+    def _slot(self) -> int:
+        if not self._free:
+            size = len(self._user_ids)
+            capacity = max(16, 2 * size)
+            self._user_ids = np.resize(self._user_ids, capacity)
+            self._vectors = np.resize(self._vectors, (capacity, 3))
+            self._radii = np.resize(self._radii, capacity)
+            self._free.extend(range(capacity - 1, size - 1, -1))
+        return self._free.pop()
+
+    def set(self, user_id: int, disk: Optional[Disk]) -> None:
+        """File ``user_id`` under the cells of ``disk``; ``None`` removes the user."""
+        cells = None if disk is None else self.disk_cells(disk)
+        with self._lock:
+            slot = self._slots.pop(user_id, None)
+            if slot is not None:
+                old_cells = self._cells_of_slot.pop(slot)
+                if old_cells is None:
+                    self._wide.discard(slot)
+                else:
+                    for cell in old_cells:
+                        bucket = self._cells[cell]
+                        bucket.discard(slot)
+                        if not bucket:
+                            del self._cells[cell]
+                self._free.append(slot)
+            if disk is None:
+                return
+            slot = self._slot()
+            self._slots[user_id] = slot
+            self._cells_of_slot[slot] = cells
+            self._user_ids[slot] = user_id
+            self._vectors[slot] = unit_vector(disk[0], disk[1])
+            self._radii[slot] = np.inf if disk[2] is None else disk[2]
+            if cells is None:
+                self._wide.add(slot)
+            else:
+                for cell in cells:
+                    self._cells.setdefault(cell, set()).add(slot)
+
+    def covering(self, latitude: float, longitude: float) -> Set[int]:
+        """Return users whose search disk contains the point."""
+        with self._lock:
+            slots = list(self._wide)
+            for cell in self.cells(latitude, longitude):
+                slots.extend(self._cells.get(cell, ()))
+            if not slots:
+                return set()
+            slots = np.array(slots, dtype=np.intp)
+            vectors = self._vectors[slots]
+            radii = self._radii[slots]
+            user_ids = self._user_ids[slots]
+        distances = distances_km(unit_vector(latitude, longitude), vectors)
+        return set(user_ids[distances <= radii].tolist())
+
+
+def build_coverage_index(snapshot: UserSnapshot) -> CoverageIndex:
+    """Build the index from the located users of ``snapshot``."""
+    index = CoverageIndex(
+        current_app.config.get("COVERAGE_INDEX_CELL_DEGREES", 0.5),
+        current_app.config.get("COVERAGE_INDEX_MAX_CELLS", 16),
+    )
+    located = np.flatnonzero(~np.isnan(snapshot.latitudes))
+    for user_id, latitude, longitude, max_distance in zip(
+        snapshot.ids[located].tolist(),
+        snapshot.latitudes[located].tolist(),
+        snapshot.longitudes[located].tolist(),
+        snapshot.max_distances[located].tolist(),
+    ):
+        index.set(user_id, (latitude, longitude, None if math.isnan(max_distance) else max_distance))
+    return index
+
+
+def get_coverage_index() -> CoverageIndex:
+    """Return the index of the current user snapshot."""
+    return get_user_snapshot().derived("coverage_index", build_coverage_index)
+
+
+def is_coverage_index_enabled() -> bool:
+    return current_app.config.get("COVERAGE_INDEX_ENABLED", True)
+
+
+def covering_user_ids(user) -> Optional[Set[int]]:
+    """Return ids of other users whose search radius contains ``user``.
+
+    Returns ``None`` when the index is disabled and an empty set when
+    ``user`` has no coordinates.
+    """
+    if not is_coverage_index_enabled():
+        return None
+    if user.latitude is None or user.longitude is None:
+        return set()
+    user_ids = get_coverage_index().covering(user.latitude, user.longitude)
+    user_ids.discard(user.id)
+    return user_ids
@@ -0,0 +1,62 @@
+# app/data_cache.py
+"""In-memory cache for JSON data files.
+
+Parsed files are kept per path and reparsed only when the file's
+modification time or size changes, so edits made through the admin pages
+(or by hand) are picked up on the next read without a disk read and JSON
+parse on every call.
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+FileVersion = Tuple[int, int]
+
+_cache: Dict[str, Tuple[FileVersion, Any]] = {}
+_lock = threading.Lock()
+
+
+def file_version(path: str) -> Optional[FileVersion]:
+    """Return ``(mtime_ns, size)`` of a file or ``None`` if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_json_file(path: str) -> Any:
+    """Return the parsed contents of a JSON file.
+
+    The returned object is shared between callers and must not be modified;
+    copy it first if you need to change it.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the file is not valid JSON.
+    """
+    path = os.path.realpath(path)
+    version = file_version(path)
+    if version is None:
+        _cache.pop(path, None)
+        raise FileNotFoundError(path)
+
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with _lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        _cache[path] = (version, data)
+    return data
+
+
+def clear_data_cache() -> None:
+    """Drop all cached files."""
+    _cache.clear()
@@ -1,7 +1,15 @@
+import numpy as np
 from haversine import haversine, Unit
 from flask import current_app
 from .extensions import cache
-from .typologies.registry import get_typology_classes
+from .geo import distances_km, unit_vector
+from .typologies.registry import (
+    get_typology_classes,
+    get_typology_instance,
+    decode_type,
+    encode_type,
+)
+from .typologies.matrix import get_relationship_matrix
 
 
 # Central registry for available typologies loaded from the registry.
@@ -19,7 +27,7 @@ def get_types_by_typology(typology_name):
         current_app.config.get("TESTING", False)
         or current_app.config.get("CACHE_TYPE") == "NullCache"
     ):
-        return typology_class().get_all_types()
+        return get_typology_instance(typology_name).get_all_types()
     else:
         return _get_types_cached(typology_name, typology_class)
 
@@ -27,21 +35,140 @@ def get_types_by_typology(typology_name):
 @cache.memoize(timeout=3600)
 def _get_types_cached(typology_name, typology_class):
     """Cached version of get_types_by_typology."""
-    return typology_class().get_all_types()
+    return get_typology_instance(typology_name).get_all_types()
+
+
+def _is_type_code(value):
+    """Return True if ``value`` is an integer type code rather than a name."""
+    return isinstance(value, int) and not isinstance(value, bool)
 
 
 def calculate_relationship(user1, user2, typology):
+    if _is_type_code(user1) and _is_type_code(user2):
+        return calculate_relationship_by_codes(user1, user2, typology)
+    if _is_type_code(user1):
+        user1 = decode_type(typology, user1)
+    if _is_type_code(user2):
+        user2 = decode_type(typology, user2)
     if not user1 or not user2:
         raise ValueError("User types cannot be empty")
-    typology_class = TYPOLOGY_CLASSES.get(typology)
-    if typology_class is None:
+    typology_instance = get_typology_instance(typology)
+    if typology_instance is None:
         raise ValueError(f"Invalid typology: {typology}")
-    typology_instance = typology_class()
     relationship_type = typology_instance.determine_relationship_type(user1, user2)
     comfort_score, _ = typology_instance.get_comfort_score(relationship_type)
     return relationship_type, comfort_score
 
 
+def calculate_relationship_by_codes(code1, code2, typology):
+    """Calculate the relationship between two types given by their type codes.
+
+    Typologies with precomputed pair tables answer directly by code; the
+    others are evaluated on the decoded canonical type names.
+    """
+    typology_instance = get_typology_instance(typology)
+    if typology_instance is None:
+        raise ValueError(f"Invalid typology: {typology}")
+    type1 = decode_type(typology, code1)
+    type2 = decode_type(typology, code2)
+    if hasattr(typology_instance, "get_relationship_by_ids"):
+        relationship_type = typology_instance.get_relationship_by_ids(code1, code2)
+        comfort_score = typology_instance.get_comfort_score_by_ids(code1, code2)
+        return relationship_type, comfort_score
+    relationship_type = typology_instance.determine_relationship_type(type1, type2)
+    comfort_score, _ = typology_instance.get_comfort_score(relationship_type)
+    return relationship_type, comfort_score
+
+
+def calculate_relationships_batch(user_type, candidate_codes, typology):
+    """Score one type against many candidate types at once.
+
+    Args:
+        user_type: Type name or type code of the reference user.
+        candidate_codes: Sequence or array of candidate type codes.
+        typology: Name of the typology.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Relationship codes (``uint8``) and
+        comfort scores (``int16``), one per candidate. Relationship codes
+        index ``get_relationship_matrix(typology).relationship_names``.
+    """
+    if TYPOLOGY_CLASSES.get(typology) is None:
+        raise ValueError(f"Invalid typology: {typology}")
+    matrix = get_relationship_matrix(typology)
+    if _is_type_code(user_type):
+        decode_type(typology, user_type)
+        code = user_type
+    else:
+        if not user_type:
+            raise ValueError("User types cannot be empty")
+        code = encode_type(typology, user_type)
+
+    candidates = np.asarray(candidate_codes, dtype=np.intp)
+    if candidates.size and (candidates.min() < 0 or candidates.max() >= matrix.size):
+        raise ValueError(f"Invalid type code in candidates for typology '{typology}'")
+    return matrix.relationships[code][candidates], matrix.scores[code][candidates]
+
+
+def encode_types(types, typology):
+    """Convert a sequence of type names and/or type codes to type codes.
+
+    Args:
+        types: Sequence of type names or codes, or an integer array of codes.
+        typology: Name of the typology.
+
+    Returns:
+        np.ndarray: Type codes (``intp``), one per element of ``types``.
+
+    Raises:
+        ValueError: If the typology or one of the types is unknown.
+    """
+    if TYPOLOGY_CLASSES.get(typology) is None:
+        raise ValueError(f"Invalid typology: {typology}")
+    size = get_relationship_matrix(typology).size
+    if isinstance(types, np.ndarray) and np.issubdtype(types.dtype, np.integer):
+        codes = types.astype(np.intp, copy=False)
+    else:
+        codes = np.empty(len(types), dtype=np.intp)
+        known = {}
+        for index, value in enumerate(types):
+            if _is_type_code(value):
+                codes[index] = value
+                continue
+            if not isinstance(value, str) or not value:
+                raise ValueError(f"Invalid type value: {value!r}")
+            code = known.get(value)
+            if code is None:
+                code = known[value] = encode_type(typology, value)
+            codes[index] = code
+    if codes.size and (codes.min() < 0 or codes.max() >= size):
+        raise ValueError(f"Invalid type code for typology '{typology}'")
+    return codes
+
+
+def calculate_relationship_pairs(types1, types2, typology):
+    """Calculate relationships for many pairs of types element-wise.
+
+    Args:
+        types1: Type names or codes of the first member of each pair.
+        types2: Type names or codes of the second member of each pair.
+        typology: Name of the typology.
+
+    Returns:
+        Tuple[List[str], List[int]]: Relationship type and comfort score for
+        each pair, as :func:`calculate_relationship` would return them.
+    """
+    codes1 = encode_types(types1, typology)
+    codes2 = encode_types(types2, typology)
+    if len(codes1) != len(codes2):
+        raise ValueError("Both type sequences must have the same length")
+    matrix = get_relationship_matrix(typology)
+    names = matrix.relationship_names
+    relationships = matrix.relationships[codes1, codes2]
+    scores = matrix.scores[codes1, codes2]
+    return [names[code] for code in relationships.tolist()], scores.tolist()
+
+
 def get_users_distance(user1, user2):
     """Return the distance between two users based on their coordinates."""
     if (
@@ -58,14 +185,47 @@ def get_users_distance(user1, user2):
     )
 
 
+def _stored_unit_vector(user):
+    """Return the stored unit vector of ``user``, computing it when missing."""
+    if user.unit_x is not None:
+        return user.unit_x, user.unit_y, user.unit_z
+    if user.latitude is None or user.longitude is None:
+        raise ValueError("Both users must have coordinates set")
+    return unit_vector(user.latitude, user.longitude)
+
+
+def get_users_distances(user, others):
+    """Return distances in km from ``user`` to each of ``others`` as an array.
+
+    Uses the stored unit vectors of all users (computed from the coordinates
+    when missing), so many candidates are measured in one NumPy operation.
+    Every user must have coordinates.
+    """
+    if user.latitude is None or user.longitude is None:
+        raise ValueError("Both users must have coordinates set")
+    vectors = np.empty((len(others), 3))
+    for row, other in enumerate(others):
+        vectors[row] = _stored_unit_vector(other)
+    return distances_km(_stored_unit_vector(user), vectors)
+
+
 def get_distance_if_compatible(user1, user2):
     if user1.user_type is None or user2.user_type is None:
         raise ValueError("Both users must have a user_type assigned")
-    relationship_type, comfort_score = calculate_relationship(
-        user1.user_type.type_value,
-        user2.user_type.type_value,
-        user1.user_type.typology_name,
-    )
+    type1 = user1.user_type
+    type2 = user2.user_type
+    if (
+        type1.type_code is not None
+        and type2.type_code is not None
+        and type1.typology_name == type2.typology_name
+    ):
+        relationship_type, comfort_score = calculate_relationship_by_codes(
+            type1.type_code, type2.type_code, type1.typology_name
+        )
+    else:
+        relationship_type, comfort_score = calculate_relationship(
+            type1.type_value, type2.type_value, type1.typology_name
+        )
     if comfort_score <= 50:
         raise ValueError("Users are not compatible enough to consider meeting")
 
@@ -78,9 +238,3 @@ def get_distance_if_compatible(user1, user2):
 
     return distance
 
-
-def get_typology_instance(typology_name):
-    typology_class = TYPOLOGY_CLASSES.get(typology_name)
-    if typology_class is None:
-        return None
-    return typology_class()
@@ -0,0 +1,91 @@
+# app/geo.py
+"""Geospatial helpers used to pre-filter match candidates by distance."""
+from __future__ import annotations
+import math
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Mean Earth radius used by the ``haversine`` package
+EARTH_RADIUS_KM = 6371.0088
+
+
+def bounding_box(
+    latitude: float, longitude: float, radius_km: float
+) -> Tuple[float, float, Optional[List[Tuple[float, float]]]]:
+    """Return a latitude/longitude box containing a circle on the sphere.
+
+    Every point within ``radius_km`` of the centre lies inside the box, so
+    the box can be used as a cheap range filter before the exact distance
+    check.
+
+    Args:
+        latitude (float): Latitude of the centre in degrees.
+        longitude (float): Longitude of the centre in degrees.
+        radius_km (float): Radius of the circle in kilometres.
+
+    Returns:
+        Tuple[float, float, Optional[List[Tuple[float, float]]]]: Minimum and
+        maximum latitude and a list of longitude ranges. The list holds two
+        ranges when the box crosses the antimeridian and is ``None`` when all
+        longitudes are covered (the circle contains a pole).
+    """
+    angular_radius = radius_km / EARTH_RADIUS_KM
+    lat = math.radians(latitude)
+    min_lat = lat - angular_radius
+    max_lat = lat + angular_radius
+
+    if min_lat <= -math.pi / 2 or max_lat >= math.pi / 2 or angular_radius >= math.pi:
+        return (
+            max(math.degrees(min_lat), -90.0),
+            min(math.degrees(max_lat), 90.0),
+            None,
+        )
+
+    delta_lon = math.degrees(math.asin(math.sin(angular_radius) / math.cos(lat)))
+    min_lon = longitude - delta_lon
+    max_lon = longitude + delta_lon
+    if min_lon < -180.0:
+        lon_ranges = [(min_lon + 360.0, 180.0), (-180.0, max_lon)]
+    elif max_lon > 180.0:
+        lon_ranges = [(min_lon, 180.0), (-180.0, max_lon - 360.0)]
+    else:
+        lon_ranges = [(min_lon, max_lon)]
+    return math.degrees(min_lat), math.degrees(max_lat), lon_ranges
+
+
+def unit_vector(latitude: float, longitude: float) -> Tuple[float, float, float]:
+    """Return the point on the unit sphere for a latitude/longitude in degrees."""
+    lat = math.radians(latitude)
+    lon = math.radians(longitude)
+    cos_lat = math.cos(lat)
+    return cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat)
+
+
+def unit_vectors(latitudes, longitudes) -> np.ndarray:
+    """Vectorized :func:`unit_vector`; returns an ``(n, 3)`` array."""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def distances_km(center: Sequence[float], vectors: np.ndarray) -> np.ndarray:
+    """Return great-circle distances from ``center`` to each row of ``vectors``.
+
+    Both are unit vectors as returned by :func:`unit_vector`; the distance is
+    the arc length ``R * arccos(a . b)``, so a whole array of candidates
+    costs one matrix-vector product and one ``arccos``.
+    """
+    dots = np.asarray(vectors, dtype=np.float64) @ np.asarray(center, dtype=np.float64)
+    return EARTH_RADIUS_KM * np.arccos(np.clip(dots, -1.0, 1.0))
+
+
+def min_dot(radius_km: float) -> float:
+    """Return the smallest dot product of two unit vectors ``radius_km`` apart.
+
+    ``a . b >= min_dot(r)`` selects exactly the points within ``r`` km, a
+    condition SQL can evaluate on stored unit vectors without trigonometry.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    return math.cos(angle) if angle < math.pi else -1.0
@@ -2,9 +2,10 @@ from .extensions import db
 from flask import current_app
 from flask_user import UserMixin
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, Boolean
+from sqlalchemy import Column, Integer, SmallInteger, String, ForeignKey, Float, Boolean
 from sqlalchemy import event
-from app.services import get_typology_instance
+from app.services import get_typology_instance, encode_type
+from app.geo import unit_vector
 
 
 
@@ -22,6 +23,11 @@ class User(UserMixin, db.Model):
     # Add latitude/longitude fields since tests assume their presence
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
+    # Координати як одиничний вектор (див. app.geo.unit_vector), оновлюються
+    # у validate_user_coordinates
+    unit_x = Column(Float, nullable=True)
+    unit_y = Column(Float, nullable=True)
+    unit_z = Column(Float, nullable=True)
     city = Column(String(100), nullable=True)
     country = Column(String(100), nullable=True)
 
@@ -38,6 +44,34 @@ class User(UserMixin, db.Model):
     # Можемо додати url аватару з соціальних мереж
     avatar_url = Column(String(512), nullable=True)
 
+    # Індекси для гарячих запитів; username, email та OAuth id вже мають
+    # унікальні індекси (див. migrations/versions/add_hot_query_indexes.py)
+    __table_args__ = (
+        db.Index("ix_users_type_id", "type_id"),
+        db.Index(
+            "ix_users_lat_lon",
+            "latitude",
+            "longitude",
+            postgresql_where=db.text("latitude IS NOT NULL AND longitude IS NOT NULL"),
+            sqlite_where=db.text("latitude IS NOT NULL AND longitude IS NOT NULL"),
+        ),
+        db.Index(
+            "ix_users_city_type",
+            "city",
+            "type_id",
+            postgresql_where=db.text("city IS NOT NULL"),
+            sqlite_where=db.text("city IS NOT NULL"),
+        ),
+        db.Index(
+            "ix_users_country_type",
+            "country",
+            "type_id",
+            postgresql_where=db.text("country IS NOT NULL"),
+            sqlite_where=db.text("country IS NOT NULL"),
+        ),
+        db.Index("ix_users_max_distance", "max_distance"),
+    )
+
     def set_password(self, password):
         self.password_hash = current_app.user_manager.hash_password(password)
 
@@ -52,6 +86,49 @@ class UserType(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     typology_name = db.Column(db.String(50), nullable=False)
     type_value = db.Column(db.String(50), nullable=False)
+    # Compact integer code of type_value within its typology (see typologies.registry)
+    type_code = db.Column(db.SmallInteger, nullable=True)
+
+    # Один рядок на тип: користувачі посилаються на спільні рядки
+    __table_args__ = (
+        db.Index("ix_user_type_typology_value", "typology_name", "type_value", unique=True),
+    )
+
+class UserCompatibility(db.Model):
+    """Materialized compatibility of ``user_a`` towards ``user_b``.
+
+    A row exists when both users share a typology and ``user_b`` lies within
+    ``user_a``'s search radius. Rows are maintained by
+    :mod:`app.compatibility_store`.
+    """
+    __tablename__ = "user_compatibility"
+    user_a_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    user_b_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    typology_name = Column(String(50), primary_key=True)
+    # Index into get_relationship_matrix(typology_name).relationship_names
+    relationship_code = Column(SmallInteger, nullable=False)
+    comfort_score = Column(Integer, nullable=False)
+    distance = Column(Float, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_user_compatibility_a_score", "user_a_id", "comfort_score"),
+        db.Index("ix_user_compatibility_b", "user_b_id"),
+    )
+
+
+class TypeDistribution(db.Model):
+    """Number of users per country, city and type.
+
+    Maintained by :mod:`app.type_distribution`. Missing countries and cities
+    are stored as empty strings so that they can be part of the key.
+    """
+    __tablename__ = "type_distribution"
+    country = Column(String(100), primary_key=True)
+    city = Column(String(100), primary_key=True)
+    typology_name = Column(String(50), primary_key=True)
+    type_value = Column(String(50), primary_key=True)
+    user_count = Column(Integer, nullable=False, default=0)
+
 
 def validate_user_type(mapper, connection, target):
     # target это экземпляр UserType, который мы пытаемся вставить или обновить.
@@ -59,11 +136,8 @@ def validate_user_type(mapper, connection, target):
     if not typology_instance:
         raise ValueError(f"Unknown typology: {target.typology_name}")
 
-    all_types = typology_instance.get_all_types()
-    if target.type_value not in all_types:
-        raise ValueError(
-            f"Invalid type_value '{target.type_value}' for typology '{target.typology_name}'"
-        )
+    # encode_type raises ValueError for values that are not types of the typology
+    target.type_code = encode_type(target.typology_name, target.type_value)
 
 # Функція валідації координат користувача
 def validate_user_coordinates(mapper, connection, target):
@@ -84,6 +158,14 @@ def validate_user_coordinates(mapper, connection, target):
             # Якщо не вдається перетворити в число, встановлюємо None
             target.longitude = None
     
+    # Одиничний вектор для векторизованих відстаней і SQL-фільтрів
+    if target.latitude is not None and target.longitude is not None:
+        target.unit_x, target.unit_y, target.unit_z = unit_vector(
+            target.latitude, target.longitude
+        )
+    else:
+        target.unit_x = target.unit_y = target.unit_z = None
+
     # Валідуємо максимальну відстань
     if target.max_distance is not None:
         try:
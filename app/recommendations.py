@@ -0,0 +1,264 @@
+# app/recommendations.py
+"""Top-K match recommendations.
+
+Candidates are ranked by a blend of comfort and distance decay::
+
+    score = (1 - distance_weight) * comfort / 100 + distance_weight * decay
+    decay = 0.5 ** (distance / half_life_km)
+
+Comfort depends only on the two types, so candidates are taken from the
+type index bucket by bucket in order of falling comfort. A bucket cannot
+score above its comfort at distance zero; once the K best candidates found
+so far all score above that bound, the remaining buckets are skipped. The
+best K are kept in a bounded min-heap, so no list longer than K is sorted.
+With ``TYPE_INDEX_ENABLED`` off, the candidates within the radius are
+loaded once and grouped into the same buckets.
+
+With the user snapshot enabled (see :mod:`app.user_snapshot`) all
+candidates are scored at once on its arrays and the best K are picked by
+partial selection; only those K users are loaded from the database.
+
+:func:`incoming_matches` answers the reverse question, who would see the
+user among their own matches, from the coverage index.
+"""
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .compatibility_store import get_materialized_incoming, is_materialized_available
+from .coverage_index import covering_user_ids
+from .repositories.user_repository import (
+    get_covering_candidates,
+    get_nearby_candidates,
+    get_users_by_ids,
+)
+from .services import get_users_distances
+from .statistics_utils import load_typology_weights
+from .type_index import get_type_index, is_type_index_enabled
+from .typologies.matrix import get_relationship_matrix
+from .user_snapshot import get_user_snapshot, is_snapshot_enabled
+
+
+class Match:
+    """A recommended user with the parts of its score."""
+
+    def __init__(self, user, score: float, comfort: float, relationship: str, distance: float):
+        self.user = user
+        self.score = score
+        self.comfort = comfort
+        self.relationship = relationship
+        self.distance = distance
+
+
+def blend_score(comfort: float, distance, distance_weight: float, half_life_km: float):
+    """Blend a 0-100 comfort score with the decay of ``distance`` km.
+
+    ``distance`` may be a NumPy array, giving an array of scores.
+    """
+    decay = 0.5 ** (distance / half_life_km)
+    return (1.0 - distance_weight) * comfort / 100.0 + distance_weight * decay
+
+
+def top_matches(
+    user,
+    k: int = 10,
+    radius_km: Optional[float] = None,
+    weights: Optional[Dict[str, float]] = None,
+    distance_weight: float = 0.3,
+    half_life_km: float = 25.0,
+    min_score: int = 50,
+) -> List[Match]:
+    """Return the ``k`` best matches for ``user``, best first.
+
+    Args:
+        user: The user to recommend matches for.
+        k: Number of matches to return.
+        radius_km: Search radius; defaults to ``user.max_distance``.
+        weights: Include (1) or exclude (0) typologies, on top of the
+            configured weights where 0 or less excludes a typology. Every
+            user has a single type, so there is nothing to blend; the comfort
+            score is used as it is.
+        distance_weight: Share of the score given to distance decay (0-1).
+        half_life_km: Distance at which the decay halves.
+        min_score: Candidates with comfort at or below this are never returned.
+
+    Raises:
+        ValueError: If ``user`` has no coordinates or the parameters are invalid.
+    """
+    if k <= 0:
+        raise ValueError("k must be positive")
+    if not 0.0 <= distance_weight <= 1.0:
+        raise ValueError("distance_weight must be between 0 and 1")
+    if not math.isfinite(half_life_km) or half_life_km <= 0:
+        raise ValueError("half_life_km must be positive")
+    if radius_km is not None and (not math.isfinite(radius_km) or radius_km <= 0):
+        raise ValueError("radius_km must be positive")
+    if any(weight not in (0, 1) for weight in (weights or {}).values()):
+        raise ValueError("weights must be 0 (exclude) or 1 (include)")
+    if user.latitude is None or user.longitude is None:
+        raise ValueError("User has no coordinates")
+    user_type = user.user_type
+    if user_type is None or user_type.type_code is None:
+        return []
+
+    all_weights = load_typology_weights()
+    all_weights.update(weights or {})
+    typology_name = user_type.typology_name
+    if all_weights.get(typology_name, 1.0) <= 0:
+        return []
+    matrix = get_relationship_matrix(typology_name)
+    row_scores = matrix.scores[user_type.type_code]
+    row_relationships = matrix.relationships[user_type.type_code]
+
+    # NaN marks types that can never be recommended
+    comfort_by_code = np.where(row_scores > min_score, row_scores.astype(np.float64), np.nan)
+    if np.isnan(comfort_by_code).all():
+        return []
+
+    def relationship(code):
+        return matrix.relationship_names[row_relationships[code]]
+
+    if is_snapshot_enabled():
+        return _top_from_snapshot(
+            user, k, radius_km, comfort_by_code, relationship, distance_weight, half_life_km, min_score
+        )
+
+    index = get_type_index() if is_type_index_enabled() else None
+    by_code: Dict[int, list] = {}
+    if index is None:
+        for candidate in get_nearby_candidates(user, radius_km=radius_km):
+            candidate_type = candidate.user_type
+            if candidate_type is not None and candidate_type.typology_name == typology_name:
+                by_code.setdefault(candidate_type.type_code, []).append(candidate)
+    limit = radius_km if radius_km is not None else user.max_distance
+    buckets = sorted(
+        ((float(comfort_by_code[code]), int(code)) for code in np.flatnonzero(~np.isnan(comfort_by_code))),
+        reverse=True,
+    )
+    heap: list = []
+    for comfort, code in buckets:
+        bound = blend_score(comfort, 0.0, distance_weight, half_life_km)
+        if len(heap) == k and bound < heap[0][0]:
+            break
+        if index is None:
+            candidates = by_code.get(code, [])
+        else:
+            user_ids = index.bucket(typology_name, code)
+            user_ids.discard(user.id)
+            candidates = get_nearby_candidates(user, user_ids=user_ids, radius_km=radius_km) if user_ids else []
+        if not candidates:
+            continue
+        distances = get_users_distances(user, candidates)
+        scores = blend_score(comfort, distances, distance_weight, half_life_km)
+        for candidate, distance, score in zip(candidates, distances.tolist(), scores.tolist()):
+            if limit is not None and distance > limit:
+                continue
+            # Ties go to the closer user, then to the lower id
+            entry = (score, -distance, -candidate.id, candidate, comfort, code)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry[:3] > heap[0][:3]:
+                heapq.heapreplace(heap, entry)
+
+    ranked = sorted(heap, key=lambda entry: entry[:3], reverse=True)
+    return [
+        Match(candidate, score, comfort, relationship(code), -neg_distance)
+        for score, neg_distance, _, candidate, comfort, code in ranked
+    ]
+
+
+def _top_from_snapshot(
+    user, k, radius_km, comfort_by_code, relationship, distance_weight, half_life_km, min_score
+) -> List[Match]:
+    """Rank candidates read from the user snapshot; only the K winners are loaded."""
+    ids, codes, distances = get_user_snapshot().match_candidates(user, min_score, radius_km)
+    comfort = comfort_by_code[codes]
+    keep = ~np.isnan(comfort)
+    ids, codes, distances, comfort = ids[keep], codes[keep], distances[keep], comfort[keep]
+    scores = blend_score(comfort, distances, distance_weight, half_life_km)
+
+    # Partial selection: everything tied with the K-th best score is kept so
+    # the tie-break below sees all of them; only those few are sorted
+    if len(scores) > k:
+        threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+        chosen = np.flatnonzero(scores >= threshold)
+    else:
+        chosen = np.arange(len(scores))
+    order = chosen[np.lexsort((ids[chosen], distances[chosen], -scores[chosen]))][:k]
+
+    users = get_users_by_ids(ids[order].tolist())
+    return [
+        Match(users[user_id], score, comfort_value, relationship(code), distance)
+        for user_id, score, comfort_value, code, distance in zip(
+            ids[order].tolist(),
+            scores[order].tolist(),
+            comfort[order].tolist(),
+            codes[order].tolist(),
+            distances[order].tolist(),
+        )
+        if user_id in users
+    ]
+
+
+def incoming_matches(user, min_score: int = 50) -> List[Tuple[object, float, int, str]]:
+    """Return users who have ``user`` within their radius and are compatible towards them.
+
+    Read from ``user_compatibility`` once it is filled. Otherwise candidates
+    come from the coverage index when it is enabled, which follows the user
+    snapshot and may miss the latest changes of other processes; the result
+    is meant for display, not for persisting. Radius and compatibility are
+    checked again on the loaded rows.
+
+    Returns:
+        ``(other, distance, comfort_score, relationship)`` tuples, closest first.
+
+    Raises:
+        ValueError: If ``user`` has no coordinates.
+    """
+    if user.latitude is None or user.longitude is None:
+        raise ValueError("User has no coordinates")
+    user_type = user.user_type
+    if user_type is None or user_type.type_code is None:
+        return []
+    matrix = get_relationship_matrix(user_type.typology_name)
+    if is_materialized_available():
+        return [
+            (other, distance, comfort, matrix.relationship_names[code])
+            for other, distance, comfort, code in get_materialized_incoming(user, min_score)
+        ]
+
+    user_ids = covering_user_ids(user)
+    if user_ids is None:
+        candidates = get_covering_candidates(user)
+    else:
+        candidates = list(get_users_by_ids(user_ids).values())
+    candidates = [
+        other
+        for other in candidates
+        if other.user_type is not None
+        and other.user_type.type_code is not None
+        and other.user_type.typology_name == user_type.typology_name
+    ]
+    if not candidates:
+        return []
+
+    codes = np.fromiter((other.user_type.type_code for other in candidates), dtype=np.intp)
+    scores = matrix.scores[codes, user_type.type_code]
+    relationships = matrix.relationships[codes, user_type.type_code]
+    distances = get_users_distances(user, candidates)
+    radii = np.array(
+        [np.inf if other.max_distance is None else other.max_distance for other in candidates]
+    )
+    keep = np.flatnonzero((scores > min_score) & (distances <= radii))
+    order = keep[np.lexsort(([candidates[i].id for i in keep], distances[keep]))]
+    return [
+        (
+            candidates[i],
+            float(distances[i]),
+            int(scores[i]),
+            matrix.relationship_names[relationships[i]],
+        )
+        for i in order.tolist()
+    ]
@@ -1,5 +1,7 @@
-from .user_repository import update_user_profile
+from .user_repository import update_user_profile, get_nearby_candidates, get_users_by_ids
 
 __all__ = [
     "update_user_profile",
+    "get_nearby_candidates",
+    "get_users_by_ids",
 ]
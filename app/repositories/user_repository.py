@@ -1,4 +1,8 @@
+from sqlalchemy import func, or_
+from sqlalchemy.orm import contains_eager, joinedload
+
 from app.extensions import db
+from app.geo import bounding_box, min_dot, unit_vector
 
 
 def update_user_profile(
@@ -19,16 +23,10 @@ def update_user_profile(
     user.username = username
     user.email = email
 
-    if user.user_type:
-        user.user_type.typology_name = typology_name
-        user.user_type.type_value = type_value
-    else:
-        from app.models import UserType
+    from app.services import assign_user_type
 
-        user_type = UserType(typology_name=typology_name, type_value=type_value)
-        db.session.add(user_type)
-        db.session.commit()
-        user.type_id = user_type.id
+    # Type rows are shared between users, so switch the reference
+    assign_user_type(user, typology_name, type_value, commit=False)
 
     user.latitude = latitude
     user.longitude = longitude
@@ -49,3 +47,101 @@ def update_user_profile(
 
     return user
 
+
+
+# Number of ids per IN (...) list when candidates are restricted by id
+USER_ID_CHUNK = 500
+# Slack on the spherical cap filter so rounding never drops a boundary user
+CAP_TOLERANCE = 1e-9
+
+
+def get_nearby_candidates(user, user_ids=None, radius_km=None):
+    """Return other users whose coordinates fall inside ``user``'s search box.
+
+    The bounding box of ``user.max_distance`` is applied as a range filter in
+    SQL, so only users that can be within the radius are loaded, and the
+    stored unit vectors narrow the box down to the circle. Exact distances
+    still have to be checked by the caller. Users without coordinates are
+    never returned. When ``user_ids`` is given, only those
+    users are considered; ``radius_km`` overrides ``user.max_distance``.
+    """
+    from app.models import User
+
+    if user.latitude is None or user.longitude is None:
+        return []
+
+    query = User.query.options(joinedload(User.user_type)).filter(
+        User.id != user.id,
+        User.latitude.isnot(None),
+        User.longitude.isnot(None),
+    )
+    radius_km = user.max_distance if radius_km is None else radius_km
+    if radius_km is not None:
+        min_lat, max_lat, lon_ranges = bounding_box(
+            user.latitude, user.longitude, radius_km
+        )
+        query = query.filter(User.latitude.between(min_lat, max_lat))
+        if lon_ranges is not None:
+            query = query.filter(
+                or_(*[User.longitude.between(lo, hi) for lo, hi in lon_ranges])
+            )
+        cx, cy, cz = unit_vector(user.latitude, user.longitude)
+        in_cap = User.unit_x * cx + User.unit_y * cy + User.unit_z * cz >= (
+            min_dot(radius_km) - CAP_TOLERANCE
+        )
+        # Rows whose unit vectors were never set (e.g. raw SQL writes) are kept
+        query = query.filter(or_(User.unit_x.is_(None), in_cap))
+    if user_ids is None:
+        return query.all()
+    user_ids = sorted(user_ids)
+    candidates = []
+    for start in range(0, len(user_ids), USER_ID_CHUNK):
+        chunk = user_ids[start:start + USER_ID_CHUNK]
+        candidates.extend(query.filter(User.id.in_(chunk)).all())
+    return candidates
+
+
+def get_covering_candidates(user):
+    """Return typed users of ``user``'s typology whose search radius may contain ``user``.
+
+    Only users within the bounding box of the largest ``max_distance`` are
+    loaded, plus users without a radius (they see everybody). Exact
+    distances still have to be checked by the caller.
+    """
+    from app.models import User, UserType
+
+    max_radius = db.session.query(func.max(User.max_distance)).scalar()
+    query = (
+        User.query.join(UserType, User.type_id == UserType.id)
+        .options(contains_eager(User.user_type))
+        .filter(
+            User.id != user.id,
+            User.latitude.isnot(None),
+            User.longitude.isnot(None),
+            UserType.typology_name == user.user_type.typology_name,
+            UserType.type_code.isnot(None),
+        )
+    )
+    if max_radius is not None:
+        min_lat, max_lat, lon_ranges = bounding_box(user.latitude, user.longitude, max_radius)
+        in_box = User.latitude.between(min_lat, max_lat)
+        if lon_ranges is not None:
+            in_box = in_box & or_(*[User.longitude.between(lo, hi) for lo, hi in lon_ranges])
+        query = query.filter(or_(User.max_distance.is_(None), in_box))
+    return query.all()
+
+
+def get_users_by_ids(user_ids):
+    """Load users by id in chunks; returns a dict keyed by id.
+
+    Ids of users that no longer exist are missing from the result.
+    """
+    from app.models import User
+
+    user_ids = list(user_ids)
+    users = {}
+    for start in range(0, len(user_ids), USER_ID_CHUNK):
+        chunk = user_ids[start:start + USER_ID_CHUNK]
+        for user in User.query.options(joinedload(User.user_type)).filter(User.id.in_(chunk)):
+            users[user.id] = user
+    return users
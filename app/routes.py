@@ -9,6 +9,8 @@ from flask import (
     flash,
     make_response,
     abort,
+    Response,
+    stream_with_context,
 )
 from flask_login import login_user, logout_user, login_required, current_user
 from .forms import RegistrationForm, LoginForm, ProfileForm, EditProfileForm
@@ -24,13 +26,22 @@ from .typologies import (
 from flask_wtf import FlaskForm
 from wtforms import HiddenField
 from urllib.parse import urlparse, urljoin
-from app.services import get_distance_if_compatible
+from app.services import get_distance_if_compatible, get_users_distances
 from werkzeug.utils import secure_filename
 import os
+import json
+import time
+import numpy as np
 from .routes_helper import handle_profile_image_upload, update_user_typology
+from .compatibility_store import get_materialized_compatibles, is_materialized_available
+from .repositories.user_repository import get_nearby_candidates
+from .type_index import compatible_user_ids
+from .typologies.matrix import get_relationship_matrix
 from .services import create_user_type, assign_user_type
 from .statistics_utils import load_typology_status
 from .chat_providers import get_chat_provider
+from .chat_executor import ChatBusyError, get_chat_executor
+from .chat_cache import cache_reply, cache_stream, get_cached_reply
 
 main = Blueprint("main", __name__)
 
@@ -383,23 +394,35 @@ def check_distance():
 @main.route("/nearby_compatibles")
 @login_required
 def nearby_compatibles():
-    # Получаем всех пользователей кроме текущего
-    users = User.query.filter(User.id != current_user.id).all()
-    compatible_list = []
-
-    for u in users:
-        # Проверяем наличие координат
-        if u.latitude is not None and u.longitude is not None and current_user.latitude is not None and current_user.longitude is not None:
-            try:
-                dist = get_distance_if_compatible(current_user, u)
-                # Если дошли до сюда, значит совместимость есть
-                compatible_list.append((u, dist))
-            except ValueError:
-                # Значит несовместимы, пропускаем
-                pass
+    if is_materialized_available():
+        # Таблиця user_compatibility вже містить сумісних у радіусі
+        compatible_list = get_materialized_compatibles(current_user)
+        return render_template("nearby_compatibles.html", compatible_list=compatible_list)
 
-    # Сортируем по расстоянию
-    compatible_list.sort(key=lambda x: x[1])
+    compatible_list = []
+    user_type = current_user.user_type
+    if user_type is None or user_type.type_code is None:
+        return render_template("nearby_compatibles.html", compatible_list=compatible_list)
+
+    # Индекс типов сужает выборку до совместимых; без него берем всех в радиусе
+    users = [
+        u for u in get_nearby_candidates(current_user, user_ids=compatible_user_ids(current_user))
+        if u.user_type is not None
+        and u.user_type.type_code is not None
+        and u.user_type.typology_name == user_type.typology_name
+    ]
+    if users:
+        # Совместимость и расстояние проверяем по загруженным строкам: индекс
+        # может отставать от изменений других процессов
+        scores = get_relationship_matrix(user_type.typology_name).scores[
+            user_type.type_code, [u.user_type.type_code for u in users]
+        ]
+        distances = get_users_distances(current_user, users)
+        keep = scores > 50
+        if current_user.max_distance is not None:
+            keep &= distances <= current_user.max_distance
+        for index in np.flatnonzero(keep)[np.argsort(distances[keep], kind="stable")].tolist():
+            compatible_list.append((users[index], float(distances[index])))
 
     # Передаем в шаблон список кортежей (пользователь, расстояние)
     return render_template("nearby_compatibles.html", compatible_list=compatible_list)
@@ -419,10 +442,58 @@ def chat_api():
     if not message:
         return jsonify({"reply": "No message provided."}), 400
 
-    provider = get_chat_provider()
+    stream = data.get("stream") or request.accept_mimetypes.best == "text/event-stream"
+    timeout = current_app.config.get("CHAT_TIMEOUT")
     try:
-        reply = provider.reply(message)
+        provider = get_chat_provider()
+        reply = get_cached_reply(provider, message)
+        if reply is not None:
+            if stream:
+                return _chat_event_stream(piece for piece in [reply])
+            return jsonify({"reply": reply})
+
+        executor = get_chat_executor(provider.name)
+        if stream:
+            pieces = executor.stream(lambda: provider.stream(message), timeout)
+            return _chat_event_stream(cache_stream(provider, message, pieces))
+        started = time.monotonic()
+        reply = executor.call(provider.reply, message, timeout=timeout)
+        cache_reply(provider, message, reply, time.monotonic() - started)
+    except ChatBusyError:
+        response = jsonify({"reply": "The assistant is busy, please try again shortly."})
+        response.headers["Retry-After"] = "5"
+        return response, 503
     except Exception as e:
         current_app.logger.error(f"Chat provider error: {e}")
         reply = "Sorry, I cannot respond right now."
     return jsonify({"reply": reply})
+
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _chat_event_stream(pieces):
+    """Send reply pieces as server-sent events while the provider generates them.
+
+    Each ``delta`` event carries the next piece of text; the stream ends with
+    a ``done`` event, or an ``error`` event holding the fallback reply.
+    """
+    def generate():
+        try:
+            for text in pieces:
+                yield _sse("delta", {"text": text})
+        except Exception as e:
+            current_app.logger.error(f"Chat provider error: {e}")
+            yield _sse("error", {"reply": "Sorry, I cannot respond right now."})
+            return
+        finally:
+            # Stops the provider when the client disconnects mid-stream
+            pieces.close()
+        yield _sse("done", {})
+
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
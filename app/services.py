@@ -11,50 +11,76 @@ TYPOLOGY_CLASSES = get_typology_classes()
 from .domain_services import (
     get_types_by_typology,
     calculate_relationship,
+    calculate_relationship_by_codes,
+    calculate_relationships_batch,
+    calculate_relationship_pairs,
+    encode_types,
     get_users_distance,
+    get_users_distances,
     get_distance_if_compatible,
     get_typology_instance,
 )
 
 
 from .repositories.user_repository import update_user_profile
+from .typologies.registry import encode_type, decode_type
 
 __all__ = [
     "get_types_by_typology",
     "calculate_relationship",
+    "calculate_relationship_by_codes",
+    "calculate_relationships_batch",
+    "calculate_relationship_pairs",
+    "encode_types",
     "get_users_distance",
+    "get_users_distances",
     "get_distance_if_compatible",
     "get_typology_instance",
     "update_user_profile",
     "create_user_type",
     "assign_user_type",
+    "encode_type",
+    "decode_type",
 ]
 
 
 def create_user_type(typology_name, type_value, commit=True):
-    """Create a :class:`~app.models.UserType` and optionally commit it."""
+    """Return the canonical :class:`~app.models.UserType` for a type.
+
+    ``user_type`` is a lookup table with one row per (typology, type) pair.
+    The row is inserted on first use and shared by all users of that type, so
+    callers must never modify the returned object. Translated type names are
+    mapped to the canonical name first, so every locale shares the same row.
+
+    Raises:
+        ValueError: If the typology or the type is unknown.
+    """
+    from sqlalchemy.exc import IntegrityError
     from .models import UserType
 
-    user_type = UserType(
-        typology_name=typology_name,
-        type_value=type_value,
-    )
-    db.session.add(user_type)
+    type_value = decode_type(typology_name, encode_type(typology_name, type_value))
+    user_type = UserType.query.filter_by(
+        typology_name=typology_name, type_value=type_value
+    ).first()
+    if user_type is None:
+        user_type = UserType(typology_name=typology_name, type_value=type_value)
+        try:
+            with db.session.begin_nested():
+                db.session.add(user_type)
+        except IntegrityError:
+            # Another request inserted the same type concurrently
+            user_type = UserType.query.filter_by(
+                typology_name=typology_name, type_value=type_value
+            ).one()
     if commit:
         db.session.commit()
-    else:
-        # Ensure the new ``id`` is available for further use without committing
-        db.session.flush()
     return user_type
 
 
 def assign_user_type(user, typology_name, type_value, commit=True):
-    """Assign or update ``user.user_type`` with the provided values."""
-    if user.user_type:
-        user.user_type.typology_name = typology_name
-        user.user_type.type_value = type_value
-    else:
-        user_type = create_user_type(typology_name, type_value, commit=False)
-        user.type_id = user_type.id
+    """Point ``user`` at the canonical type row for the provided values."""
+    user_type = create_user_type(typology_name, type_value, commit=False)
+    user.user_type = user_type
+    user.type_id = user_type.id
     if commit:
         db.session.commit()
@@ -12,19 +12,73 @@ function appendMessage(sender, text) {
   chatBox.scrollTop = chatBox.scrollHeight;
 }
 
+function appendStreamingMessage(sender) {
+  const div = document.createElement('div');
+  div.className = 'mb-2';
+  const label = document.createElement('strong');
+  label.textContent = `${sender}:`;
+  const body = document.createElement('span');
+  div.append(label, ' ', body);
+  chatBox.appendChild(div);
+  return body;
+}
+
+// Parses one server-sent event block into {event, data}
+function parseEvent(block) {
+  let event = 'message';
+  let data = '';
+  for (const line of block.split('\n')) {
+    if (line.startsWith('event:')) event = line.slice(6).trim();
+    else if (line.startsWith('data:')) data += line.slice(5).trim();
+  }
+  return {event, data: data ? JSON.parse(data) : {}};
+}
+
+async function readReplyStream(response, body) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let reply = '';
+  while (true) {
+    const {value, done} = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, {stream: true});
+    let end;
+    while ((end = buffer.indexOf('\n\n')) !== -1) {
+      const {event, data} = parseEvent(buffer.slice(0, end));
+      buffer = buffer.slice(end + 2);
+      if (event === 'delta') {
+        reply += data.text;
+      } else if (event === 'error') {
+        reply = data.reply;
+      }
+      body.textContent = reply;
+      chatBox.scrollTop = chatBox.scrollHeight;
+    }
+  }
+  return reply;
+}
+
 async function sendMessage(text) {
   appendMessage('You', text);
   input.value = '';
   try {
     const response = await fetch('/chat_api', {
       method: 'POST',
-      headers: {'Content-Type': 'application/json'},
-      body: JSON.stringify({message: text})
+      headers: {'Content-Type': 'application/json', 'Accept': 'text/event-stream'},
+      body: JSON.stringify({message: text, stream: true})
     });
-    const data = await response.json();
-    const reply = data.reply || 'Error';
-    appendMessage('Assistant', reply);
-    speak(reply);
+    const contentType = response.headers.get('Content-Type') || '';
+    let reply;
+    if (response.body && contentType.startsWith('text/event-stream')) {
+      // Show tokens as they arrive instead of waiting for the whole reply
+      reply = await readReplyStream(response, appendStreamingMessage('Assistant'));
+    } else {
+      const data = await response.json();
+      reply = data.reply || 'Error';
+      appendMessage('Assistant', reply);
+    }
+    speak(reply || 'Error');
   } catch(e) {
     appendMessage('Error', 'Could not reach server');
   }
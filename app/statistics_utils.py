@@ -2,7 +2,9 @@ import json
 import os
 from typing import Dict
 
+from .data_cache import load_json_file
 from .services import calculate_relationship
+from .typologies.matrix import clear_relationship_matrices
 
 BASE_DIR = os.environ.get(
     "DATA_DIR",
@@ -28,8 +30,7 @@ def load_typology_weights() -> Dict[str, float]:
         with open(WEIGHTS_FILE, "w") as f:
             json.dump(weights, f, indent=2)
         return weights
-    with open(WEIGHTS_FILE) as f:
-        return json.load(f)
+    return dict(load_json_file(WEIGHTS_FILE))
 
 
 def update_typology_weight(typology_name: str, new_weight: float) -> None:
@@ -51,8 +52,7 @@ def load_typology_status() -> Dict[str, bool]:
         with open(STATUS_FILE, "w") as f:
             json.dump(status, f, indent=2)
         return status
-    with open(STATUS_FILE) as f:
-        return json.load(f)
+    return dict(load_json_file(STATUS_FILE))
 
 
 def update_typology_status(typology_name: str, enabled: bool) -> None:
@@ -73,16 +73,16 @@ def update_comfort_score(typology_name: str, relationship_type: str, new_score:
     if not filename:
         raise ValueError(f"Unknown typology {typology_name}")
     path = get_data_path(filename)
-    with open(path) as f:
-        data = json.load(f)
+    data = dict(load_json_file(path))
     entry = data.get(relationship_type, {})
     if isinstance(entry, dict):
-        entry["score"] = new_score
+        entry = dict(entry, score=new_score)
     else:
         entry = {"score": new_score, "description": ""}
     data[relationship_type] = entry
     with open(path, "w") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+    clear_relationship_matrices()
 
 
 def calculate_weighted_compatibility(
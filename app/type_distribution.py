@@ -0,0 +1,293 @@
+# app/type_distribution.py
+"""Chart data for the admin type distribution page.
+
+Counts of users per city/country and type are pivoted into Chart.js
+datasets in one pass and cached. The cache entry is dropped after every
+commit that adds, removes or moves a user or renames a type.
+
+With ``ROLLUP_TYPE_DISTRIBUTION`` enabled the counts come from the small
+``type_distribution`` table instead of grouping the users table. Flush
+hooks apply the change of every added, removed or modified user to it;
+:func:`refresh_type_distribution` (``scripts/refresh_type_distribution.py``)
+rebuilds it from scratch.
+"""
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import and_, event, func, inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from .change_tracking import TYPE_FIELDS, history_changed, on_commit, users_changed
+from .extensions import cache, db
+from .models import TypeDistribution, User, UserType
+
+DISTRIBUTION_CACHE_KEY = "admin_type_distribution"
+# Safety net only; writes invalidate the entry explicitly
+DISTRIBUTION_CACHE_TIMEOUT = 3600
+
+_TRACKED_USER_FIELDS = ("city", "country", "type_id")
+
+
+def pivot_counts(rows: Iterable[Tuple[str, str, int]]) -> Dict:
+    """Turn ``(label, type_value, count)`` rows into Chart.js bar data.
+
+    Returns ``{'labels': [...], 'datasets': [{'label': type, 'data': [...]}]}``
+    with labels and types sorted and a zero for every missing cell.
+    """
+    counts: Dict[Tuple[str, str], int] = {}
+    for label, type_value, count in rows:
+        counts[(label, type_value)] = counts.get((label, type_value), 0) + count
+
+    labels = sorted({label for label, _ in counts})
+    types = sorted({type_value for _, type_value in counts})
+    label_index = {label: index for index, label in enumerate(labels)}
+    data = {type_value: [0] * len(labels) for type_value in types}
+    for (label, type_value), count in counts.items():
+        data[type_value][label_index[label]] = count
+    return {
+        "labels": labels,
+        "datasets": [{"label": type_value, "data": data[type_value]} for type_value in types],
+    }
+
+
+def _count_by(column):
+    return (
+        db.session.query(column, UserType.type_value, func.count(User.id))
+        .join(UserType, User.type_id == UserType.id)
+        .filter(column.isnot(None))
+        .group_by(column, UserType.type_value)
+        .all()
+    )
+
+
+def _rollup_count_by(column):
+    return (
+        db.session.query(column, TypeDistribution.type_value, func.sum(TypeDistribution.user_count))
+        .filter(column != "", TypeDistribution.user_count > 0)
+        .group_by(column, TypeDistribution.type_value)
+        .all()
+    )
+
+
+def _rollup_enabled() -> bool:
+    return has_app_context() and current_app.config.get("ROLLUP_TYPE_DISTRIBUTION", False)
+
+
+def build_distribution() -> Dict:
+    """Compute chart data for cities and countries from the database."""
+    if _rollup_enabled():
+        return {
+            "city": pivot_counts(_rollup_count_by(TypeDistribution.city)),
+            "country": pivot_counts(_rollup_count_by(TypeDistribution.country)),
+        }
+    return {
+        "city": pivot_counts(_count_by(User.city)),
+        "country": pivot_counts(_count_by(User.country)),
+    }
+
+
+def get_distribution() -> Dict:
+    """Return cached chart data for cities and countries."""
+    data = cache.get(DISTRIBUTION_CACHE_KEY)
+    if data is None:
+        data = build_distribution()
+        cache.set(DISTRIBUTION_CACHE_KEY, data, timeout=DISTRIBUTION_CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_distribution() -> None:
+    cache.delete(DISTRIBUTION_CACHE_KEY)
+
+
+def refresh_type_distribution() -> int:
+    """Rebuild the ``type_distribution`` table from the users table.
+
+    Returns the number of rows written.
+    """
+    db.session.query(TypeDistribution).delete(synchronize_session=False)
+    rows = (
+        db.session.query(
+            func.coalesce(User.country, ""),
+            func.coalesce(User.city, ""),
+            UserType.typology_name,
+            UserType.type_value,
+            func.count(User.id),
+        )
+        .join(UserType, User.type_id == UserType.id)
+        .group_by(User.country, User.city, UserType.typology_name, UserType.type_value)
+        .all()
+    )
+    counts = Counter()
+    for country, city, typology_name, type_value, count in rows:
+        counts[(country, city, typology_name, type_value)] += count
+    db.session.bulk_insert_mappings(
+        TypeDistribution,
+        [
+            {
+                "country": country,
+                "city": city,
+                "typology_name": typology_name,
+                "type_value": type_value,
+                "user_count": count,
+            }
+            for (country, city, typology_name, type_value), count in counts.items()
+        ],
+    )
+    db.session.commit()
+    invalidate_distribution()
+    return len(counts)
+
+
+def _previous(obj, field):
+    """Return the value ``field`` had before the current flush."""
+    history = inspect(obj).attrs[field].history
+    return history.deleted[0] if history.deleted else getattr(obj, field)
+
+
+def _type_values(session, type_id, previous: bool) -> Optional[Tuple[str, str]]:
+    if type_id is None:
+        return None
+    user_type = session.query(UserType).get(type_id)
+    if user_type is None:
+        return None
+    if previous:
+        return _previous(user_type, "typology_name"), _previous(user_type, "type_value")
+    return user_type.typology_name, user_type.type_value
+
+
+def _user_key(session, user, previous: bool) -> Optional[Tuple[str, str, str, str]]:
+    """Return the rollup key of ``user`` before or after the current flush."""
+    read = _previous if previous else getattr
+    type_values = _type_values(session, read(user, "type_id"), previous)
+    if type_values is None:
+        return None
+    return (read(user, "country") or "", read(user, "city") or "") + type_values
+
+
+def _collect_deltas(session) -> Counter:
+    deltas = Counter()
+    handled = set()
+    for obj in session.new:
+        if isinstance(obj, User):
+            handled.add(obj.id)
+            deltas[_user_key(session, obj, previous=False)] += 1
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            handled.add(obj.id)
+            deltas[_user_key(session, obj, previous=True)] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, User) and history_changed(obj, _TRACKED_USER_FIELDS):
+            handled.add(obj.id)
+            deltas[_user_key(session, obj, previous=True)] -= 1
+            deltas[_user_key(session, obj, previous=False)] += 1
+
+    renamed = [
+        obj
+        for obj in session.dirty
+        if isinstance(obj, UserType) and history_changed(obj, TYPE_FIELDS)
+    ]
+    for user_type in renamed:
+        old = (_previous(user_type, "typology_name"), _previous(user_type, "type_value"))
+        new = (user_type.typology_name, user_type.type_value)
+        query = session.query(User.country, User.city, func.count(User.id)).filter(
+            User.type_id == user_type.id
+        )
+        if handled:
+            query = query.filter(User.id.notin_(handled))
+        for country, city, count in query.group_by(User.country, User.city):
+            location = (country or "", city or "")
+            deltas[location + old] -= count
+            deltas[location + new] += count
+    deltas.pop(None, None)
+    return deltas
+
+
+def _key_filter(table, key):
+    country, city, typology_name, type_value = key
+    return and_(
+        table.c.country == country,
+        table.c.city == city,
+        table.c.typology_name == typology_name,
+        table.c.type_value == type_value,
+    )
+
+
+def _update_count(connection, key, delta: int) -> int:
+    """Add ``delta`` to the row of ``key``; returns the number of rows updated."""
+    table = TypeDistribution.__table__
+    return connection.execute(
+        table.update()
+        .where(_key_filter(table, key))
+        .values(user_count=table.c.user_count + delta)
+    ).rowcount
+
+
+def _add_count(connection, key, delta: int) -> None:
+    """Add ``delta`` users to the row of ``key``, creating the row if needed.
+
+    Two first registrations of a type may both find no row. PostgreSQL
+    resolves that with ``INSERT ... ON CONFLICT DO UPDATE``; elsewhere the
+    insert runs in a savepoint and the loser of the race updates instead.
+    """
+    table = TypeDistribution.__table__
+    country, city, typology_name, type_value = key
+    values = dict(
+        country=country,
+        city=city,
+        typology_name=typology_name,
+        type_value=type_value,
+        user_count=delta,
+    )
+    if connection.dialect.name == "postgresql":
+        statement = postgresql.insert(table).values(**values)
+        connection.execute(
+            statement.on_conflict_do_update(
+                index_elements=[table.c.country, table.c.city, table.c.typology_name, table.c.type_value],
+                set_={"user_count": table.c.user_count + statement.excluded.user_count},
+            )
+        )
+        return
+    if _update_count(connection, key, delta):
+        return
+    savepoint = connection.begin_nested()
+    try:
+        connection.execute(table.insert().values(**values))
+    except IntegrityError:
+        savepoint.rollback()
+        _update_count(connection, key, delta)
+    else:
+        savepoint.commit()
+
+
+def _apply_deltas(connection, deltas: Counter) -> None:
+    table = TypeDistribution.__table__
+    for key, delta in deltas.items():
+        if delta > 0:
+            _add_count(connection, key, delta)
+        elif delta < 0:
+            _update_count(connection, key, delta)
+            connection.execute(
+                table.delete().where(and_(_key_filter(table, key), table.c.user_count <= 0))
+            )
+
+
+@event.listens_for(db.session, "after_flush")
+def _update_rollup(session, flush_context):
+    """Apply the flushed user changes to the rollup table in the same transaction."""
+    if _rollup_enabled():
+        deltas = _collect_deltas(session)
+        if deltas:
+            _apply_deltas(session.connection(), deltas)
+
+
+def _track_changes(session, stale):
+    return stale or users_changed(session, _TRACKED_USER_FIELDS) or None
+
+
+def _invalidate_after_commit(stale):
+    invalidate_distribution()
+
+
+on_commit("type_distribution", _track_changes, _invalidate_after_commit)
@@ -0,0 +1,87 @@
+# app/type_index.py
+"""In-memory inverted index from (typology, type) to user ids.
+
+Compatibility depends only on the two types, so a match search scores every
+type of the typology once against the searching user's type, keeps the types
+scoring above the threshold and enumerates only the users filed under them.
+Candidate generation then costs in proportion to the compatible users
+instead of the whole population.
+
+The index is built from the user snapshot (:mod:`app.user_snapshot`) on
+first use and replaced together with it, so it sees the same users and goes
+stale under the same rules.
+"""
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
+from flask import current_app
+
+from .typologies.matrix import get_relationship_matrix
+from .user_snapshot import UserSnapshot, get_user_snapshot
+
+# Key of a bucket: (typology_name, type_code)
+BucketKey = Tuple[str, int]
+
+
+class TypeIndex:
+    """User ids filed by ``(typology_name, type_code)``."""
+
+    def __init__(self, buckets: Dict[BucketKey, np.ndarray]):
+        self._buckets = buckets
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._buckets.values())
+
+    def bucket(self, typology_name: str, type_code: int) -> Set[int]:
+        ids = self._buckets.get((typology_name, type_code))
+        return set() if ids is None else set(ids.tolist())
+
+    def compatible_user_ids(self, typology_name: str, type_code: int, min_score: int = 50) -> Set[int]:
+        """Return users whose type scores above ``min_score`` against ``type_code``."""
+        scores = get_relationship_matrix(typology_name).scores[type_code]
+        buckets = [
+            self._buckets[key]
+            for key in ((typology_name, int(code)) for code in np.flatnonzero(scores > min_score))
+            if key in self._buckets
+        ]
+        return set(np.concatenate(buckets).tolist()) if buckets else set()
+
+
+def build_type_index(snapshot: UserSnapshot) -> TypeIndex:
+    """Group the ids of ``snapshot`` by typology and type code."""
+    buckets: Dict[BucketKey, np.ndarray] = {}
+    for typology_name in snapshot.typology_names:
+        codes = snapshot.codes(typology_name)
+        rows = np.flatnonzero(codes >= 0)
+        rows = rows[np.argsort(codes[rows], kind="stable")]
+        present, starts = np.unique(codes[rows], return_index=True)
+        for code, ids in zip(present.tolist(), np.split(snapshot.ids[rows], starts[1:])):
+            buckets[(typology_name, code)] = ids
+    return TypeIndex(buckets)
+
+
+def get_type_index() -> TypeIndex:
+    """Return the index of the current user snapshot."""
+    return get_user_snapshot().derived("type_index", build_type_index)
+
+
+def is_type_index_enabled() -> bool:
+    return current_app.config.get("TYPE_INDEX_ENABLED", True)
+
+
+def compatible_user_ids(user, min_score: int = 50) -> Optional[Set[int]]:
+    """Return ids of users whose type is compatible with ``user``'s type.
+
+    Returns ``None`` when the index is disabled or ``user`` has no encoded
+    type, in which case callers have to score candidates one by one.
+    """
+    if not is_type_index_enabled():
+        return None
+    user_type = user.user_type
+    if user_type is None or user_type.type_code is None:
+        return None
+    user_ids = get_type_index().compatible_user_ids(
+        user_type.typology_name, user_type.type_code, min_score
+    )
+    user_ids.discard(user.id)
+    return user_ids
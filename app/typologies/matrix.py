@@ -0,0 +1,131 @@
+# app/typologies/matrix.py
+"""Precomputed type-by-type relationship matrices for registered typologies.
+
+Every registered typology has only a few dozen types, so all ordered pairs
+can be evaluated once and stored as small NumPy arrays. Batch scoring then
+becomes a gather from these arrays instead of a Python loop over
+``determine_relationship_type``.
+"""
+from __future__ import annotations
+import hashlib
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from ..data_cache import file_version
+from .registry import get_typology_classes, get_typology_instance, get_type_names
+
+
+class RelationshipMatrix:
+    """Relationship codes and comfort scores for all ordered type pairs.
+
+    ``relationships[i, j]`` is the code of the relationship between type
+    codes ``i`` and ``j``; the code indexes ``relationship_names``.
+    ``scores[i, j]`` is the comfort score of that relationship.
+    """
+
+    def __init__(
+        self,
+        typology_name: str,
+        type_names: Tuple[str, ...],
+        relationship_names: Tuple[str, ...],
+        relationships: np.ndarray,
+        scores: np.ndarray,
+        data_version: Tuple = (),
+    ):
+        self.typology_name = typology_name
+        self.type_names = type_names
+        self.relationship_names = relationship_names
+        self.relationships = relationships
+        self.scores = scores
+        self.data_version = data_version
+        self._fingerprint: Optional[str] = None
+        # Matrices are shared between requests and must never be modified
+        self.relationships.flags.writeable = False
+        self.scores.flags.writeable = False
+
+    @property
+    def size(self) -> int:
+        """Return the number of types in the typology."""
+        return len(self.type_names)
+
+    @property
+    def fingerprint(self) -> str:
+        """Return a digest of the typology name and the matrix contents.
+
+        Suitable as a strong HTTP ETag: ``data_version`` holds file mtimes,
+        so it is left out and identical data gives the same digest on every
+        host. Computed once since matrices are immutable.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            digest.update(repr((self.typology_name, self.type_names, self.relationship_names)).encode("utf-8"))
+            digest.update(self.relationships.tobytes())
+            digest.update(self.scores.tobytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+
+_matrices: Dict[str, RelationshipMatrix] = {}
+
+
+def get_data_version(typology_name: str) -> Tuple[Optional[Tuple[int, int]], ...]:
+    """Return the versions of the data files a typology reads its scores from.
+
+    Typologies list such files in a ``DATA_FILES`` class attribute; most keep
+    their scores in code and have none.
+    """
+    typology_class = get_typology_classes().get(typology_name)
+    if typology_class is None:
+        raise ValueError(f"Invalid typology: {typology_name}")
+    return tuple(file_version(path) for path in getattr(typology_class, "DATA_FILES", ()))
+
+
+def build_relationship_matrix(typology_name: str) -> RelationshipMatrix:
+    """Evaluate every ordered type pair of a typology."""
+    typology = get_typology_instance(typology_name)
+    if typology is None:
+        raise ValueError(f"Invalid typology: {typology_name}")
+    data_version = get_data_version(typology_name)
+    type_names = get_type_names(typology_name)
+    size = len(type_names)
+
+    relationship_codes: Dict[str, int] = {}
+    relationship_scores = []
+    relationships = np.zeros((size, size), dtype=np.uint8)
+    for i, type1 in enumerate(type_names):
+        for j, type2 in enumerate(type_names):
+            relationship = typology.determine_relationship_type(type1, type2)
+            code = relationship_codes.get(relationship)
+            if code is None:
+                code = len(relationship_codes)
+                relationship_codes[relationship] = code
+                relationship_scores.append(typology.get_comfort_score(relationship)[0])
+            relationships[i, j] = code
+
+    scores = np.asarray(relationship_scores, dtype=np.int16)[relationships]
+    return RelationshipMatrix(
+        typology_name,
+        type_names,
+        tuple(relationship_codes),
+        relationships,
+        scores,
+        data_version,
+    )
+
+
+def get_relationship_matrix(typology_name: str) -> RelationshipMatrix:
+    """Return the cached relationship matrix of a typology.
+
+    The matrix is rebuilt when one of the typology's data files changed.
+    """
+    matrix = _matrices.get(typology_name)
+    if matrix is None or matrix.data_version != get_data_version(typology_name):
+        matrix = build_relationship_matrix(typology_name)
+        _matrices[typology_name] = matrix
+    return matrix
+
+
+def clear_relationship_matrices() -> None:
+    """Drop cached matrices, e.g. after comfort scores were edited."""
+    _matrices.clear()
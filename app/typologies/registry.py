@@ -2,15 +2,31 @@
 """Registry and plugin loader for typology classes."""
 from __future__ import annotations
 import importlib
-from typing import Dict, Type
+import threading
+from typing import Dict, Optional, Tuple, Type
 from stevedore import extension
 
 _typology_registry: Dict[str, Type] = {}
 
+# Shared typology instances keyed by (typology name, language). Typologies
+# keep no per-call state, so one instance per process is enough.
+_typology_instances: Dict[Tuple[str, Optional[str]], object] = {}
+_instances_lock = threading.Lock()
+
+# Stable small-integer codes for the types of each typology. A type code is
+# the index of the type in ``get_all_types()`` and always fits into a uint8.
+MAX_TYPE_CODES = 256
+_type_names: Dict[str, Tuple[str, ...]] = {}
+_type_codes: Dict[str, Dict[str, int]] = {}
+
 
 def register_typology(name: str, cls: Type) -> None:
     """Register a typology class under the given name."""
     _typology_registry[name] = cls
+    _type_names.pop(name, None)
+    _type_codes.pop(name, None)
+    for key in [key for key in _typology_instances if key[0] == name]:
+        _typology_instances.pop(key, None)
 
 
 def get_typology_classes() -> Dict[str, Type]:
@@ -18,6 +34,98 @@ def get_typology_classes() -> Dict[str, Type]:
     return _typology_registry
 
 
+def get_typology_instance(typology_name: str, language: Optional[str] = None):
+    """Return the shared instance of a typology or ``None`` if it is unknown.
+
+    Instances are created once per process and must be treated as read-only.
+    Typologies whose constructor takes a language (Socionics) get one
+    instance per ``language``; ``None`` uses the constructor's default.
+    """
+    key = (typology_name, language)
+    instance = _typology_instances.get(key)
+    if instance is not None:
+        return instance
+
+    typology_class = _typology_registry.get(typology_name)
+    if typology_class is None:
+        return None
+    with _instances_lock:
+        instance = _typology_instances.get(key)
+        if instance is None:
+            instance = typology_class(language) if language else typology_class()
+            _typology_instances[key] = instance
+    return instance
+
+
+def _build_type_codes(typology_name: str) -> None:
+    """Build the code maps of a typology from its canonical type names."""
+    typology = get_typology_instance(typology_name)
+    if typology is None:
+        raise ValueError(f"Invalid typology: {typology_name}")
+
+    # Translated typologies return lazy strings; codes are keyed by the
+    # untranslated names so they do not depend on the request locale.
+    from flask_babel import force_locale
+
+    with force_locale("en"):
+        names = tuple(str(t) for t in typology.get_all_types())
+    if len(names) > MAX_TYPE_CODES:
+        raise ValueError(
+            f"Typology '{typology_name}' has {len(names)} types; "
+            f"at most {MAX_TYPE_CODES} can be encoded"
+        )
+    _type_names[typology_name] = names
+    _type_codes[typology_name] = {name: code for code, name in enumerate(names)}
+
+
+def get_type_names(typology_name: str) -> Tuple[str, ...]:
+    """Return the canonical type names of a typology indexed by type code."""
+    if typology_name not in _type_names:
+        _build_type_codes(typology_name)
+    return _type_names[typology_name]
+
+
+def get_type_codes(typology_name: str) -> Dict[str, int]:
+    """Return a mapping of canonical type names of a typology to type codes."""
+    if typology_name not in _type_codes:
+        _build_type_codes(typology_name)
+    return _type_codes[typology_name]
+
+
+def encode_type(typology_name: str, type_value: str) -> int:
+    """Return the type code for ``type_value``.
+
+    Translated display names (e.g. Socionics types rendered in the active
+    locale) are accepted as well as the canonical names.
+
+    Raises:
+        ValueError: If the typology or the type is unknown.
+    """
+    code = get_type_codes(typology_name).get(str(type_value))
+    if code is not None:
+        return code
+    for code, name in enumerate(get_typology_instance(typology_name).get_all_types()):
+        if str(name) == type_value:
+            return code
+    raise ValueError(
+        f"Invalid type_value '{type_value}' for typology '{typology_name}'"
+    )
+
+
+def decode_type(typology_name: str, type_code: int) -> str:
+    """Return the canonical type name for ``type_code``.
+
+    Raises:
+        ValueError: If the typology or the code is unknown.
+    """
+    names = get_type_names(typology_name)
+    if not 0 <= type_code < len(names):
+        raise ValueError(
+            f"Invalid type code {type_code} for typology '{typology_name}'"
+        )
+    return names[type_code]
+
+
 def load_plugins() -> None:
     """Load typology plugins registered via ``stevedore`` entry points.
 
@@ -0,0 +1,335 @@
+# app/typologies/socionics_relations.py
+# Generated by scripts/generate_socionics_relations.py - do not edit by hand.
+"""Socionics intertype relations for all ordered pairs of types.
+
+``RELATIONS[TYPE_INDEX[a]][TYPE_INDEX[b]]`` is the relation of type ``a``
+towards type ``b``, as given by the ``socionics`` library.
+"""
+
+TYPE_CODES = (
+    "ILE",
+    "LII",
+    "ESE",
+    "SEI",
+    "EIE",
+    "SLE",
+    "LSI",
+    "IEI",
+    "SEE",
+    "LIE",
+    "ILI",
+    "ESI",
+    "LSE",
+    "SLI",
+    "IEE",
+    "EII",
+)
+
+TYPE_INDEX = {code: index for index, code in enumerate(TYPE_CODES)}
+
+RELATIONS = (
+    # ILE
+    (
+        "Identity",
+        "Mirror",
+        "Business",
+        "Duality",
+        "Business",
+        "Kindred",
+        "Supervisor",
+        "Semi-duality",
+        "Super-ego",
+        "Business",
+        "Conflict",
+        "Conflict",
+        "Request",
+        "Illusionary",
+        "Business",
+        "Supervision",
+    ),
+    # LII
+    (
+        "Mirror",
+        "Identity",
+        "Duality",
+        "Business",
+        "Illusionary",
+        "Supervision",
+        "Business",
+        "Request",
+        "Conflict",
+        "Conflict",
+        "Business",
+        "Super-ego",
+        "Semi-duality",
+        "Business",
+        "Supervisor",
+        "Kindred",
+    ),
+    # ESE
+    (
+        "Business",
+        "Duality",
+        "Identity",
+        "Mirror",
+        "Kindred",
+        "Business",
+        "Semi-duality",
+        "Supervisor",
+        "Business",
+        "Super-ego",
+        "Conflict",
+        "Conflict",
+        "Business",
+        "Supervision",
+        "Request",
+        "Illusionary",
+    ),
+    # SEI
+    (
+        "Duality",
+        "Business",
+        "Mirror",
+        "Identity",
+        "Supervision",
+        "Illusionary",
+        "Request",
+        "Business",
+        "Conflict",
+        "Conflict",
+        "Super-ego",
+        "Business",
+        "Supervisor",
+        "Kindred",
+        "Semi-duality",
+        "Business",
+    ),
+    # EIE
+    (
+        "Request",
+        "Semi-duality",
+        "Kindred",
+        "Supervision",
+        "Identity",
+        "Business",
+        "Duality",
+        "Mirror",
+        "Business",
+        "Business",
+        "Supervisor",
+        "Illusionary",
+        "Super-ego",
+        "Conflict",
+        "Business",
+        "Conflict",
+    ),
+    # SLE
+    (
+        "Kindred",
+        "Supervision",
+        "Request",
+        "Semi-duality",
+        "Business",
+        "Identity",
+        "Mirror",
+        "Duality",
+        "Business",
+        "Business",
+        "Illusionary",
+        "Supervisor",
+        "Business",
+        "Conflict",
+        "Super-ego",
+        "Conflict",
+    ),
+    # LSI
+    (
+        "Supervisor",
+        "Business",
+        "Illusionary",
+        "Business",
+        "Duality",
+        "Mirror",
+        "Identity",
+        "Business",
+        "Supervision",
+        "Semi-duality",
+        "Request",
+        "Kindred",
+        "Conflict",
+        "Business",
+        "Conflict",
+        "Super-ego",
+    ),
+    # IEI
+    (
+        "Illusionary",
+        "Business",
+        "Supervisor",
+        "Business",
+        "Mirror",
+        "Duality",
+        "Business",
+        "Identity",
+        "Semi-duality",
+        "Supervision",
+        "Kindred",
+        "Request",
+        "Conflict",
+        "Super-ego",
+        "Conflict",
+        "Business",
+    ),
+    # SEE
+    (
+        "Super-ego",
+        "Conflict",
+        "Business",
+        "Conflict",
+        "Request",
+        "Business",
+        "Supervision",
+        "Illusionary",
+        "Identity",
+        "Business",
+        "Duality",
+        "Mirror",
+        "Business",
+        "Semi-duality",
+        "Kindred",
+        "Supervisor",
+    ),
+    # LIE
+    (
+        "Business",
+        "Conflict",
+        "Super-ego",
+        "Conflict",
+        "Business",
+        "Request",
+        "Illusionary",
+        "Supervision",
+        "Business",
+        "Identity",
+        "Mirror",
+        "Duality",
+        "Kindred",
+        "Supervisor",
+        "Business",
+        "Semi-duality",
+    ),
+    # ILI
+    (
+        "Conflict",
+        "Business",
+        "Conflict",
+        "Super-ego",
+        "Supervisor",
+        "Semi-duality",
+        "Business",
+        "Kindred",
+        "Duality",
+        "Mirror",
+        "Identity",
+        "Business",
+        "Supervision",
+        "Business",
+        "Illusionary",
+        "Request",
+    ),
+    # ESI
+    (
+        "Conflict",
+        "Super-ego",
+        "Conflict",
+        "Business",
+        "Semi-duality",
+        "Supervisor",
+        "Kindred",
+        "Business",
+        "Mirror",
+        "Duality",
+        "Business",
+        "Identity",
+        "Illusionary",
+        "Request",
+        "Supervision",
+        "Business",
+    ),
+    # LSE
+    (
+        "Business",
+        "Illusionary",
+        "Business",
+        "Supervisor",
+        "Super-ego",
+        "Business",
+        "Conflict",
+        "Conflict",
+        "Request",
+        "Kindred",
+        "Supervision",
+        "Semi-duality",
+        "Identity",
+        "Mirror",
+        "Business",
+        "Duality",
+    ),
+    # SLI
+    (
+        "Semi-duality",
+        "Request",
+        "Supervision",
+        "Kindred",
+        "Conflict",
+        "Conflict",
+        "Business",
+        "Super-ego",
+        "Illusionary",
+        "Supervisor",
+        "Business",
+        "Business",
+        "Mirror",
+        "Identity",
+        "Duality",
+        "Business",
+    ),
+    # IEE
+    (
+        "Business",
+        "Supervisor",
+        "Business",
+        "Illusionary",
+        "Business",
+        "Super-ego",
+        "Conflict",
+        "Conflict",
+        "Kindred",
+        "Request",
+        "Semi-duality",
+        "Supervision",
+        "Business",
+        "Duality",
+        "Identity",
+        "Mirror",
+    ),
+    # EII
+    (
+        "Supervision",
+        "Kindred",
+        "Semi-duality",
+        "Request",
+        "Conflict",
+        "Conflict",
+        "Super-ego",
+        "Business",
+        "Supervisor",
+        "Illusionary",
+        "Business",
+        "Business",
+        "Duality",
+        "Business",
+        "Mirror",
+        "Identity",
+    ),
+)
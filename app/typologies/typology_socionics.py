@@ -1,11 +1,21 @@
 import gettext
-import json
 import os
 from .typology import Typology
+from ..data_cache import load_json_file
+from .socionics_relations import RELATIONS, TYPE_INDEX
 from flask_babel import lazy_gettext as _l
 
 
 class TypologySocionics(Typology):
+    # Comfort scores are editable from the admin page, so they live in a data file
+    COMFORT_SCORES_FILE = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))),
+        "data",
+        "socionics_relationships.json",
+    )
+    # Data files the relationship matrix depends on (see typologies.matrix)
+    DATA_FILES = (COMFORT_SCORES_FILE,)
+
     def __init__(self, language="en"):
         self.set_language(language)
         super().__init__(
@@ -166,69 +176,15 @@ class TypologySocionics(Typology):
         if not code1 or not code2:
             return "Unknown Relationship"
 
-        to_4letter = {
-            "ILE": "ENTP",
-            "SEI": "ISFP",
-            "ESE": "ESFJ",
-            "LII": "INTJ",
-            "EIE": "ENFJ",
-            "LSI": "ISTJ",
-            "SLE": "ESTP",
-            "IEI": "INFP",
-            "SEE": "ESFP",
-            "ILI": "INTP",
-            "LIE": "ENTJ",
-            "ESI": "ISFJ",
-            "LSE": "ESTJ",
-            "EII": "INFJ",
-            "IEE": "ENFP",
-            "SLI": "ISTP",
-        }
-
-        try:
-            mbti1 = to_4letter[code1]
-            mbti2 = to_4letter[code2]
-        except KeyError:
+        index1 = TYPE_INDEX.get(code1)
+        index2 = TYPE_INDEX.get(code2)
+        if index1 is None or index2 is None:
             return "Unknown Relationship"
-
-        from socionics.core import Stype, Sociodb
-
-        db = Sociodb()
-        try:
-            relation_index = Stype(mbti1).otn(Stype(mbti2))
-            russian = db.otn[relation_index]
-        except Exception:
-            return "Unknown Relationship"
-
-        relation_map = {
-            "Тождественные": "Identity",
-            "Квазитождество": "Quasi-identity",
-            "Родственные": "Kindred",
-            "Исполнитель": "Business",
-            "Деловые": "Business",
-            "Заказчик": "Request",
-            "Суперэго": "Super-ego",
-            "Активация": "Activation",
-            "Противоположность": "Conflict",
-            "Зеркальные": "Mirror",
-            "Миражные": "Illusionary",
-            "Ревизор": "Supervision",
-            "Полудуальные": "Semi-duality",
-            "Подревизный": "Supervisor",
-            "Дуальные": "Duality",
-            "Конфликтные": "Conflict",
-        }
-
-        return relation_map.get(russian, "Unknown Relationship")
+        return RELATIONS[index1][index2]
 
     def get_comfort_score(self, relationship_type: str) -> (int, str):
-        base_dir = os.path.dirname(
-            os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
-        )
-        path = os.path.join(base_dir, "data", "socionics_relationships.json")
         try:
-            with open(path, "r") as f:
-                data = json.load(f)
+            data = load_json_file(self.COMFORT_SCORES_FILE)
         except Exception:
             data = {}
         info = data.get(
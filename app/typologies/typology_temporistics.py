@@ -178,6 +178,58 @@ class TypologyTemporistics(Typology):
         "Conflict Submission/Dominance": "Коли перший аспект одного типу є слабкістю іншого, але не навпаки. Конфліктні часові відносини.",
     }
 
+    # Comfort scores for each relationship type, shared by all instances
+    COMFORT_SCORES: Dict[str, Tuple[int, str]] = {
+        "Identity/Philia": (95, DETAILED_RELATIONSHIPS["Identity/Philia"]),
+        "Full Eros": (80, DETAILED_RELATIONSHIPS["Full Eros"]),
+        "Full Agape": (100, DETAILED_RELATIONSHIPS["Full Agape"]),
+        "Psychosophia Extinguishment": (
+            30,
+            DETAILED_RELATIONSHIPS["Psychosophia Extinguishment"],
+        ),
+        "Neutrality": (50, DETAILED_RELATIONSHIPS["Neutrality"]),
+        "Mirage": (70, DETAILED_RELATIONSHIPS["Mirage"]),
+        "Order/Full Order": (90, DETAILED_RELATIONSHIPS["Order/Full Order"]),
+        "Revision": (40, DETAILED_RELATIONSHIPS["Revision"]),
+        "Therapy-Misunderstanding": (
+            60,
+            DETAILED_RELATIONSHIPS["Therapy-Misunderstanding"],
+        ),
+        "Therapy-Attraction": (
+            75,
+            DETAILED_RELATIONSHIPS["Therapy-Attraction"],
+        ),
+        "Conflict Submission/Dominance": (
+            20,
+            DETAILED_RELATIONSHIPS["Conflict Submission/Dominance"],
+        ),
+        # Keep legacy values for backward compatibility
+        "Perfect Alignment": (95, "Повний збіг пріоритетів."),
+        "Homochronous Unity": (90, "Спільний перший аспект."),
+        "Temporal Compatibility": (85, "Спільні перші два аспекти."),
+        "Temporal Duality": (90, "Доповнюючі аспекти."),
+        "Mirrored Perception": (75, "Дзеркальні аспекти."),
+        "Temporal Activation": (65, "Спільна активація."),
+        "Heterotemporality": (50, "Різні часові аспекти."),
+        "Chronological Conflict": (30, "Часовий конфлікт."),
+        "Atemporal Disconnection": (10, "Повна несумісність."),
+        "Unknown Relationship": (0, "Невизначений тип відносин."),
+    }
+
+    # Relationship names that get_intertype_relationship can return. The
+    # position of a name in this tuple is its relationship code.
+    RELATIONSHIP_NAMES: Tuple[str, ...] = tuple(DETAILED_RELATIONSHIPS) + (
+        "Chronological Conflict",
+    )
+
+    # Pair tables filled once by _build_pair_tables() when the module is loaded.
+    # TYPES follows the order of get_all_types(); a type ID is its index there.
+    TYPES: Tuple[str, ...] = ()
+    TYPE_IDS: Dict[str, int] = {}
+    # Flat row-major tables of size len(TYPES) ** 2 indexed by id1 * len(TYPES) + id2
+    PAIR_RELATIONSHIPS: Tuple[int, ...] = ()
+    PAIR_COMFORT_SCORES: Tuple[int, ...] = ()
+
     # Populating the INTER_TYPE_RELATIONSHIPS dictionary
     for aspect1, aspect2 in product(ASPECTS, repeat=2):
         if aspect1 == aspect2:
@@ -311,43 +363,7 @@ class TypologyTemporistics(Typology):
         Returns:
             Tuple[int, str]: Score and textual description.
         """
-        comfort_scores = {
-            "Identity/Philia": (95, self.DETAILED_RELATIONSHIPS["Identity/Philia"]),
-            "Full Eros": (80, self.DETAILED_RELATIONSHIPS["Full Eros"]),
-            "Full Agape": (100, self.DETAILED_RELATIONSHIPS["Full Agape"]),
-            "Psychosophia Extinguishment": (
-                30,
-                self.DETAILED_RELATIONSHIPS["Psychosophia Extinguishment"],
-            ),
-            "Neutrality": (50, self.DETAILED_RELATIONSHIPS["Neutrality"]),
-            "Mirage": (70, self.DETAILED_RELATIONSHIPS["Mirage"]),
-            "Order/Full Order": (90, self.DETAILED_RELATIONSHIPS["Order/Full Order"]),
-            "Revision": (40, self.DETAILED_RELATIONSHIPS["Revision"]),
-            "Therapy-Misunderstanding": (
-                60,
-                self.DETAILED_RELATIONSHIPS["Therapy-Misunderstanding"],
-            ),
-            "Therapy-Attraction": (
-                75,
-                self.DETAILED_RELATIONSHIPS["Therapy-Attraction"],
-            ),
-            "Conflict Submission/Dominance": (
-                20,
-                self.DETAILED_RELATIONSHIPS["Conflict Submission/Dominance"],
-            ),
-            # Keep legacy values for backward compatibility
-            "Perfect Alignment": (95, "Повний збіг пріоритетів."),
-            "Homochronous Unity": (90, "Спільний перший аспект."),
-            "Temporal Compatibility": (85, "Спільні перші два аспекти."),
-            "Temporal Duality": (90, "Доповнюючі аспекти."),
-            "Mirrored Perception": (75, "Дзеркальні аспекти."),
-            "Temporal Activation": (65, "Спільна активація."),
-            "Heterotemporality": (50, "Різні часові аспекти."),
-            "Chronological Conflict": (30, "Часовий конфлікт."),
-            "Atemporal Disconnection": (10, "Повна несумісність."),
-            "Unknown Relationship": (0, "Невизначений тип відносин."),
-        }
-        return comfort_scores.get(relationship_type, (0, "Невідомий тип відносин"))
+        return self.COMFORT_SCORES.get(relationship_type, (0, "Невідомий тип відносин"))
 
     def determine_relationship_type(self, user1_type: str, user2_type: str) -> str:
         """Determine the relationship type from two Temporistics type strings.
@@ -365,6 +381,12 @@ class TypologyTemporistics(Typology):
         Returns:
             str: The intertype relationship.
         """
+        # Canonical type strings are answered from the precomputed pair table
+        type_id1 = self.TYPE_IDS.get(user1_type)
+        type_id2 = self.TYPE_IDS.get(user2_type)
+        if type_id1 is not None and type_id2 is not None:
+            return self.get_relationship_by_ids(type_id1, type_id2)
+
         # Split the type strings into lists of aspects
         user1_aspects = user1_type.split(", ")
         user2_aspects = user2_type.split(", ")
@@ -380,6 +402,82 @@ class TypologyTemporistics(Typology):
 
         return relationship_type
 
+    def get_type_id(self, type_name: str) -> int:
+        """
+        Returns the integer ID of a type in the precomputed pair tables.
+
+        Args:
+            type_name (str): Comma-separated aspects of the type.
+
+        Returns:
+            int: Index of the type in get_all_types().
+
+        Raises:
+            ValueError: If the type is not a valid Temporistics type.
+        """
+        try:
+            return self.TYPE_IDS[type_name]
+        except KeyError:
+            raise ValueError(f"Invalid Temporistics type: {type_name}") from None
+
+    def get_relationship_by_ids(self, type_id1: int, type_id2: int) -> str:
+        """
+        Returns the relationship between two types given by their integer IDs.
+
+        Args:
+            type_id1 (int): ID of the first type.
+            type_id2 (int): ID of the second type.
+
+        Returns:
+            str: The intertype relationship.
+        """
+        code = self.PAIR_RELATIONSHIPS[type_id1 * len(self.TYPES) + type_id2]
+        return self.RELATIONSHIP_NAMES[code]
+
+    def get_comfort_score_by_ids(self, type_id1: int, type_id2: int) -> int:
+        """
+        Returns the comfort score between two types given by their integer IDs.
+
+        Args:
+            type_id1 (int): ID of the first type.
+            type_id2 (int): ID of the second type.
+
+        Returns:
+            int: The comfort score of the pair's relationship.
+        """
+        return self.PAIR_COMFORT_SCORES[type_id1 * len(self.TYPES) + type_id2]
+
+    @classmethod
+    def _build_pair_tables(cls) -> None:
+        """
+        Enumerates every ordered pair of types once and stores the relationship
+        code and comfort score of each pair in flat lookup tables.
+
+        The tables are derived from get_intertype_relationship, so they always
+        agree with the rule cascade.
+        """
+        typology = cls()
+        types = tuple(typology.get_all_types())
+        aspects = [type_name.split(", ") for type_name in types]
+        relationship_codes = {
+            name: code for code, name in enumerate(cls.RELATIONSHIP_NAMES)
+        }
+
+        pair_relationships = []
+        pair_scores = []
+        for type1_aspects in aspects:
+            for type2_aspects in aspects:
+                relationship = typology.get_intertype_relationship(
+                    type1_aspects, type2_aspects
+                )
+                pair_relationships.append(relationship_codes[relationship])
+                pair_scores.append(typology.get_comfort_score(relationship)[0])
+
+        cls.TYPES = types
+        cls.TYPE_IDS = {type_name: type_id for type_id, type_name in enumerate(types)}
+        cls.PAIR_RELATIONSHIPS = tuple(pair_relationships)
+        cls.PAIR_COMFORT_SCORES = tuple(pair_scores)
+
     def get_all_types(self) -> List[str]:
         """
         Generates all possible combinations of the time aspects.
@@ -447,6 +545,9 @@ class TypologyTemporistics(Typology):
         return type1_aspects[0] == type2_aspects[0]
 
 
+# Enumerate all ordered type pairs once at import time
+TypologyTemporistics._build_pair_tables()
+
 # Register in the global registry so services can discover it dynamically
 from .registry import register_typology
 
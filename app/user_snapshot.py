@@ -0,0 +1,291 @@
+# app/user_snapshot.py
+"""Columnar in-memory snapshot of the fields match queries read.
+
+Match queries only need each user's id, type and coordinates. The snapshot
+keeps them as NumPy arrays so candidates can be filtered and scored without
+loading ``User`` objects; only the final matches are fetched from the
+database. It is the only per-process copy of the users table: the type and
+coverage indexes are built from it and follow its freshness rules.
+
+Freshness:
+
+* commits of this process that touch users or types make the snapshot stale;
+* they also store a new random version in the shared cache, which other
+  processes poll on every read, so their snapshots become stale too. This
+  only reaches other processes when ``CACHE_TYPE`` is shared (e.g. Redis);
+  the default "simple" cache lives in one process;
+* every snapshot becomes stale ``USER_SNAPSHOT_MAX_AGE`` seconds after it was
+  built, which bounds how long writes of other processes can stay unseen
+  when the cache is not shared;
+* a stale snapshot is rebuilt on the next read, but at most once every
+  ``USER_SNAPSHOT_MIN_REFRESH`` seconds.
+
+:func:`get_user_snapshot_stats` reports size and staleness
+(``/admin/user_snapshot``).
+"""
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+from flask import current_app, has_app_context
+
+from .change_tracking import on_commit, users_changed
+from .extensions import cache, db
+from .geo import distances_km, unit_vector, unit_vectors
+from .models import User, UserType
+from .typologies.matrix import get_relationship_matrix
+from .typologies.registry import get_typology_classes
+
+VERSION_CACHE_KEY = "user_snapshot_version"
+
+
+class UserSnapshot:
+    """Match-relevant user fields as parallel arrays sorted by user id.
+
+    ``type_codes[i, t]`` is user ``i``'s type code in typology
+    ``typology_names[t]`` or -1. Missing coordinates are NaN in
+    ``latitudes``, ``longitudes`` and ``vectors``; a missing
+    ``max_distance`` is NaN as well.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        typology_names: Tuple[str, ...],
+        type_codes: np.ndarray,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        max_distances: np.ndarray,
+        version=None,
+        local_version: int = 0,
+    ):
+        self.ids = ids
+        self.typology_names = typology_names
+        self.type_codes = type_codes
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.vectors = unit_vectors(latitudes, longitudes)
+        self.max_distances = max_distances
+        # Shared version and count of this process's commits it includes
+        self.version = version
+        self.local_version = local_version
+        self.built_at = time.monotonic()
+        self.build_seconds = 0.0
+        self._typology_index = {name: i for i, name in enumerate(typology_names)}
+        self._derived: Dict[str, object] = {}
+        self._derived_lock = threading.Lock()
+        for array in self._arrays():
+            array.flags.writeable = False
+
+    def _arrays(self):
+        return (
+            self.ids,
+            self.type_codes,
+            self.latitudes,
+            self.longitudes,
+            self.vectors,
+            self.max_distances,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory taken by the arrays."""
+        return sum(array.nbytes for array in self._arrays())
+
+    def derived(self, name: str, build: Callable[["UserSnapshot"], object]):
+        """Return the structure ``build(self)``, building it once per snapshot.
+
+        Indexes over the same users (see :mod:`app.type_index` and
+        :mod:`app.coverage_index`) are kept here, so they are loaded and go
+        stale together with the snapshot.
+        """
+        value = self._derived.get(name)
+        if value is None:
+            with self._derived_lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = self._derived[name] = build(self)
+        return value
+
+    def codes(self, typology_name: str) -> Optional[np.ndarray]:
+        """Return every user's type code in ``typology_name`` (-1 if none)."""
+        column = self._typology_index.get(typology_name)
+        return None if column is None else self.type_codes[:, column]
+
+    def match_candidates(self, user, min_score: int = 50, radius_km: Optional[float] = None):
+        """Find users compatible with ``user`` inside the search radius.
+
+        ``radius_km`` defaults to ``user.max_distance``. Returns the ids,
+        type codes and distances in km of the candidates, in id order.
+        """
+        empty = (np.empty(0, np.int64), np.empty(0, np.int16), np.empty(0))
+        user_type = user.user_type
+        if user_type is None or user_type.type_code is None:
+            return empty
+        if user.latitude is None or user.longitude is None:
+            return empty
+        codes = self.codes(user_type.typology_name)
+        if codes is None:
+            return empty
+        row_scores = get_relationship_matrix(user_type.typology_name).scores[user_type.type_code]
+        rows = np.flatnonzero(codes >= 0)
+        rows = rows[
+            (row_scores[codes[rows]] > min_score)
+            & (self.ids[rows] != user.id)
+            & ~np.isnan(self.latitudes[rows])
+        ]
+        distances = distances_km(unit_vector(user.latitude, user.longitude), self.vectors[rows])
+        radius_km = user.max_distance if radius_km is None else radius_km
+        if radius_km is not None:
+            within = distances <= radius_km
+            rows, distances = rows[within], distances[within]
+        return self.ids[rows], codes[rows], distances
+
+
+def build_user_snapshot(version=None, local_version: int = 0) -> UserSnapshot:
+    """Read the match-relevant columns of all users into a snapshot."""
+    start = time.monotonic()
+    typology_names = tuple(sorted(get_typology_classes()))
+    typology_index = {name: i for i, name in enumerate(typology_names)}
+    rows = (
+        db.session.query(
+            User.id,
+            UserType.typology_name,
+            UserType.type_code,
+            User.latitude,
+            User.longitude,
+            User.max_distance,
+        )
+        .outerjoin(UserType, User.type_id == UserType.id)
+        .order_by(User.id)
+        .all()
+    )
+    count = len(rows)
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+    type_codes = np.full((count, len(typology_names)), -1, dtype=np.int16)
+    for position, (_, typology_name, type_code, *_rest) in enumerate(rows):
+        column = typology_index.get(typology_name)
+        if column is not None and type_code is not None:
+            type_codes[position, column] = type_code
+
+    def floats(column):
+        return np.fromiter(
+            (np.nan if row[column] is None else row[column] for row in rows),
+            dtype=np.float64,
+            count=count,
+        )
+
+    snapshot = UserSnapshot(
+        ids, typology_names, type_codes, floats(3), floats(4), floats(5), version, local_version
+    )
+    snapshot.build_seconds = time.monotonic() - start
+    return snapshot
+
+
+_snapshot: Optional[UserSnapshot] = None
+_snapshot_lock = threading.Lock()
+_build_lock = threading.Lock()
+_builds = 0
+# Number of commits of this process that changed users or types
+_local_version = 0
+
+
+def _is_stale(snapshot: UserSnapshot) -> bool:
+    max_age = current_app.config.get("USER_SNAPSHOT_MAX_AGE", 60)
+    return (
+        snapshot.local_version != _local_version
+        or snapshot.version != cache.get(VERSION_CACHE_KEY)
+        or (max_age is not None and time.monotonic() - snapshot.built_at >= max_age)
+    )
+
+
+def _needs_rebuild(snapshot: Optional[UserSnapshot]) -> bool:
+    if snapshot is None:
+        return True
+    if not _is_stale(snapshot):
+        return False
+    min_refresh = current_app.config.get("USER_SNAPSHOT_MIN_REFRESH", 1.0)
+    return time.monotonic() - snapshot.built_at >= min_refresh
+
+
+def refresh_user_snapshot() -> UserSnapshot:
+    """Rebuild the process-wide snapshot now."""
+    global _snapshot, _builds
+    # Версії читаємо до запиту: зміни між ними лише спричинять зайву перебудову
+    local_version = _local_version
+    version = cache.get(VERSION_CACHE_KEY)
+    snapshot = build_user_snapshot(version, local_version)
+    with _snapshot_lock:
+        _snapshot = snapshot
+        _builds += 1
+    return snapshot
+
+
+def get_user_snapshot() -> UserSnapshot:
+    """Return the process-wide snapshot, rebuilding it when stale.
+
+    While one thread rebuilds, the others keep reading the old snapshot.
+    """
+    snapshot = _snapshot
+    if not _needs_rebuild(snapshot):
+        return snapshot
+    if not _build_lock.acquire(blocking=snapshot is None):
+        return snapshot
+    try:
+        if _needs_rebuild(_snapshot):
+            refresh_user_snapshot()
+        return _snapshot
+    finally:
+        _build_lock.release()
+
+
+def clear_user_snapshot() -> None:
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+
+
+def is_snapshot_enabled() -> bool:
+    return has_app_context() and current_app.config.get("USER_SNAPSHOT_ENABLED", True)
+
+
+def get_user_snapshot_stats() -> Dict:
+    """Return size, memory footprint and staleness of the snapshot."""
+    snapshot = _snapshot
+    stats = {"enabled": is_snapshot_enabled(), "builds": _builds, "built": snapshot is not None}
+    if snapshot is None:
+        return stats
+    stats.update(
+        {
+            "users": len(snapshot),
+            "memory_bytes": snapshot.nbytes,
+            # Upper bound on how old the data may be
+            "age_seconds": round(time.monotonic() - snapshot.built_at, 3),
+            "build_seconds": round(snapshot.build_seconds, 3),
+            "stale": _is_stale(snapshot),
+            "pending_local_changes": _local_version - snapshot.local_version,
+        }
+    )
+    return stats
+
+
+def _track_changes(session, changed):
+    return changed or users_changed(session) or None
+
+
+def _publish_changes(changed):
+    global _local_version
+    with _snapshot_lock:
+        _local_version += 1
+    if not has_app_context():
+        return
+    # Нова версія без терміну дії, щоб інші процеси перебудували свої знімки
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=0)
+
+
+on_commit("user_snapshot", _track_changes, _publish_changes)
@@ -28,6 +28,81 @@ class Config:
     ANTHROPIC_MODEL = os.environ.get("ANTHROPIC_MODEL", "claude-3-haiku-20240307")
     ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY")
     LOCAL_MODEL_PATH = os.environ.get("LOCAL_MODEL_PATH")
+    # Replies to the local model that arrive within LOCAL_MODEL_MAX_WAIT_MS of
+    # each other are generated together, up to LOCAL_MODEL_MAX_BATCH_SIZE
+    LOCAL_MODEL_MAX_BATCH_SIZE = int(settings.get("LOCAL_MODEL_MAX_BATCH_SIZE", 8))
+    LOCAL_MODEL_MAX_WAIT_MS = float(settings.get("LOCAL_MODEL_MAX_WAIT_MS", 20))
+    # Create the chat provider (and load a local model) when the app starts
+    CHAT_WARMUP = settings.get("CHAT_WARMUP", False)
+    # Chat calls run on per-provider thread pools: at most CHAT_CONCURRENCY
+    # calls per provider run at once (CHAT_PROVIDER_CONCURRENCY overrides it
+    # per provider name), CHAT_MAX_QUEUE more may wait, and the rest get 503.
+    # CHAT_TIMEOUT stops waiting for a reply, but a call already running
+    # keeps its worker until the provider returns
+    CHAT_CONCURRENCY = int(settings.get("CHAT_CONCURRENCY", 4))
+    # The local model batches concurrent replies, so let a full batch in;
+    # streamed replies still wait for the model one at a time
+    CHAT_PROVIDER_CONCURRENCY = settings.get(
+        "CHAT_PROVIDER_CONCURRENCY", {"localhf": LOCAL_MODEL_MAX_BATCH_SIZE}
+    )
+    CHAT_MAX_QUEUE = int(settings.get("CHAT_MAX_QUEUE", 8))
+    CHAT_TIMEOUT = float(settings.get("CHAT_TIMEOUT", 60))
+    # Reuse replies to repeated questions: CHAT_CACHE_MAX_ENTRIES recent
+    # replies per process (LRU) plus the shared cache backend, both expiring
+    # after CHAT_CACHE_TTL seconds. Setting CHAT_CACHE_EMBEDDING_MODEL to a
+    # sentence-transformers model also matches questions whose embeddings
+    # have at least CHAT_CACHE_SIMILARITY cosine similarity
+    CHAT_CACHE_ENABLED = settings.get("CHAT_CACHE_ENABLED", True)
+    CHAT_CACHE_TTL = int(settings.get("CHAT_CACHE_TTL", 86400))
+    CHAT_CACHE_MAX_ENTRIES = int(settings.get("CHAT_CACHE_MAX_ENTRIES", 1024))
+    CHAT_CACHE_EMBEDDING_MODEL = settings.get("CHAT_CACHE_EMBEDDING_MODEL")
+    CHAT_CACHE_SIMILARITY = float(settings.get("CHAT_CACHE_SIMILARITY", 0.92))
+
+    # Keep the user_compatibility table up to date in the background after
+    # each commit and serve /nearby_compatibles and /api/matches/incoming
+    # from it once filled (run scripts/refresh_compatibility.py once after
+    # enabling to fill it for existing users, and periodically to repair it)
+    MATERIALIZE_COMPATIBILITY = settings.get("MATERIALIZE_COMPATIBILITY", False)
+
+    # Generate nearby match candidates from the in-memory (typology, type)
+    # -> users index, built from the user snapshot below
+    TYPE_INDEX_ENABLED = settings.get("TYPE_INDEX_ENABLED", True)
+
+    # Per-process NumPy snapshot of user ids, types and coordinates; the type
+    # and coverage indexes are built from it, and with USER_SNAPSHOT_ENABLED
+    # /api/matches/top scores its arrays directly. It is rebuilt after changes
+    # at most every USER_SNAPSHOT_MIN_REFRESH seconds (see /admin/user_snapshot).
+    # Changes of other processes are announced through the cache only when
+    # CACHE_TYPE is shared; otherwise they show up after the
+    # USER_SNAPSHOT_MAX_AGE rebuild
+    USER_SNAPSHOT_ENABLED = settings.get("USER_SNAPSHOT_ENABLED", True)
+    USER_SNAPSHOT_MIN_REFRESH = float(settings.get("USER_SNAPSHOT_MIN_REFRESH", 1.0))
+    USER_SNAPSHOT_MAX_AGE = int(settings.get("USER_SNAPSHOT_MAX_AGE", 60))
+
+    # Answer "whose search radius contains this user" (/api/matches/incoming)
+    # from an in-memory grid built from the user snapshot; the finest cells
+    # are COVERAGE_INDEX_CELL_DEGREES wide and each search disk is filed on
+    # the level where it touches at most COVERAGE_INDEX_MAX_CELLS cells
+    COVERAGE_INDEX_ENABLED = settings.get("COVERAGE_INDEX_ENABLED", True)
+    COVERAGE_INDEX_CELL_DEGREES = float(settings.get("COVERAGE_INDEX_CELL_DEGREES", 0.5))
+    COVERAGE_INDEX_MAX_CELLS = int(settings.get("COVERAGE_INDEX_MAX_CELLS", 16))
+
+    # Serve the admin type distribution from the type_distribution rollup
+    # table, kept current on flush (run scripts/refresh_type_distribution.py
+    # once after enabling, or periodically to correct drift)
+    ROLLUP_TYPE_DISTRIBUTION = settings.get("ROLLUP_TYPE_DISTRIBUTION", True)
+
+    # Maximum number of results per /api/calculate/batch request; streamed
+    # (NDJSON) responses are not held in memory and allow more
+    API_BATCH_MAX_PAIRS = int(settings.get("API_BATCH_MAX_PAIRS", 10000))
+    API_BATCH_MAX_STREAM_PAIRS = int(settings.get("API_BATCH_MAX_STREAM_PAIRS", 1000000))
+
+    # Largest k accepted by /api/matches/top
+    API_TOP_MATCHES_MAX_K = int(settings.get("API_TOP_MATCHES_MAX_K", 100))
+
+    # Seconds clients may reuse /api/typologies/<name>/matrix before
+    # revalidating it with its ETag
+    API_MATRIX_MAX_AGE = int(settings.get("API_MATRIX_MAX_AGE", 3600))
 
     # Session security defaults
     SESSION_COOKIE_SECURE = settings.get("SESSION_COOKIE_SECURE", False)
@@ -71,6 +146,8 @@ class TestingConfig(Config):
     # Використовуємо окрему папку для тестових завантажень
     UPLOAD_FOLDER = os.path.join(basedir, 'tests', 'uploads')
     TALISMAN_FORCE_HTTPS = False
+    # Тести читають знімок користувачів одразу після змін
+    USER_SNAPSHOT_MIN_REFRESH = 0.0
 
 class ProductionConfig(Config):
     DEBUG = False
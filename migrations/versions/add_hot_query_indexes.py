@@ -0,0 +1,56 @@
+"""add indexes for user and type hot queries
+
+Revision ID: add_hot_query_indexes
+Revises: add_type_distribution_table
+Create Date: 2026-10-18 15:00:00.000000
+
+Lookups by username, email, google_id and github_id are already served by
+the indexes behind their unique constraints. These indexes cover the type
+joins, the city/country distribution GROUP BYs, the bounding-box scans of
+nearby_compatibles and the MAX(max_distance) lookup of the compatibility
+store. scripts/benchmark_indexes.py shows the plans before and after.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_hot_query_indexes'
+down_revision = 'add_type_distribution_table'
+branch_labels = None
+depends_on = None
+
+
+def _partial(condition):
+    # Часткові індекси підтримують і PostgreSQL, і SQLite
+    return {
+        'postgresql_where': sa.text(condition),
+        'sqlite_where': sa.text(condition),
+    }
+
+
+def upgrade():
+    op.create_index('ix_users_type_id', 'users', ['type_id'])
+    op.create_index(
+        'ix_users_lat_lon', 'users', ['latitude', 'longitude'],
+        **_partial('latitude IS NOT NULL AND longitude IS NOT NULL')
+    )
+    op.create_index(
+        'ix_users_city_type', 'users', ['city', 'type_id'],
+        **_partial('city IS NOT NULL')
+    )
+    op.create_index(
+        'ix_users_country_type', 'users', ['country', 'type_id'],
+        **_partial('country IS NOT NULL')
+    )
+    op.create_index('ix_users_max_distance', 'users', ['max_distance'])
+    op.create_index('ix_user_type_typology_value', 'user_type', ['typology_name', 'type_value'])
+
+
+def downgrade():
+    op.drop_index('ix_user_type_typology_value', table_name='user_type')
+    op.drop_index('ix_users_max_distance', table_name='users')
+    op.drop_index('ix_users_country_type', table_name='users')
+    op.drop_index('ix_users_city_type', table_name='users')
+    op.drop_index('ix_users_lat_lon', table_name='users')
+    op.drop_index('ix_users_type_id', table_name='users')
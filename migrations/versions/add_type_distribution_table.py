@@ -0,0 +1,42 @@
+"""add type_distribution rollup table
+
+Revision ID: add_type_distribution_table
+Revises: add_user_compatibility_table
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_type_distribution_table'
+down_revision = 'add_user_compatibility_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Кількість користувачів за країною, містом і типом для адмін-графіків
+    op.create_table(
+        'type_distribution',
+        sa.Column('country', sa.String(length=100), nullable=False),
+        sa.Column('city', sa.String(length=100), nullable=False),
+        sa.Column('typology_name', sa.String(length=50), nullable=False),
+        sa.Column('type_value', sa.String(length=50), nullable=False),
+        sa.Column('user_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('country', 'city', 'typology_name', 'type_value')
+    )
+    # Заповнюємо таблицю з наявних користувачів
+    op.execute(
+        "INSERT INTO type_distribution (country, city, typology_name, type_value, user_count) "
+        "SELECT COALESCE(users.country, ''), COALESCE(users.city, ''), "
+        "user_type.typology_name, user_type.type_value, COUNT(users.id) "
+        "FROM users JOIN user_type ON users.type_id = user_type.id "
+        "GROUP BY COALESCE(users.country, ''), COALESCE(users.city, ''), "
+        "user_type.typology_name, user_type.type_value"
+    )
+
+
+def downgrade():
+    op.drop_table('type_distribution')
@@ -0,0 +1,41 @@
+"""add user_compatibility table
+
+Revision ID: add_user_compatibility_table
+Revises: add_user_type_code
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_user_compatibility_table'
+down_revision = 'add_user_type_code'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Матеріалізована сумісність пар користувачів.
+    # Після міграції заповнюється скриптом scripts/refresh_compatibility.py
+    op.create_table(
+        'user_compatibility',
+        sa.Column('user_a_id', sa.Integer(), nullable=False),
+        sa.Column('user_b_id', sa.Integer(), nullable=False),
+        sa.Column('typology_name', sa.String(length=50), nullable=False),
+        sa.Column('relationship_code', sa.SmallInteger(), nullable=False),
+        sa.Column('comfort_score', sa.Integer(), nullable=False),
+        sa.Column('distance', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['user_a_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_b_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_a_id', 'user_b_id', 'typology_name')
+    )
+    op.create_index('ix_user_compatibility_a_score', 'user_compatibility', ['user_a_id', 'comfort_score'])
+    op.create_index('ix_user_compatibility_b', 'user_compatibility', ['user_b_id'])
+
+
+def downgrade():
+    op.drop_index('ix_user_compatibility_b', table_name='user_compatibility')
+    op.drop_index('ix_user_compatibility_a_score', table_name='user_compatibility')
+    op.drop_table('user_compatibility')
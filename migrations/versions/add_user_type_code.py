@@ -0,0 +1,72 @@
+"""add type_code column to user_type
+
+Revision ID: add_user_type_code
+Revises: add_oauth_tables
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+import itertools
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_user_type_code'
+down_revision = 'add_oauth_tables'
+branch_labels = None
+depends_on = None
+
+# Коди типів на момент міграції, незалежно від поточного коду застосунку:
+# код - це позиція типу в списку типології
+_PERMUTATION_ASPECTS = {
+    'Temporistics': ('Past', 'Current', 'Future', 'Eternity'),
+    'Psychosophia': ('Emotion', 'Logic', 'Will', 'Physics'),
+    'Amatoric': ('Love', 'Passion', 'Friendship', 'Romance'),
+}
+_TYPE_NAMES = {
+    'Socionics': (
+        'Seeker (ILE)', 'Analyst (LII)', 'Enthusiast (ESE)', 'Mediator (SEI)',
+        'Mentor (EIE)', 'Marshal (SLE)', 'Inspector (LSI)', 'Lyricist (IEI)',
+        'Politician (SEE)', 'Entrepreneur (LIE)', 'Critic (ILI)', 'Guardian (ESI)',
+        'Administrator (LSE)', 'Master (SLI)', 'Advisor (IEE)', 'Humanist (EII)',
+    ),
+    'IQ': ('Aspiring', 'Balanced', 'Insightful'),
+    'Temperaments': ('Sanguine', 'Choleric', 'Melancholic', 'Phlegmatic'),
+}
+for _typology, _aspects in _PERMUTATION_ASPECTS.items():
+    _TYPE_NAMES[_typology] = tuple(', '.join(p) for p in itertools.permutations(_aspects))
+TYPE_CODES = {
+    typology: {name: code for code, name in enumerate(names)}
+    for typology, names in _TYPE_NAMES.items()
+}
+
+
+def upgrade():
+    # Компактний цілочисельний код типу в межах типології
+    op.add_column('user_type', sa.Column('type_code', sa.SmallInteger(), nullable=True))
+
+    # Заповнюємо коди для наявних записів; невідомим значенням код
+    # проставить validate_user_type при наступному збереженні
+    user_type = sa.table(
+        'user_type',
+        sa.column('id', sa.Integer),
+        sa.column('typology_name', sa.String),
+        sa.column('type_value', sa.String),
+        sa.column('type_code', sa.SmallInteger),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select([user_type.c.id, user_type.c.typology_name, user_type.c.type_value])
+    ).fetchall()
+    for row_id, typology_name, type_value in rows:
+        code = TYPE_CODES.get(typology_name, {}).get(type_value)
+        if code is None:
+            continue
+        connection.execute(
+            user_type.update().where(user_type.c.id == row_id).values(type_code=code)
+        )
+
+
+def downgrade():
+    op.drop_column('user_type', 'type_code')
@@ -0,0 +1,58 @@
+"""add unit vector coordinate columns to users
+
+Revision ID: add_user_unit_vectors
+Revises: dedupe_user_type
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+import math
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_user_unit_vectors'
+down_revision = 'dedupe_user_type'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Координати як точка на одиничній сфері (та сама формула, що й app.geo.unit_vector)
+    op.add_column('users', sa.Column('unit_x', sa.Float(), nullable=True))
+    op.add_column('users', sa.Column('unit_y', sa.Float(), nullable=True))
+    op.add_column('users', sa.Column('unit_z', sa.Float(), nullable=True))
+
+    # Заповнюємо вектори в Python: SQLite може не мати тригонометричних функцій.
+    # Формулу не імпортуємо з app, щоб міграція не залежала від коду застосунку
+    users = sa.table(
+        'users',
+        sa.column('id', sa.Integer),
+        sa.column('latitude', sa.Float),
+        sa.column('longitude', sa.Float),
+        sa.column('unit_x', sa.Float),
+        sa.column('unit_y', sa.Float),
+        sa.column('unit_z', sa.Float),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select([users.c.id, users.c.latitude, users.c.longitude]).where(
+            sa.and_(users.c.latitude.isnot(None), users.c.longitude.isnot(None))
+        )
+    ).fetchall()
+    for row_id, latitude, longitude in rows:
+        lat = math.radians(latitude)
+        lon = math.radians(longitude)
+        x = math.cos(lat) * math.cos(lon)
+        y = math.cos(lat) * math.sin(lon)
+        z = math.sin(lat)
+        connection.execute(
+            users.update().where(users.c.id == row_id).values(unit_x=x, unit_y=y, unit_z=z)
+        )
+
+
+def downgrade():
+    op.drop_column('users', 'unit_z')
+    op.drop_column('users', 'unit_y')
+    op.drop_column('users', 'unit_x')
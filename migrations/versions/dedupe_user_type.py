@@ -0,0 +1,53 @@
+"""collapse duplicate user_type rows into one row per type
+
+Revision ID: dedupe_user_type
+Revises: add_hot_query_indexes
+Create Date: 2026-10-18 16:00:00.000000
+
+user_type used to get a new row for every registration and profile edit.
+Users are repointed at the lowest id of each (typology_name, type_value)
+pair, the other rows are deleted and the pair becomes unique.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'dedupe_user_type'
+down_revision = 'add_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        """
+        UPDATE users SET type_id = (
+            SELECT min(canonical.id)
+            FROM user_type AS canonical, user_type AS current_type
+            WHERE current_type.id = users.type_id
+              AND canonical.typology_name = current_type.typology_name
+              AND canonical.type_value = current_type.type_value
+        )
+        WHERE type_id IS NOT NULL
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM user_type WHERE id NOT IN (
+            SELECT keep.id FROM (
+                SELECT min(id) AS id FROM user_type
+                GROUP BY typology_name, type_value
+            ) AS keep
+        )
+        """
+    )
+    op.drop_index('ix_user_type_typology_value', table_name='user_type')
+    op.create_index(
+        'ix_user_type_typology_value', 'user_type', ['typology_name', 'type_value'], unique=True
+    )
+
+
+def downgrade():
+    # Дублікати не відновлюються: спільні рядки залишаються валідними
+    op.drop_index('ix_user_type_typology_value', table_name='user_type')
+    op.create_index('ix_user_type_typology_value', 'user_type', ['typology_name', 'type_value'])
@@ -0,0 +1,215 @@
+"""Show query plans and timings of the user/type hot queries with and without
+the indexes from ``migrations/versions/add_hot_query_indexes.py``.
+
+Seeds a scratch database, runs every query once without the indexes and once
+with them, and prints the plan (``EXPLAIN QUERY PLAN`` on SQLite,
+``EXPLAIN ANALYZE`` on PostgreSQL) with the median of several runs.
+
+Usage::
+
+    python scripts/benchmark_indexes.py [--users 50000] [--database-url URL]
+
+Without ``--database-url`` a temporary SQLite file is used. Tables in the
+target database are dropped and recreated, so never point it at real data.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+from app.extensions import db
+from app.models import User, UserType
+
+# Names must match the migration
+HOT_QUERY_INDEXES = (
+    "ix_users_type_id",
+    "ix_users_lat_lon",
+    "ix_users_city_type",
+    "ix_users_country_type",
+    "ix_users_max_distance",
+    "ix_user_type_typology_value",
+)
+
+TYPOLOGIES = {
+    "Temporistics": ["Past", "Current", "Future", "Eternity"],
+    "Psychosophia": ["Emotion", "Logic", "Will", "Physics"],
+    "Socionics": ["ILE", "SEI", "ESE", "LII", "SLE", "IEI", "EIE", "LSI"],
+}
+CITIES = {
+    "Ukraine": ["Kyiv", "Lviv", "Odesa", "Kharkiv", "Dnipro"],
+    "Poland": ["Warsaw", "Krakow", "Gdansk"],
+    "Germany": ["Berlin", "Munich", "Hamburg", "Cologne"],
+}
+
+QUERIES = [
+    (
+        "username lookup",
+        "SELECT id FROM users WHERE username = :username",
+    ),
+    (
+        "email lookup",
+        "SELECT id FROM users WHERE email = :email",
+    ),
+    (
+        "users of a type",
+        "SELECT users.id FROM users JOIN user_type ON users.type_id = user_type.id "
+        "WHERE user_type.typology_name = :typology AND user_type.type_value = :type_value",
+    ),
+    (
+        "distribution by city",
+        "SELECT users.city, user_type.type_value, count(users.id) FROM users "
+        "JOIN user_type ON users.type_id = user_type.id WHERE users.city IS NOT NULL "
+        "GROUP BY users.city, user_type.type_value",
+    ),
+    (
+        "distribution by country",
+        "SELECT users.country, user_type.type_value, count(users.id) FROM users "
+        "JOIN user_type ON users.type_id = user_type.id WHERE users.country IS NOT NULL "
+        "GROUP BY users.country, user_type.type_value",
+    ),
+    (
+        "nearby bounding box",
+        "SELECT id FROM users WHERE latitude IS NOT NULL AND longitude IS NOT NULL "
+        "AND latitude BETWEEN :min_lat AND :max_lat "
+        "AND longitude BETWEEN :min_lon AND :max_lon",
+    ),
+    (
+        "largest search radius",
+        "SELECT max(max_distance) FROM users",
+    ),
+]
+
+
+def seed(engine, users, rng):
+    """Insert ``users`` users referencing one shared user_type row per type."""
+    db.metadata.drop_all(engine, tables=[User.__table__, UserType.__table__])
+    db.metadata.create_all(engine, tables=[UserType.__table__, User.__table__])
+    type_rows = [
+        {"id": type_id, "typology_name": typology, "type_value": type_value}
+        for type_id, (typology, type_value) in enumerate(
+            ((typology, value) for typology, values in TYPOLOGIES.items() for value in values),
+            start=1,
+        )
+    ]
+    user_rows = []
+    locations = [(country, city) for country, cities in CITIES.items() for city in cities]
+    for user_id in range(1, users + 1):
+        country, city = rng.choice(locations) if rng.random() < 0.8 else (None, None)
+        located = rng.random() < 0.7
+        user_rows.append({
+            "id": user_id,
+            "username": f"user{user_id}",
+            "email": f"user{user_id}@example.com",
+            "active": True,
+            "type_id": rng.choice(type_rows)["id"],
+            "latitude": rng.uniform(44.0, 55.0) if located else None,
+            "longitude": rng.uniform(14.0, 40.0) if located else None,
+            "city": city,
+            "country": country,
+            "max_distance": rng.choice([10.0, 25.0, 50.0, 100.0, 500.0]),
+        })
+    with engine.begin() as connection:
+        connection.execute(UserType.__table__.insert(), type_rows)
+        connection.execute(User.__table__.insert(), user_rows)
+
+
+def hot_query_indexes():
+    tables = (User.__table__, UserType.__table__)
+    return [index for table in tables for index in table.indexes if index.name in HOT_QUERY_INDEXES]
+
+
+def analyze(engine):
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+
+
+def explain(connection, sql, params):
+    dialect = connection.engine.dialect.name
+    if dialect == "sqlite":
+        rows = connection.execute(text("EXPLAIN QUERY PLAN " + sql), params)
+        return [row[-1] for row in rows]
+    prefix = "EXPLAIN ANALYZE " if dialect == "postgresql" else "EXPLAIN "
+    return [" | ".join(str(value) for value in row) for row in connection.execute(text(prefix + sql), params)]
+
+
+def time_query(connection, sql, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        connection.execute(text(sql), params).fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def run(engine, params, repeat):
+    results = {}
+    with engine.connect() as connection:
+        for name, sql in QUERIES:
+            results[name] = (explain(connection, sql, params), time_query(connection, sql, params, repeat))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args(argv)
+
+    scratch = None
+    url = args.database_url
+    if url is None:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        scratch.close()
+        url = f"sqlite:///{scratch.name}"
+    engine = create_engine(url)
+    rng = random.Random(args.seed)
+    try:
+        seed(engine, args.users, rng)
+        target = rng.randint(1, args.users)
+        params = {
+            "username": f"user{target}",
+            "email": f"user{target}@example.com",
+            "typology": "Temporistics",
+            "type_value": "Past",
+            "min_lat": 50.0,
+            "max_lat": 50.9,
+            "min_lon": 30.0,
+            "max_lon": 31.4,
+        }
+
+        indexes = hot_query_indexes()
+        for index in indexes:
+            index.drop(engine)
+        analyze(engine)
+        before = run(engine, params, args.repeat)
+        for index in indexes:
+            index.create(engine)
+        analyze(engine)
+        after = run(engine, params, args.repeat)
+    finally:
+        engine.dispose()
+        if scratch is not None:
+            os.unlink(scratch.name)
+
+    print(f"{args.users} users, median of {args.repeat} runs ({engine.dialect.name})")
+    for name, _ in QUERIES:
+        plan_before, time_before = before[name]
+        plan_after, time_after = after[name]
+        speedup = time_before / time_after if time_after else float("inf")
+        print(f"\n== {name}: {time_before * 1000:.2f} ms -> {time_after * 1000:.2f} ms ({speedup:.1f}x)")
+        print("  before:")
+        for line in plan_before:
+            print(f"    {line}")
+        print("  after:")
+        for line in plan_after:
+            print(f"    {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Regenerate app/typologies/socionics_relations.py from the socionics library.
+
+The application answers socionics relation lookups from the generated table
+and never imports ``socionics`` at runtime. Rerun this script after upgrading
+the library; ``tests/test_typologies.py`` checks the table against it.
+"""
+import os
+
+# Socionics codes in the order of TypologySocionics.get_all_types()
+TYPE_CODES = (
+    "ILE", "LII", "ESE", "SEI", "EIE", "SLE", "LSI", "IEI",
+    "SEE", "LIE", "ILI", "ESI", "LSE", "SLI", "IEE", "EII",
+)
+
+# The library identifies types by their MBTI counterparts
+MBTI_CODES = {
+    "ILE": "ENTP",
+    "SEI": "ISFP",
+    "ESE": "ESFJ",
+    "LII": "INTJ",
+    "EIE": "ENFJ",
+    "LSI": "ISTJ",
+    "SLE": "ESTP",
+    "IEI": "INFP",
+    "SEE": "ESFP",
+    "ILI": "INTP",
+    "LIE": "ENTJ",
+    "ESI": "ISFJ",
+    "LSE": "ESTJ",
+    "EII": "INFJ",
+    "IEE": "ENFP",
+    "SLI": "ISTP",
+}
+
+# Sociodb().otn names -> relationship names used in data/socionics_relationships.json
+RELATION_NAMES = {
+    "Тождественные": "Identity",
+    "Квазитождество": "Quasi-identity",
+    "Родственные": "Kindred",
+    "Исполнитель": "Business",
+    "Деловые": "Business",
+    "Заказчик": "Request",
+    "Суперэго": "Super-ego",
+    "Активация": "Activation",
+    "Противоположность": "Conflict",
+    "Зеркальные": "Mirror",
+    "Миражные": "Illusionary",
+    "Ревизор": "Supervision",
+    "Полудуальные": "Semi-duality",
+    "Подревизный": "Supervisor",
+    "Дуальные": "Duality",
+    "Конфликтные": "Conflict",
+}
+
+OUTPUT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+    "app",
+    "typologies",
+    "socionics_relations.py",
+)
+
+
+def compute_relations():
+    """Return the relation table as a tuple of rows indexed like ``TYPE_CODES``."""
+    from socionics.core import Stype, Sociodb
+
+    names = Sociodb().otn
+    types = [Stype(MBTI_CODES[code]) for code in TYPE_CODES]
+    return tuple(
+        tuple(RELATION_NAMES.get(names[first.otn(second)], "Unknown Relationship") for second in types)
+        for first in types
+    )
+
+
+def render_module(relations):
+    lines = [
+        "# app/typologies/socionics_relations.py",
+        "# Generated by scripts/generate_socionics_relations.py - do not edit by hand.",
+        '"""Socionics intertype relations for all ordered pairs of types.',
+        "",
+        "``RELATIONS[TYPE_INDEX[a]][TYPE_INDEX[b]]`` is the relation of type ``a``",
+        "towards type ``b``, as given by the ``socionics`` library.",
+        '"""',
+        "",
+        "TYPE_CODES = (",
+    ]
+    lines += [f'    "{code}",' for code in TYPE_CODES]
+    lines += [
+        ")",
+        "",
+        "TYPE_INDEX = {code: index for index, code in enumerate(TYPE_CODES)}",
+        "",
+        "RELATIONS = (",
+    ]
+    for code, row in zip(TYPE_CODES, relations):
+        lines.append(f"    # {code}")
+        lines.append("    (")
+        lines += [f'        "{name}",' for name in row]
+        lines.append("    ),")
+    lines += [")", ""]
+    return "\n".join(lines)
+
+
+def main(path=OUTPUT_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(render_module(compute_relations()))
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
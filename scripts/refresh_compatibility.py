@@ -0,0 +1,22 @@
+"""Rebuild the materialized user_compatibility table.
+
+Run periodically (e.g. from cron) or once after enabling
+``MATERIALIZE_COMPATIBILITY``; incremental updates run in the background
+after each commit.
+"""
+import os
+
+from app import create_app
+from app.compatibility_store import rebuild_user_compatibility
+
+
+def main(config_name=None):
+    app = create_app(config_name or os.environ.get("FLASK_CONFIG", "development"))
+    with app.app_context():
+        rows = rebuild_user_compatibility()
+    print(f"Stored {rows} compatibility rows")
+
+
+if __name__ == "__main__":
+    import sys
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
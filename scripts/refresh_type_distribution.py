@@ -0,0 +1,21 @@
+"""Rebuild the type_distribution rollup table.
+
+Run once after enabling ``ROLLUP_TYPE_DISTRIBUTION`` or periodically (e.g.
+from cron) to correct any drift; incremental updates happen on flush.
+"""
+import os
+
+from app import create_app
+from app.type_distribution import refresh_type_distribution
+
+
+def main(config_name=None):
+    app = create_app(config_name or os.environ.get("FLASK_CONFIG", "development"))
+    with app.app_context():
+        rows = refresh_type_distribution()
+    print(f"Stored {rows} type distribution rows")
+
+
+if __name__ == "__main__":
+    import sys
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
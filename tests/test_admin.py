@@ -42,3 +42,136 @@ def test_distribution_page(client, app, test_db):
         assert response.status_code == 200
         assert b'Type Distribution' in response.data
 
+
+
+def test_pivot_counts_fills_missing_cells():
+    from app.type_distribution import pivot_counts
+    rows = [('Lviv', 'B', 2), ('Kyiv', 'A', 3), ('Lviv', 'A', 1)]
+    assert pivot_counts(rows) == {
+        'labels': ['Kyiv', 'Lviv'],
+        'datasets': [
+            {'label': 'A', 'data': [3, 1]},
+            {'label': 'B', 'data': [0, 2]},
+        ],
+    }
+    assert pivot_counts([]) == {'labels': [], 'datasets': []}
+
+
+def test_build_distribution_counts_users(app, test_db):
+    from app.models import UserType
+    from app.type_distribution import build_distribution
+    with app.app_context():
+        city = unique_username('city')
+        ut = UserType(typology_name='Temporistics', type_value='Past, Current, Future, Eternity')
+        db.session.add_all([
+            User(username=unique_username('d'), email=unique_email('d'), city=city, country='Ukraine', user_type=ut),
+            User(username=unique_username('d'), email=unique_email('d'), city=city, country='Ukraine', user_type=ut),
+        ])
+        db.session.commit()
+
+        city_data = build_distribution()['city']
+        index = city_data['labels'].index(city)
+        dataset = next(d for d in city_data['datasets'] if d['label'] == ut.type_value)
+        assert dataset['data'][index] == 2
+
+
+def test_distribution_cache_invalidated_on_relevant_commits(app, test_db, monkeypatch):
+    from app import type_distribution
+    calls = []
+    monkeypatch.setattr(type_distribution, 'invalidate_distribution', lambda: calls.append(1))
+    with app.app_context():
+        user = User(username=unique_username('inv'), email=unique_email('inv'), city='Kyiv')
+        db.session.add(user)
+        db.session.commit()
+        assert len(calls) == 1
+
+        user.latitude = 50.0
+        db.session.commit()
+        assert len(calls) == 1
+
+        user.city = 'Odesa'
+        db.session.commit()
+        assert len(calls) == 2
+
+
+def _rollup_rows():
+    from app.models import TypeDistribution
+    return {
+        (r.country, r.city, r.typology_name, r.type_value): r.user_count
+        for r in TypeDistribution.query.all()
+        if r.user_count > 0
+    }
+
+
+def _expected_rollup():
+    from collections import Counter
+    from app.models import UserType
+    counts = Counter()
+    for user in User.query.join(UserType, User.type_id == UserType.id).all():
+        counts[(user.country or '', user.city or '', user.user_type.typology_name, user.user_type.type_value)] += 1
+    return dict(counts)
+
+
+def test_type_distribution_rollup_follows_writes(app, test_db):
+    from app.models import UserType
+    from app.type_distribution import build_distribution, refresh_type_distribution
+    with app.app_context():
+        past = UserType(typology_name='Temporistics', type_value='Past, Current, Future, Eternity')
+        future = UserType(typology_name='Temporistics', type_value='Future, Past, Current, Eternity')
+        db.session.add_all([past, future])
+        db.session.flush()
+        a = User(username=unique_username('r'), email=unique_email('r'), city='Kyiv', country='Ukraine', user_type=past)
+        b = User(username=unique_username('r'), email=unique_email('r'), country='Ukraine', type_id=future.id)
+        c = User(username=unique_username('r'), email=unique_email('r'), city='Lviv', country='Ukraine', user_type=past)
+        db.session.add_all([a, b, c])
+        db.session.commit()
+        assert _rollup_rows() == _expected_rollup()
+
+        a.city = 'Odesa'
+        b.user_type = past
+        db.session.commit()
+        assert _rollup_rows() == _expected_rollup()
+
+        c.city = 'Dnipro'
+        past.type_value = 'Current, Past, Future, Eternity'
+        db.session.commit()
+        assert _rollup_rows() == _expected_rollup()
+
+        db.session.delete(a)
+        db.session.commit()
+        assert _rollup_rows() == _expected_rollup()
+
+        counts = _rollup_rows()
+        assert refresh_type_distribution() == len(counts)
+        assert _rollup_rows() == counts
+
+        city_data = build_distribution()['city']
+        assert city_data['labels'] == ['Dnipro']
+        assert city_data['datasets'] == [{'label': 'Current, Past, Future, Eternity', 'data': [1]}]
+
+
+def test_type_distribution_survives_concurrent_first_insert(app, test_db, monkeypatch):
+    from app import type_distribution
+    from app.models import UserType
+    with app.app_context():
+        past = UserType(typology_name='Temporistics', type_value='Past, Current, Future, Eternity')
+        db.session.add(past)
+        db.session.commit()
+        key = ('Ukraine', 'Kyiv', past.typology_name, past.type_value)
+
+        # Another registration inserts the row right after this one found none
+        update_count = type_distribution._update_count
+        calls = []
+
+        def racing_update(connection, key, delta):
+            calls.append(delta)
+            if len(calls) == 1:
+                type_distribution._add_count(connection, key, 1)
+                return 0
+            return update_count(connection, key, delta)
+
+        monkeypatch.setattr(type_distribution, '_update_count', racing_update)
+        db.session.add(User(username=unique_username('r'), email=unique_email('r'),
+                            city='Kyiv', country='Ukraine', user_type=past))
+        db.session.commit()
+        assert _rollup_rows() == {key: 2}
@@ -29,3 +29,189 @@ def test_api_calculate_missing_params(client, app, test_db):
         response = client.post('/api/calculate', json={'user1': 'A'})
         assert response.status_code == 400
 
+
+
+def test_api_calculate_with_type_codes(client, app, test_db):
+    with app.app_context():
+        response = client.get('/api/types?typology=Temporistics')
+        data = response.get_json()
+        assert data['codes'] == list(range(len(data['types'])))
+
+        by_name = client.post('/api/calculate', json={
+            'user1': data['types'][0],
+            'user2': data['types'][5],
+            'typology': 'Temporistics',
+        }).get_json()
+        by_code = client.post('/api/calculate', json={
+            'user1': 0,
+            'user2': 5,
+            'typology': 'Temporistics',
+        }).get_json()
+        assert by_code == by_name
+
+
+def test_api_calculate_invalid_type_code(client, app, test_db):
+    with app.app_context():
+        response = client.post('/api/calculate', json={
+            'user1': 0,
+            'user2': 99,
+            'typology': 'Temporistics',
+        })
+        assert response.status_code == 400
+
+
+def test_api_calculate_batch_pairs_match_single(client, app, test_db):
+    with app.app_context():
+        types = client.get('/api/types?typology=Temporistics').get_json()['types']
+        pairs = [[types[0], types[5]], [3, 7], [types[2], 2]]
+        response = client.post('/api/calculate/batch', json={
+            'typology': 'Temporistics',
+            'pairs': pairs,
+        })
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['count'] == 3
+        for (user1, user2), result in zip(pairs, data['results']):
+            single = client.post('/api/calculate', json={
+                'user1': user1, 'user2': user2, 'typology': 'Temporistics',
+            }).get_json()
+            assert result['user1'] == user1 and result['user2'] == user2
+            assert result['relationship_type'] == single['relationship_type']
+            assert result['comfort_score'] == single['comfort_score']
+
+
+def test_api_calculate_batch_many_vs_many(client, app, test_db):
+    with app.app_context():
+        response = client.post('/api/calculate/batch', json={
+            'typologies': ['Temporistics', 'Psychosophia'],
+            'sources': [0, 1],
+            'targets': [0, 1, 2],
+        })
+        assert response.status_code == 200
+        results = response.get_json()['results']
+        assert len(results) == 12
+        assert [(r['user1'], r['user2']) for r in results[:6]] == [
+            (0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (1, 2)
+        ]
+        assert {r['typology'] for r in results} == {'Temporistics', 'Psychosophia'}
+
+
+def test_api_calculate_batch_stream(client, app, test_db):
+    import json
+    with app.app_context():
+        response = client.post('/api/calculate/batch', json={
+            'typology': 'Temporistics',
+            'sources': [0],
+            'targets': list(range(24)),
+            'stream': True,
+        })
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = response.get_data(as_text=True).splitlines()
+        assert len(lines) == 24
+        assert json.loads(lines[0])['relationship_type']
+
+
+def test_api_calculate_batch_limits_and_errors(client, app, test_db):
+    with app.app_context():
+        app.config['API_BATCH_MAX_PAIRS'] = 5
+        try:
+            response = client.post('/api/calculate/batch', json={
+                'typology': 'Temporistics',
+                'sources': [0, 1],
+                'targets': [0, 1, 2],
+            })
+            assert response.status_code == 413
+        finally:
+            app.config['API_BATCH_MAX_PAIRS'] = 10000
+
+        assert client.post('/api/calculate/batch', json={
+            'typology': 'Temporistics', 'pairs': [[0, 99]],
+        }).status_code == 400
+        assert client.post('/api/calculate/batch', json={
+            'pairs': [[0, 1]],
+        }).status_code == 400
+        assert client.post('/api/calculate/batch', json={
+            'typology': 'Temporistics',
+        }).status_code == 400
+
+
+def test_api_typology_matrix(client, app, test_db):
+    with app.app_context():
+        response = client.get('/api/typologies/Temporistics/matrix')
+        assert response.status_code == 200
+        data = response.get_json()
+        assert len(data['types']) == 24
+        assert len(data['scores']) == 24 and len(data['scores'][0]) == 24
+        single = client.post('/api/calculate', json={
+            'user1': 3, 'user2': 7, 'typology': 'Temporistics',
+        }).get_json()
+        assert data['relationship_names'][data['relationships'][3][7]] == single['relationship_type']
+        assert data['scores'][3][7] == single['comfort_score']
+
+        etag = response.headers['ETag']
+        assert not etag.startswith('W/')
+        cached = client.get(
+            '/api/typologies/Temporistics/matrix', headers={'If-None-Match': etag}
+        )
+        assert cached.status_code == 304
+        other = client.get('/api/typologies/Socionics/matrix')
+        assert other.headers['ETag'] != etag
+
+
+def test_api_typology_matrix_unknown(client, app, test_db):
+    with app.app_context():
+        assert client.get('/api/typologies/Unknown/matrix').status_code == 404
+
+
+def test_api_top_matches(client, app, test_db):
+    from app.models import User
+    from app.services import create_user_type
+    from app.user_snapshot import clear_user_snapshot
+    from tests.test_helpers import unique_username, unique_email
+
+    assert client.get('/api/matches/top').status_code == 401
+
+    with app.app_context():
+        clear_user_snapshot()
+
+        def user(prefix, type_value, latitude, **kwargs):
+            return User(
+                username=unique_username(prefix),
+                email=unique_email(prefix),
+                latitude=latitude,
+                longitude=30.52,
+                user_type=create_user_type("Temporistics", type_value, commit=False),
+                **kwargs,
+            )
+
+        me = user("me", "Past, Current, Future, Eternity", 50.45, max_distance=100.0)
+        near = user("near", "Current, Past, Future, Eternity", 50.46)
+        far = user("far", "Past, Current, Future, Eternity", 50.95)
+        incompatible = user("incompatible", "Eternity, Future, Current, Past", 50.45)
+        test_db.session.add_all([me, near, far, incompatible])
+        test_db.session.commit()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(me.id)
+            session['_fresh'] = True
+
+        data = client.get('/api/matches/top?k=5').get_json()
+        assert [m['user_id'] for m in data['matches']] == [near.id, far.id]
+        assert data['matches'][0]['relationship_type'] == 'Order/Full Order'
+
+        data = client.get('/api/matches/top?k=1&distance_weight=0').get_json()
+        assert [m['user_id'] for m in data['matches']] == [far.id]
+        data = client.get('/api/matches/top?radius=10').get_json()
+        assert [m['user_id'] for m in data['matches']] == [near.id]
+        data = client.get('/api/matches/top?weights=Temporistics:0').get_json()
+        assert data['count'] == 0
+
+        assert client.get('/api/matches/top?k=abc').status_code == 400
+        assert client.get('/api/matches/top?k=100000').status_code == 400
+        assert client.get('/api/matches/top?weights=Temporistics').status_code == 400
+        assert client.get('/api/matches/top?weights=Temporistics:0.2').status_code == 400
+        assert client.get('/api/matches/top?weights=Temporistics:5').status_code == 400
+        assert client.get('/api/matches/top?weights=Temporistics:1').status_code == 200
+        assert client.get('/api/matches/top?half_life=nan').status_code == 400
+        assert client.get('/api/matches/top?radius=nan').status_code == 400
+        clear_user_snapshot()
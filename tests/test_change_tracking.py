@@ -0,0 +1,42 @@
+import pytest
+
+from app import change_tracking
+from app.extensions import db
+from app.models import User
+from tests.test_helpers import unique_username, unique_email
+
+
+@pytest.fixture
+def applied():
+    calls = []
+
+    def collect(session, pending):
+        added = {obj.username for obj in session.new if isinstance(obj, User)}
+        return (pending or set()) | added or None
+
+    change_tracking.on_commit("test", collect, calls.append)
+    yield calls
+    del change_tracking._listeners["test"]
+
+
+def _user(prefix):
+    return User(username=unique_username(prefix), email=unique_email(prefix))
+
+
+def test_changes_are_applied_once_per_commit(app, test_db, applied):
+    with app.app_context():
+        first, second = _user("first"), _user("second")
+        db.session.add(first)
+        db.session.flush()
+        # Released savepoints hand nothing over before the commit
+        with db.session.begin_nested():
+            db.session.add(second)
+        assert applied == []
+        db.session.commit()
+        assert applied == [{first.username, second.username}]
+
+        db.session.add(_user("undone"))
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+        assert len(applied) == 1
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from app import chat_cache
+from app.chat_cache import (
+    cache_reply,
+    cache_stream,
+    clear_chat_cache,
+    get_cached_reply,
+    get_chat_cache_stats,
+    normalize_message,
+)
+from app.chat_providers import ChatProvider
+
+
+class FakeProvider(ChatProvider):
+    name = "fake"
+
+    def __init__(self, model_name="m1"):
+        self.model_name = model_name
+
+
+class FakeEmbedder:
+    """Maps questions mentioning agape to one direction, others to another."""
+
+    def encode(self, text):
+        return np.array([1.0, 0.1] if "agape" in text else [0.0, 1.0])
+
+
+@pytest.fixture(autouse=True)
+def empty_chat_cache(app):
+    with app.app_context():
+        clear_chat_cache()
+        yield
+        clear_chat_cache()
+
+
+def test_normalize_message():
+    assert normalize_message("  What is   Full Agape?? ") == "what is full agape"
+
+
+def test_reply_is_cached_per_provider_and_model(app):
+    provider = FakeProvider()
+    assert get_cached_reply(provider, "What is Full Agape?") is None
+    cache_reply(provider, "What is Full Agape?", "An answer", elapsed=2.0)
+
+    assert get_cached_reply(provider, "what is full agape") == "An answer"
+    assert get_cached_reply(FakeProvider("m2"), "what is full agape") is None
+
+    stats = get_chat_cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    assert stats["hits_by_tier"]["local"] == 1
+    assert stats["saved_seconds"] == 2.0
+
+
+def test_local_cache_evicts_least_recently_used(app):
+    app.config["CHAT_CACHE_MAX_ENTRIES"] = 2
+    try:
+        clear_chat_cache()
+        provider = FakeProvider()
+        for message in ("a", "b"):
+            cache_reply(provider, message, message.upper(), elapsed=1.0)
+        assert get_cached_reply(provider, "a") == "A"
+        cache_reply(provider, "c", "C", elapsed=1.0)
+        # NullCache in tests, so evicted entries are gone entirely
+        assert get_cached_reply(provider, "b") is None
+        assert get_cached_reply(provider, "a") == "A"
+    finally:
+        app.config["CHAT_CACHE_MAX_ENTRIES"] = 1024
+
+
+def test_local_cache_entries_expire(app, monkeypatch):
+    provider = FakeProvider()
+    cache_reply(provider, "a", "A", elapsed=1.0)
+    now = chat_cache.time.monotonic()
+    monkeypatch.setattr(chat_cache.time, "monotonic", lambda: now + app.config["CHAT_CACHE_TTL"] + 1)
+    assert get_cached_reply(provider, "a") is None
+
+
+def test_semantic_tier_matches_similar_questions(app, monkeypatch):
+    monkeypatch.setitem(chat_cache._embedders, "fake-embedder", FakeEmbedder())
+    app.config["CHAT_CACHE_EMBEDDING_MODEL"] = "fake-embedder"
+    try:
+        provider = FakeProvider()
+        cache_reply(provider, "What is Full Agape?", "An answer", elapsed=1.0)
+        assert get_cached_reply(provider, "Explain full agape please") == "An answer"
+        assert get_cached_reply(provider, "What is Temporistics?") is None
+        assert get_chat_cache_stats()["hits_by_tier"]["semantic"] == 1
+    finally:
+        app.config["CHAT_CACHE_EMBEDDING_MODEL"] = None
+
+
+def test_cache_stream_stores_only_completed_replies(app):
+    provider = FakeProvider()
+    assert list(cache_stream(provider, "a", iter(["A", "B"]))) == ["A", "B"]
+    assert get_cached_reply(provider, "a") == "AB"
+
+    def pieces():
+        yield "X"
+        yield "Y"
+
+    partial = cache_stream(provider, "b", pieces())
+    assert next(partial) == "X"
+    partial.close()
+    assert get_cached_reply(provider, "b") is None
+
+
+def test_cache_can_be_disabled(app):
+    app.config["CHAT_CACHE_ENABLED"] = False
+    try:
+        provider = FakeProvider()
+        cache_reply(provider, "a", "A", elapsed=1.0)
+        assert get_cached_reply(provider, "a") is None
+    finally:
+        app.config["CHAT_CACHE_ENABLED"] = True
@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+from app.chat_executor import (
+    ChatBusyError,
+    ChatExecutor,
+    ChatTimeoutError,
+    clear_chat_executors,
+    get_chat_executor,
+)
+
+
+@pytest.fixture
+def executor():
+    executor = ChatExecutor("test", concurrency=1, max_queue=1)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def test_call_returns_result(executor):
+    assert executor.call(lambda message: message.upper(), "hi", timeout=5) == "HI"
+
+
+def test_submit_rejects_when_queue_is_full(executor):
+    release = threading.Event()
+    running = executor.submit(release.wait)
+    queued = executor.submit(lambda: "queued")
+    with pytest.raises(ChatBusyError):
+        executor.submit(lambda: "rejected")
+    release.set()
+    running.result(timeout=5)
+    assert queued.result(timeout=5) == "queued"
+    # Slots are returned once calls finish
+    assert executor.call(lambda: "again", timeout=5) == "again"
+
+
+def test_call_times_out(executor):
+    release = threading.Event()
+    try:
+        with pytest.raises(ChatTimeoutError):
+            executor.call(release.wait, timeout=0.05)
+        # The timed-out call still runs and holds its slot
+        queued = executor.submit(lambda: "queued")
+        with pytest.raises(ChatBusyError):
+            executor.submit(lambda: "rejected")
+    finally:
+        release.set()
+    assert queued.result(timeout=5) == "queued"
+
+
+def test_stream_yields_items_and_errors(executor):
+    assert list(executor.stream(lambda: iter(["a", "b"]), timeout=5)) == ["a", "b"]
+
+    def failing():
+        yield "a"
+        raise RuntimeError("boom")
+
+    pieces = executor.stream(failing, timeout=5)
+    assert next(pieces) == "a"
+    with pytest.raises(RuntimeError):
+        next(pieces)
+
+
+def test_stream_close_stops_provider(executor):
+    produced = []
+    closed = threading.Event()
+
+    def endless():
+        try:
+            while True:
+                produced.append(len(produced))
+                yield "x"
+                time.sleep(0.01)
+        finally:
+            closed.set()
+
+    pieces = executor.stream(endless, timeout=5)
+    assert next(pieces) == "x"
+    pieces.close()
+    assert closed.wait(timeout=5)
+    count = len(produced)
+    time.sleep(0.05)
+    assert len(produced) == count
+
+
+def test_executors_use_per_provider_limits(app):
+    with app.app_context():
+        limits = app.config["CHAT_PROVIDER_CONCURRENCY"]
+        app.config["CHAT_PROVIDER_CONCURRENCY"] = {"slow": 1}
+        app.config["CHAT_CONCURRENCY"] = 3
+        try:
+            clear_chat_executors()
+            assert get_chat_executor("slow").concurrency == 1
+            assert get_chat_executor("fast").concurrency == 3
+            assert get_chat_executor("fast") is get_chat_executor("fast")
+        finally:
+            app.config["CHAT_PROVIDER_CONCURRENCY"] = limits
+            app.config["CHAT_CONCURRENCY"] = 4
+            clear_chat_executors()
@@ -0,0 +1,338 @@
+import os
+import queue
+import subprocess
+import sys
+
+import pytest
+
+from app.chat_cache import clear_chat_cache
+from app.chat_providers import ChatProvider, HuggingFaceProvider, get_chat_provider
+from app.models import User
+from tests.test_helpers import unique_username, unique_email
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds a fresh interpreter may spend importing the app and running
+# create_app(); override with CREATE_APP_IMPORT_BUDGET on slow machines
+IMPORT_BUDGET = float(os.environ.get("CREATE_APP_IMPORT_BUDGET", "4.0"))
+
+SDK_MODULES = ("openai", "anthropic", "google.generativeai", "transformers")
+
+
+@pytest.fixture(autouse=True)
+def empty_chat_cache():
+    clear_chat_cache()
+    yield
+    clear_chat_cache()
+
+
+def test_create_app_import_budget():
+    """create_app() must not import chat SDKs and must stay within budget."""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "from app import create_app\n"
+        "create_app('testing')\n"
+        "print(time.perf_counter() - start)\n"
+        f"print(','.join(m for m in {SDK_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    elapsed, loaded = result.stdout.splitlines()[-2:]
+    assert loaded == "", f"SDKs imported at startup: {loaded}"
+    assert float(elapsed) < IMPORT_BUDGET
+
+
+def test_get_chat_provider_imports_sdk_on_use(app):
+    with app.app_context():
+        app.config["CHAT_PROVIDER"] = "huggingface"
+        try:
+            provider = get_chat_provider()
+        finally:
+            app.config["CHAT_PROVIDER"] = "openai"
+        assert isinstance(provider, HuggingFaceProvider)
+        assert provider.api_url.endswith(app.config["HUGGINGFACE_MODEL"])
+
+
+def test_chat_providers_are_pooled_per_config(app):
+    from app.chat_providers import clear_chat_providers
+    with app.app_context():
+        app.config["CHAT_PROVIDER"] = "huggingface"
+        try:
+            clear_chat_providers()
+            first = get_chat_provider()
+            assert get_chat_provider() is first
+            app.config["HUGGINGFACE_MODEL"] = "other/model"
+            other = get_chat_provider()
+            assert other is not first
+            assert other.api_url.endswith("other/model")
+        finally:
+            app.config["CHAT_PROVIDER"] = "openai"
+            app.config["HUGGINGFACE_MODEL"] = "google/flan-t5-small"
+            clear_chat_providers()
+
+
+def test_huggingface_provider_reuses_session(monkeypatch):
+    provider = HuggingFaceProvider("some/model", "token")
+    calls = []
+
+    class FakeResponse:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return [{"generated_text": "hi"}]
+
+    def fake_post(url, **kwargs):
+        calls.append(url)
+        return FakeResponse()
+
+    monkeypatch.setattr(provider.session, "post", fake_post)
+    assert provider.reply("a") == "hi"
+    assert provider.reply("b") == "hi"
+    assert len(calls) == 2
+    assert provider.session.headers["Authorization"] == "Bearer token"
+
+
+class FakeStreamingProvider(ChatProvider):
+    def reply(self, message):
+        return "Hello there"
+
+    def stream(self, message):
+        yield "Hello"
+        yield " there"
+
+
+class FailingProvider(ChatProvider):
+    def reply(self, message):
+        raise RuntimeError("boom")
+
+
+def _login(client, test_db):
+    user = User(username=unique_username(), email=unique_email())
+    test_db.session.add(user)
+    test_db.session.commit()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user.id)
+        session["_fresh"] = True
+
+
+def test_default_stream_yields_whole_reply():
+    assert list(ChatProvider.stream(FakeStreamingProvider(), "hi")) == ["Hello there"]
+
+
+def test_chat_api_streams_server_sent_events(client, app, test_db, monkeypatch):
+    import json
+    monkeypatch.setattr("app.routes.get_chat_provider", lambda: FakeStreamingProvider())
+    with app.app_context():
+        _login(client, test_db)
+        response = client.post("/chat_api", json={"message": "hi", "stream": True})
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        events = [block.split("\n") for block in response.get_data(as_text=True).split("\n\n") if block]
+        names = [lines[0][len("event: "):] for lines in events]
+        payloads = [json.loads(lines[1][len("data: "):]) for lines in events]
+        assert names == ["delta", "delta", "done"]
+        assert "".join(p["text"] for p in payloads[:2]) == "Hello there"
+
+        plain = client.post("/chat_api", json={"message": "hi"})
+        assert plain.get_json() == {"reply": "Hello there"}
+
+
+def test_chat_api_stream_reports_provider_errors(client, app, test_db, monkeypatch):
+    monkeypatch.setattr("app.routes.get_chat_provider", lambda: FailingProvider())
+    with app.app_context():
+        _login(client, test_db)
+        response = client.post(
+            "/chat_api", json={"message": "hi"}, headers={"Accept": "text/event-stream"}
+        )
+        body = response.get_data(as_text=True)
+        assert body.startswith("event: error")
+        assert "Sorry" in body
+
+
+def test_chat_api_without_api_key_falls_back(client, app, test_db, monkeypatch):
+    from app.chat_providers import clear_chat_providers
+
+    monkeypatch.setitem(app.config, "OPENAI_API_KEY", None)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    clear_chat_providers()
+    try:
+        with app.app_context():
+            _login(client, test_db)
+            response = client.post("/chat_api", json={"message": "hi"})
+            assert response.status_code == 200
+            assert response.get_json() == {"reply": "Sorry, I cannot respond right now."}
+            streamed = client.post("/chat_api", json={"message": "hi", "stream": True})
+            assert streamed.get_data(as_text=True).startswith("event: error")
+    finally:
+        clear_chat_providers()
+
+
+def test_chat_api_returns_503_when_busy(client, app, test_db, monkeypatch):
+    from app.chat_executor import ChatBusyError
+
+    class BusyExecutor:
+        def call(self, *args, **kwargs):
+            raise ChatBusyError("busy")
+
+    monkeypatch.setattr("app.routes.get_chat_provider", lambda: FakeStreamingProvider())
+    monkeypatch.setattr("app.routes.get_chat_executor", lambda name: BusyExecutor())
+    with app.app_context():
+        _login(client, test_db)
+        response = client.post("/chat_api", json={"message": "hi"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"]
+
+
+def test_chat_api_serves_repeated_questions_from_cache(client, app, test_db, monkeypatch):
+    calls = []
+
+    class CountingProvider(ChatProvider):
+        def reply(self, message):
+            calls.append(message)
+            return "Full Agape is a relationship."
+
+    provider = CountingProvider()
+    monkeypatch.setattr("app.routes.get_chat_provider", lambda: provider)
+    with app.app_context():
+        _login(client, test_db)
+        first = client.post("/chat_api", json={"message": "What is Full Agape?"}).get_json()
+        second = client.post("/chat_api", json={"message": "what is full agape"}).get_json()
+        streamed = client.post("/chat_api", json={"message": "What is Full Agape", "stream": True})
+        assert first == second == {"reply": "Full Agape is a relationship."}
+        assert "Full Agape is a relationship." in streamed.get_data(as_text=True)
+        assert len(calls) == 1
+
+
+class FakeTokenizer:
+    pad_token_id = None
+    eos_token_id = 0
+    padding_side = "right"
+
+
+class FakePipeline:
+    def __init__(self):
+        self.tokenizer = FakeTokenizer()
+        self.calls = []
+
+    def __call__(self, inputs, **kwargs):
+        self.calls.append(inputs)
+        if isinstance(inputs, list):
+            return [[{"generated_text": f"{text}!"}] for text in inputs]
+        return [{"generated_text": f"{inputs}!"}]
+
+
+def test_micro_batcher_groups_concurrent_calls():
+    import threading
+    from app.chat_providers import MicroBatcher
+
+    batches = []
+
+    def run(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(run, max_batch_size=3, max_wait=0.2)
+    results = {}
+    threads = [
+        threading.Thread(target=lambda i=i: results.__setitem__(i, batcher(i)))
+        for i in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert results == {i: i * 2 for i in range(5)}
+    assert max(len(batch) for batch in batches) == 3
+    assert sum(len(batch) for batch in batches) == 5
+
+
+def test_micro_batcher_propagates_errors():
+    from app.chat_providers import MicroBatcher
+
+    def fail(items):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        MicroBatcher(fail, max_batch_size=2, max_wait=0.0)("x")
+
+
+def test_micro_batcher_fails_items_without_result():
+    from app.chat_providers import MicroBatcher
+
+    batcher = MicroBatcher(lambda items: items[:1], max_batch_size=2, max_wait=0.2)
+    first, second = batcher.submit("a"), batcher.submit("b")
+    assert first.result(timeout=5) == "a"
+    with pytest.raises(RuntimeError):
+        second.result(timeout=5)
+
+
+def test_local_provider_streams_one_at_a_time(monkeypatch):
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from app.chat_providers import LocalHFProvider
+
+    class FakeStreamer:
+        def __init__(self, tokenizer, skip_prompt=False):
+            self.pieces = queue.Queue()
+
+        def end(self):
+            self.pieces.put(None)
+
+        def __iter__(self):
+            return iter(self.pieces.get, None)
+
+    class StreamingPipeline(FakePipeline):
+        def __init__(self):
+            super().__init__()
+            self.running = 0
+            self.most_running = 0
+            self.lock = threading.Lock()
+
+        def __call__(self, inputs, streamer=None, **kwargs):
+            with self.lock:
+                self.running += 1
+                self.most_running = max(self.most_running, self.running)
+            time.sleep(0.02)
+            with self.lock:
+                self.running -= 1
+            streamer.pieces.put(f"{inputs}!")
+            streamer.end()
+
+    fake = StreamingPipeline()
+    monkeypatch.setattr("transformers.pipeline", lambda *args, **kwargs: fake)
+    monkeypatch.setattr("transformers.TextIteratorStreamer", FakeStreamer)
+    provider = LocalHFProvider("model", max_batch_size=4)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        replies = list(pool.map(lambda m: "".join(provider.stream(m)), ["a", "b", "c", "d"]))
+    assert replies == ["a!", "b!", "c!", "d!"]
+    assert fake.most_running == 1
+
+
+def test_local_provider_batches_replies(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from app.chat_providers import LocalHFProvider
+
+    fake = FakePipeline()
+    monkeypatch.setattr("transformers.pipeline", lambda *args, **kwargs: fake)
+    provider = LocalHFProvider("model", max_batch_size=4, max_wait=0.2)
+    assert fake.tokenizer.padding_side == "left"
+    assert fake.tokenizer.pad_token_id == 0
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        replies = list(pool.map(provider.reply, ["a", "b", "c", "d"]))
+    assert replies == ["a!", "b!", "c!", "d!"]
+    assert len(fake.calls) < 4
+
+    unbatched = LocalHFProvider("model")
+    assert unbatched.batcher is None
+    assert unbatched.reply("e") == "e!"
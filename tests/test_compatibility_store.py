@@ -0,0 +1,131 @@
+import pytest
+
+from app.compatibility_store import (
+    get_materialized_compatibles,
+    rebuild_user_compatibility,
+    wait_for_compatibility_refresh,
+)
+import app.coverage_index as coverage_index
+from app.models import User, UserCompatibility
+from app.services import assign_user_type, create_user_type
+from tests.test_helpers import unique_username, unique_email
+
+
+def _user(prefix, type_value, **kwargs):
+    return User(
+        username=unique_username(prefix),
+        email=unique_email(prefix),
+        user_type=create_user_type("Temporistics", type_value, commit=False),
+        **kwargs,
+    )
+
+
+@pytest.fixture(autouse=True)
+def materialize(app):
+    app.config["MATERIALIZE_COMPATIBILITY"] = True
+    yield
+    wait_for_compatibility_refresh()
+    app.config["MATERIALIZE_COMPATIBILITY"] = False
+
+
+def _rows(session):
+    wait_for_compatibility_refresh()
+    session.expire_all()
+    return {
+        (r.user_a_id, r.user_b_id): r.comfort_score
+        for r in session.query(UserCompatibility).all()
+    }
+
+
+def _commit(test_db):
+    # Тестова SQLite-база має одне з'єднання, тож чекаємо фонове оновлення
+    test_db.session.commit()
+    wait_for_compatibility_refresh()
+
+
+def _materialized(user):
+    wait_for_compatibility_refresh()
+    return get_materialized_compatibles(user)
+
+
+def test_rows_follow_user_changes(app, test_db):
+    with app.app_context():
+        me = _user("me", "Past, Current, Future, Eternity",
+                   latitude=50.4501, longitude=30.5234, max_distance=5.0)
+        test_db.session.add(me)
+        _commit(test_db)
+
+        near = _user("near", "Past, Current, Future, Eternity",
+                     latitude=50.4520, longitude=30.5300, max_distance=50.0)
+        far = _user("far", "Past, Current, Future, Eternity",
+                    latitude=50.5200, longitude=30.6000, max_distance=50.0)
+        test_db.session.add_all([near, far])
+        _commit(test_db)
+
+        rows = _rows(test_db.session)
+        assert (me.id, near.id) in rows
+        assert (me.id, far.id) not in rows  # поза радіусом 5 км
+        assert (far.id, me.id) in rows
+        assert [u.id for u, _ in _materialized(me)] == [near.id]
+
+        # Зміна типу робить пару несумісною
+        assign_user_type(near, "Temporistics", "Eternity, Future, Current, Past")
+        assert [u.id for u, _ in _materialized(me)] == []
+
+        # Зміна координат переносить користувача в радіус
+        far.latitude, far.longitude = 50.4510, 30.5250
+        _commit(test_db)
+        assert [u.id for u, _ in _materialized(me)] == [far.id]
+
+        test_db.session.delete(far)
+        _commit(test_db)
+        assert all(far.id not in pair for pair in _rows(test_db.session))
+
+
+def test_rebuild_matches_incremental_rows(app, test_db, monkeypatch):
+    # Durable rows never come from the per-process coverage index
+    monkeypatch.setattr(coverage_index, "get_coverage_index", pytest.fail)
+    with app.app_context():
+        users = [
+            _user(f"u{i}", value, latitude=50.45 + i * 0.01, longitude=30.52,
+                  max_distance=2.0 + i)
+            for i, value in enumerate([
+                "Past, Current, Future, Eternity",
+                "Current, Past, Eternity, Future",
+                "Eternity, Future, Current, Past",
+                "Future, Eternity, Past, Current",
+            ])
+        ]
+        test_db.session.add_all(users)
+        _commit(test_db)
+        incremental = _rows(test_db.session)
+
+        assert rebuild_user_compatibility() == len(incremental)
+        assert _rows(test_db.session) == incremental
+
+
+def test_routes_read_materialized_rows(client, app, test_db, monkeypatch):
+    with app.app_context():
+        me = _user("me", "Past, Current, Future, Eternity",
+                   latitude=50.4501, longitude=30.5234, max_distance=5.0)
+        near = _user("near", "Past, Current, Future, Eternity",
+                     latitude=50.4520, longitude=30.5300, max_distance=50.0)
+        test_db.session.add_all([me, near])
+        _commit(test_db)
+        with client.session_transaction() as session:
+            session["_user_id"] = str(me.id)
+            session["_fresh"] = True
+
+        # Відповіді мають прийти з таблиці, а не з живих обчислень
+        monkeypatch.setattr("app.routes.get_nearby_candidates", pytest.fail)
+        monkeypatch.setattr("app.recommendations.covering_user_ids", pytest.fail)
+        assert near.username in client.get("/nearby_compatibles").get_data(as_text=True)
+        data = client.get("/api/matches/incoming").get_json()
+        assert [m["user_id"] for m in data["matches"]] == [near.id]
+        assert data["matches"][0]["relationship_type"]
+
+        # Поки таблиця порожня, сторінка рахує відповідь наживо
+        test_db.session.query(UserCompatibility).delete()
+        test_db.session.commit()
+        monkeypatch.undo()
+        assert near.username in client.get("/nearby_compatibles").get_data(as_text=True)
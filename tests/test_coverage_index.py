@@ -0,0 +1,140 @@
+import random
+
+import pytest
+
+from app.coverage_index import CoverageIndex, covering_user_ids, get_coverage_index
+from app.extensions import db
+from app.geo import EARTH_RADIUS_KM, distances_km, unit_vector
+from app.models import User
+from app.user_snapshot import clear_user_snapshot
+from tests.test_helpers import unique_username, unique_email
+
+
+def _user(prefix, **kwargs):
+    return User(username=unique_username(prefix), email=unique_email(prefix), **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def fresh_snapshot(app):
+    with app.app_context():
+        clear_user_snapshot()
+        yield
+        clear_user_snapshot()
+
+
+def _covers(disk, latitude, longitude):
+    center_lat, center_lon, radius = disk
+    distance = distances_km(unit_vector(latitude, longitude), [unit_vector(center_lat, center_lon)])[0]
+    return radius is None or distance <= radius
+
+
+def test_covering_equals_full_scan():
+    rng = random.Random(7)
+    index = CoverageIndex(cell_degrees=0.25, max_cells=4)
+    disks = {}
+    for user_id in range(400):
+        latitude = rng.choice([rng.uniform(-90, 90), rng.uniform(84, 90), rng.uniform(-10, 10)])
+        longitude = rng.choice([rng.uniform(-180, 180), rng.uniform(178, 180), rng.uniform(-180, -178)])
+        radius = rng.choice([None, 5.0, 50.0, 300.0, 2000.0, EARTH_RADIUS_KM * 4])
+        disks[user_id] = (latitude, longitude, radius)
+        index.set(user_id, disks[user_id])
+    for user_id in range(0, 400, 3):
+        del disks[user_id]
+        index.set(user_id, None)
+    for user_id in range(1, 400, 5):
+        # Moves deleted users back in as well
+        disks[user_id] = (rng.uniform(-90, 90), rng.uniform(-180, 180), 120.0)
+        index.set(user_id, disks[user_id])
+    assert len(index) == len(disks)
+
+    points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(300)]
+    points += [disk[:2] for disk in disks.values()]
+    points += [(90.0, 0.0), (-90.0, 0.0), (0.0, 180.0), (0.0, -180.0)]
+    for latitude, longitude in points:
+        expected = {user_id for user_id, disk in disks.items() if _covers(disk, latitude, longitude)}
+        assert index.covering(latitude, longitude) == expected
+
+
+def test_index_follows_commits(app, test_db):
+    with app.app_context():
+        viewer = _user("viewer", latitude=50.45, longitude=30.52, max_distance=20.0)
+        db.session.add(viewer)
+        db.session.commit()
+        newcomer = _user("newcomer", latitude=50.50, longitude=30.60, max_distance=1.0)
+        assert len(get_coverage_index()) == 1
+
+        db.session.add(newcomer)
+        db.session.commit()
+        assert covering_user_ids(newcomer) == {viewer.id}
+        assert covering_user_ids(viewer) == set()
+
+        # Moving away and changing the radius update the index
+        newcomer.latitude, newcomer.longitude = 40.0, -74.0
+        db.session.commit()
+        assert covering_user_ids(newcomer) == set()
+        viewer.max_distance = None
+        db.session.commit()
+        assert covering_user_ids(newcomer) == {viewer.id}
+
+        # Rolled back changes leave the index as it is
+        index = get_coverage_index()
+        viewer.latitude = None
+        db.session.flush()
+        db.session.rollback()
+        assert get_coverage_index() is index
+        assert covering_user_ids(newcomer) == {viewer.id}
+
+        db.session.delete(viewer)
+        db.session.commit()
+        assert covering_user_ids(newcomer) == set()
+
+        nowhere = _user("nowhere")
+        assert covering_user_ids(nowhere) == set()
+        app.config["COVERAGE_INDEX_ENABLED"] = False
+        try:
+            assert covering_user_ids(newcomer) is None
+        finally:
+            app.config["COVERAGE_INDEX_ENABLED"] = True
+
+
+@pytest.mark.parametrize("use_index", [True, False])
+def test_incoming_matches_api(client, app, test_db, use_index):
+    from app.services import calculate_relationship_by_codes, create_user_type, get_users_distance
+
+    def typed(prefix, type_value, **kwargs):
+        return _user(prefix, user_type=create_user_type("Temporistics", type_value, commit=False), **kwargs)
+
+    assert client.get("/api/matches/incoming").status_code == 401
+    app.config["COVERAGE_INDEX_ENABLED"] = use_index
+    try:
+        with app.app_context():
+            me = typed("me", "Past, Current, Future, Eternity", latitude=50.45, longitude=30.52)
+            others = [
+                typed(f"other{i}", value, latitude=50.45 + 0.1 * i, longitude=30.52, max_distance=radius)
+                for i, (value, radius) in enumerate([
+                    ("Current, Past, Future, Eternity", 50.0),
+                    ("Past, Current, Future, Eternity", 5.0),
+                    ("Eternity, Future, Current, Past", 50.0),
+                    ("Past, Current, Future, Eternity", None),
+                    ("Future, Eternity, Past, Current", 50.0),
+                ])
+            ]
+            db.session.add_all([me] + others)
+            db.session.commit()
+            with client.session_transaction() as session:
+                session["_user_id"] = str(me.id)
+                session["_fresh"] = True
+
+            expected = sorted(
+                (get_users_distance(me, other), other.id)
+                for other in others
+                if (other.max_distance is None or get_users_distance(me, other) <= other.max_distance)
+                and calculate_relationship_by_codes(
+                    other.user_type.type_code, me.user_type.type_code, "Temporistics"
+                )[1] > 50
+            )
+            data = client.get("/api/matches/incoming").get_json()
+            assert [m["user_id"] for m in data["matches"]] == [user_id for _, user_id in expected]
+            assert data["count"] >= 2
+    finally:
+        app.config["COVERAGE_INDEX_ENABLED"] = True
@@ -0,0 +1,59 @@
+import json
+import os
+
+import pytest
+
+from app import data_cache
+
+
+def test_load_json_file_reuses_parsed_data(tmp_path, monkeypatch):
+    path = tmp_path / "scores.json"
+    path.write_text(json.dumps({"Dual": {"score": 10}}))
+
+    first = data_cache.load_json_file(str(path))
+    calls = []
+    monkeypatch.setattr(data_cache.json, "load", lambda f: calls.append(f) or {})
+    assert data_cache.load_json_file(str(path)) is first
+    assert calls == []
+
+
+def test_load_json_file_reloads_after_change(tmp_path):
+    path = tmp_path / "scores.json"
+    path.write_text(json.dumps({"Dual": {"score": 10}}))
+    assert data_cache.load_json_file(str(path))["Dual"]["score"] == 10
+
+    path.write_text(json.dumps({"Dual": {"score": 9}}))
+    # Гарантуємо інший mtime навіть на файлових системах з грубою роздільністю
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert data_cache.load_json_file(str(path))["Dual"]["score"] == 9
+
+
+def test_load_json_file_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        data_cache.load_json_file(str(tmp_path / "missing.json"))
+    assert data_cache.file_version(str(tmp_path / "missing.json")) is None
+
+
+def test_socionics_matrix_follows_score_file(tmp_path, monkeypatch):
+    from app.typologies.typology_socionics import TypologySocionics
+    from app.typologies.matrix import get_relationship_matrix
+
+    path = tmp_path / "socionics_relationships.json"
+    path.write_text(json.dumps({"Identity": {"score": 7, "description": ""}}))
+    monkeypatch.setattr(TypologySocionics, "COMFORT_SCORES_FILE", str(path))
+    monkeypatch.setattr(TypologySocionics, "DATA_FILES", (str(path),))
+
+    assert get_relationship_matrix("Socionics").scores[0, 0] == 7
+    fingerprint = get_relationship_matrix("Socionics").fingerprint
+    path.write_text(json.dumps({"Identity": {"score": 3, "description": ""}}))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert get_relationship_matrix("Socionics").scores[0, 0] == 3
+    assert get_relationship_matrix("Socionics").fingerprint != fingerprint
+
+    # Only the contents count: a touched file keeps its fingerprint
+    previous = get_relationship_matrix("Socionics")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+    matrix = get_relationship_matrix("Socionics")
+    assert matrix is not previous and matrix.fingerprint == previous.fingerprint
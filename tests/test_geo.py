@@ -0,0 +1,139 @@
+import random
+
+import numpy as np
+import pytest
+from haversine import haversine
+
+from app.geo import bounding_box, distances_km, min_dot, unit_vector, unit_vectors
+from app.models import User
+from app.repositories.user_repository import get_nearby_candidates
+from app.services import get_users_distances
+from tests.test_helpers import unique_username, unique_email
+
+
+def _inside(box, lat, lon):
+    min_lat, max_lat, lon_ranges = box
+    if not min_lat <= lat <= max_lat:
+        return False
+    if lon_ranges is None:
+        return True
+    return any(lo <= lon <= hi for lo, hi in lon_ranges)
+
+
+@pytest.mark.parametrize(
+    "center, radius",
+    [
+        ((50.4501, 30.5234), 50.0),  # Київ
+        ((0.0, 179.9), 300.0),  # поблизу антимеридіана
+        ((0.0, -179.9), 300.0),
+        ((89.5, 10.0), 100.0),  # навколо полюса
+        ((-33.8688, 151.2093), 1000.0),
+    ],
+)
+def test_bounding_box_contains_circle(center, radius):
+    """Кожна точка в межах радіуса повинна потрапляти в bounding box."""
+    rng = random.Random(42)
+    box = bounding_box(center[0], center[1], radius)
+    for _ in range(2000):
+        lat = max(min(center[0] + rng.uniform(-15, 15), 90.0), -90.0)
+        lon = (center[1] + rng.uniform(-40, 40) + 180.0) % 360.0 - 180.0
+        if haversine(center, (lat, lon)) <= radius:
+            assert _inside(box, lat, lon), (lat, lon)
+
+
+def test_bounding_box_antimeridian_split():
+    _, _, lon_ranges = bounding_box(0.0, 179.9, 300.0)
+    assert len(lon_ranges) == 2
+    _, _, lon_ranges = bounding_box(89.9, 0.0, 100.0)
+    assert lon_ranges is None
+
+
+def test_get_nearby_candidates_filters_by_box(app, test_db):
+    with app.app_context():
+        me = User(username=unique_username("me"), email=unique_email("me"),
+                  latitude=50.4501, longitude=30.5234, max_distance=5.0)
+        near = User(username=unique_username("near"), email=unique_email("near"),
+                    latitude=50.4520, longitude=30.5300)
+        far = User(username=unique_username("far"), email=unique_email("far"),
+                   latitude=49.8397, longitude=24.0297)
+        nowhere = User(username=unique_username("nowhere"), email=unique_email("nowhere"))
+        test_db.session.add_all([me, near, far, nowhere])
+        test_db.session.commit()
+
+        assert {u.id for u in get_nearby_candidates(me)} == {near.id}
+
+        me.max_distance = None
+        test_db.session.commit()
+        assert {u.id for u in get_nearby_candidates(me)} == {near.id, far.id}
+
+        assert get_nearby_candidates(nowhere) == []
+
+
+def test_distance_kernel_matches_haversine():
+    rng = random.Random(7)
+    points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(500)]
+    center = (50.4501, 30.5234)
+    vectors = unit_vectors([lat for lat, _ in points], [lon for _, lon in points])
+    assert np.allclose(vectors[0], unit_vector(*points[0]))
+    expected = [haversine(center, point) for point in points]
+    assert np.allclose(distances_km(unit_vector(*center), vectors), expected, atol=1e-6)
+    # Відстань до самого себе; радіус більший за півколо охоплює всю сферу
+    assert distances_km(unit_vector(*center), unit_vectors([50.4501], [30.5234]))[0] < 1e-6
+    assert min_dot(30000.0) == -1.0
+
+
+def test_unit_vectors_follow_coordinates(app, test_db):
+    with app.app_context():
+        me = User(username=unique_username("me"), email=unique_email("me"),
+                  latitude=50.4501, longitude=30.5234)
+        test_db.session.add(me)
+        test_db.session.commit()
+        assert (me.unit_x, me.unit_y, me.unit_z) == pytest.approx(unit_vector(50.4501, 30.5234))
+
+        me.latitude = "49.8397"
+        me.longitude = 24.0297
+        test_db.session.commit()
+        assert (me.unit_x, me.unit_y, me.unit_z) == pytest.approx(unit_vector(49.8397, 24.0297))
+
+        me.longitude = None
+        test_db.session.commit()
+        assert me.unit_x is None and me.unit_z is None
+
+
+def test_get_nearby_candidates_drops_box_corners(app, test_db):
+    with app.app_context():
+        me = User(username=unique_username("me"), email=unique_email("me"),
+                  latitude=50.0, longitude=30.0, max_distance=100.0)
+        # У межах bounding box, але далі 100 км від центру
+        corner = User(username=unique_username("corner"), email=unique_email("corner"),
+                      latitude=50.85, longitude=31.3)
+        inside = User(username=unique_username("inside"), email=unique_email("inside"),
+                      latitude=50.5, longitude=30.5)
+        test_db.session.add_all([me, corner, inside])
+        test_db.session.commit()
+        assert _inside(bounding_box(50.0, 30.0, 100.0), 50.85, 31.3)
+        assert haversine((50.0, 30.0), (50.85, 31.3)) > 100.0
+
+        candidates = get_nearby_candidates(me)
+        assert [u.id for u in candidates] == [inside.id]
+        assert get_users_distances(me, candidates)[0] == pytest.approx(
+            haversine((50.0, 30.0), (50.5, 30.5))
+        )
+
+
+def test_get_users_distances_reads_stored_vectors(app, test_db, monkeypatch):
+    from app import domain_services
+
+    with app.app_context():
+        me = User(username=unique_username("me"), email=unique_email("me"),
+                  latitude=50.0, longitude=30.0)
+        other = User(username=unique_username("other"), email=unique_email("other"),
+                     latitude=50.5, longitude=30.5)
+        expected = haversine((50.0, 30.0), (50.5, 30.5))
+        # Ще не збережені: вектори рахуються з координат
+        assert get_users_distances(me, [other])[0] == pytest.approx(expected)
+
+        test_db.session.add_all([me, other])
+        test_db.session.commit()
+        monkeypatch.setattr(domain_services, "unit_vector", pytest.fail)
+        assert get_users_distances(me, [other])[0] == pytest.approx(expected)
@@ -81,3 +81,32 @@ def test_user_update_email(app, test_db):
         # Перевіряємо, що email змінився
         updated_user = User.query.filter_by(username=f"emailtest_{unique_id}").first()
         assert updated_user.email == updated_email
+
+
+def test_user_type_code_is_set_on_insert(app, test_db):
+    with app.app_context():
+        user_type = UserType(
+            typology_name="Temporistics",
+            type_value="Current, Past, Future, Eternity"
+        )
+        test_db.session.add(user_type)
+        test_db.session.commit()
+        assert user_type.type_code == 6
+
+        user_type.type_value = "Past, Current, Future, Eternity"
+        test_db.session.commit()
+        assert user_type.type_code == 0
+
+
+def test_hot_query_indexes_exist(app, test_db):
+    with app.app_context():
+        inspector = sqlalchemy.inspect(test_db.engine)
+        names = {index["name"] for table in ("users", "user_type") for index in inspector.get_indexes(table)}
+        assert {
+            "ix_users_type_id",
+            "ix_users_lat_lon",
+            "ix_users_city_type",
+            "ix_users_country_type",
+            "ix_users_max_distance",
+            "ix_user_type_typology_value",
+        } <= names
@@ -0,0 +1,106 @@
+import itertools
+import random
+
+import pytest
+
+from app import recommendations
+from app.extensions import db
+from app.models import User
+from app.recommendations import blend_score, top_matches
+from app.services import calculate_relationship_by_codes, create_user_type, get_users_distance
+from app.user_snapshot import clear_user_snapshot
+from app.typologies.registry import get_type_names
+from tests.test_helpers import unique_username, unique_email
+
+
+@pytest.fixture(autouse=True)
+def fresh_snapshot():
+    clear_user_snapshot()
+    yield
+    clear_user_snapshot()
+
+
+def _population(count, seed=0):
+    rng = random.Random(seed)
+    types = get_type_names("Temporistics")
+    me = User(
+        username=unique_username("me"),
+        email=unique_email("me"),
+        latitude=50.45,
+        longitude=30.52,
+        max_distance=100.0,
+        user_type=create_user_type("Temporistics", types[0], commit=False),
+    )
+    others = [
+        User(
+            username=unique_username(f"cand{i}"),
+            email=unique_email(f"cand{i}"),
+            latitude=50.45 + rng.uniform(-1.0, 1.0),
+            longitude=30.52 + rng.uniform(-1.0, 1.0),
+            user_type=create_user_type("Temporistics", rng.choice(types), commit=False),
+        )
+        for i in range(count)
+    ]
+    db.session.add_all([me] + others)
+    db.session.commit()
+    return me, others
+
+
+def _brute_force(me, others, k, radius, distance_weight=0.3, half_life_km=25.0):
+    scored = []
+    for other in others:
+        _, comfort = calculate_relationship_by_codes(
+            me.user_type.type_code, other.user_type.type_code, "Temporistics"
+        )
+        distance = get_users_distance(me, other)
+        if comfort <= 50 or distance > radius:
+            continue
+        score = blend_score(comfort, distance, distance_weight, half_life_km)
+        scored.append((score, -distance, -other.id))
+    scored.sort(reverse=True)
+    return [-neg_id for _, _, neg_id in scored[:k]]
+
+
+@pytest.mark.parametrize("use_snapshot,use_type_index", [(True, True), (False, True), (False, False)])
+def test_top_matches_equal_full_sort(app, test_db, monkeypatch, use_snapshot, use_type_index):
+    app.config["USER_SNAPSHOT_ENABLED"] = use_snapshot
+    app.config["TYPE_INDEX_ENABLED"] = use_type_index
+    if not use_type_index:
+        monkeypatch.setattr(recommendations, "get_type_index", pytest.fail)
+    try:
+        with app.app_context():
+            me, others = _population(80)
+            for k, radius, distance_weight in itertools.product((1, 5, 200), (40.0, 100.0), (0.0, 0.3, 1.0)):
+                matches = top_matches(me, k=k, radius_km=radius, distance_weight=distance_weight)
+                assert [m.user.id for m in matches] == _brute_force(
+                    me, others, k, radius, distance_weight
+                )
+            scores = [m.score for m in top_matches(me, k=10)]
+            assert scores == sorted(scores, reverse=True)
+    finally:
+        app.config["USER_SNAPSHOT_ENABLED"] = True
+        app.config["TYPE_INDEX_ENABLED"] = True
+
+
+def test_top_matches_weights_and_validation(app, test_db):
+    with app.app_context():
+        me, _ = _population(10)
+        assert top_matches(me, k=5, weights={"Temporistics": 0}) == []
+        assert top_matches(me, k=5, weights={"Temporistics": 1})
+        with pytest.raises(ValueError):
+            top_matches(me, k=0)
+        with pytest.raises(ValueError):
+            top_matches(me, distance_weight=2.0)
+        for options in (
+            {"half_life_km": float("nan")},
+            {"radius_km": float("nan")},
+            {"radius_km": float("inf")},
+            {"weights": {"Temporistics": float("nan")}},
+            {"weights": {"Temporistics": 0.2}},
+            {"weights": {"Temporistics": 5}},
+        ):
+            with pytest.raises(ValueError):
+                top_matches(me, **options)
+        me.latitude = None
+        with pytest.raises(ValueError):
+            top_matches(me)
@@ -8,7 +8,8 @@ import pytest
 from PIL import Image
 from flask_login import current_user
 from app.extensions import db
-from app.models import User, UserType
+from app.models import User
+from app.services import create_user_type
 from tests.test_helpers import unique_username, unique_email
 
 logger = logging.getLogger(__name__)
@@ -269,7 +270,7 @@ def test_user_profile_logged_in(client, app, test_db):
         user.set_password("profilepass")
         
         # Додаємо типологію для користувача
-        user_type = UserType(typology_name="Temporistics", type_value="Past, Current, Future, Eternity")
+        user_type = create_user_type("Temporistics", "Past, Current, Future, Eternity", commit=False)
         user.user_type = user_type
         
         db.session.add(user)
@@ -311,7 +312,7 @@ def test_user_profile_other_user(client, app, test_db):
         user2.set_password("password2")
         
         # Додаємо типологію для другого користувача
-        user_type = UserType(typology_name="Temporistics", type_value="Past, Current, Future, Eternity")
+        user_type = create_user_type("Temporistics", "Past, Current, Future, Eternity", commit=False)
         user2.user_type = user_type
         
         db.session.add(user1)
@@ -508,7 +509,7 @@ def test_full_integration_cycle(client, app, test_db):
         user.set_password(password)
         
         # Додаємо типологію
-        user_type = UserType(typology_name="Temporistics", type_value="Past, Current, Future, Eternity")
+        user_type = create_user_type("Temporistics", "Past, Current, Future, Eternity", commit=False)
         user.user_type = user_type
         
         # Зберігаємо в базі даних
@@ -583,7 +584,7 @@ def test_missing_geo_data_in_distance_calculation(client, app, test_db):
         user1.set_password("password1")
         
         # Додаємо типологію
-        user1_type = UserType(typology_name="Temporistics", type_value="Past, Current, Future, Eternity")
+        user1_type = create_user_type("Temporistics", "Past, Current, Future, Eternity", commit=False)
         user1.user_type = user1_type
         
         # Користувач без геоданих
@@ -593,7 +594,7 @@ def test_missing_geo_data_in_distance_calculation(client, app, test_db):
         user2.set_password("password2")
         
         # Додаємо типологію
-        user2_type = UserType(typology_name="Temporistics", type_value="Past, Current, Future, Eternity")
+        user2_type = create_user_type("Temporistics", "Past, Current, Future, Eternity", commit=False)
         user2.user_type = user2_type
         
         db.session.add(user1)
@@ -627,7 +628,7 @@ def test_incorrect_geo_data_in_distance_calculation(client, app, test_db):
         user1.set_password("password1")
         
         # Додаємо типологію
-        user1_type = UserType(typology_name="Temporistics", type_value="Past, Current, Future, Eternity")
+        user1_type = create_user_type("Temporistics", "Past, Current, Future, Eternity", commit=False)
         user1.user_type = user1_type
         
         # Створюємо користувача з хибними геоданими
@@ -640,7 +641,7 @@ def test_incorrect_geo_data_in_distance_calculation(client, app, test_db):
         user2.set_password("password2")
         
         # Додаємо типологію
-        user2_type = UserType(typology_name="Temporistics", type_value="Past, Current, Future, Eternity")
+        user2_type = create_user_type("Temporistics", "Past, Current, Future, Eternity", commit=False)
         user2.user_type = user2_type
         
         db.session.add(user1)
@@ -676,7 +677,7 @@ def test_compatible_users_nearby_display(client, app, test_db):
         user1.set_password("testpassword1")
         
         # Встановлюємо тип для першого користувача
-        user1_type = UserType(typology_name="Temporistics", type_value="Past, Current, Future, Eternity")
+        user1_type = create_user_type("Temporistics", "Past, Current, Future, Eternity", commit=False)
         user1.user_type = user1_type
         
         db.session.add(user1)
@@ -690,7 +691,7 @@ def test_compatible_users_nearby_display(client, app, test_db):
         user2.set_password("testpassword2")
         
         # Встановлюємо той самий тип для другого користувача (для гарантованої сумісності)
-        user2_type = UserType(typology_name="Temporistics", type_value="Past, Current, Future, Eternity")
+        user2_type = create_user_type("Temporistics", "Past, Current, Future, Eternity", commit=False)
         user2.user_type = user2_type
         
         db.session.add(user2)
@@ -769,7 +770,7 @@ def test_filter_nearby_by_max_distance(client, app, test_db):
         user1.set_password("testpassword1")
         
         # Встановлюємо тип для першого користувача
-        user1_type = UserType(typology_name="Temporistics", type_value="Past, Current, Future, Eternity")
+        user1_type = create_user_type("Temporistics", "Past, Current, Future, Eternity", commit=False)
         user1.user_type = user1_type
         
         db.session.add(user1)
@@ -783,7 +784,7 @@ def test_filter_nearby_by_max_distance(client, app, test_db):
         user2.set_password("testpassword2")
         
         # Встановлюємо той самий тип для другого користувача (для гарантованої сумісності)
-        user2_type = UserType(typology_name="Temporistics", type_value="Past, Current, Future, Eternity")
+        user2_type = create_user_type("Temporistics", "Past, Current, Future, Eternity", commit=False)
         user2.user_type = user2_type
         
         db.session.add(user2)
@@ -796,7 +797,7 @@ def test_filter_nearby_by_max_distance(client, app, test_db):
         user3.set_password("testpassword3")
         
         # Встановлюємо той самий тип для третього користувача (для гарантованої сумісності)
-        user3_type = UserType(typology_name="Temporistics", type_value="Past, Current, Future, Eternity")
+        user3_type = create_user_type("Temporistics", "Past, Current, Future, Eternity", commit=False)
         user3.user_type = user3_type
         
         db.session.add(user3)
@@ -842,7 +843,7 @@ def test_profession_visibility_in_nearby(client, app, test_db):
         email1 = unique_email("viewer")
         user1 = User(username=username1, email=email1, latitude=50.45, longitude=30.52)
         user1.set_password("pass1")
-        user1_type = UserType(typology_name="Temporistics", type_value="Past, Current, Future, Eternity")
+        user1_type = create_user_type("Temporistics", "Past, Current, Future, Eternity", commit=False)
         user1.user_type = user1_type
 
         username2 = unique_username("hidden")
@@ -850,7 +851,7 @@ def test_profession_visibility_in_nearby(client, app, test_db):
         user2 = User(username=username2, email=email2, latitude=50.452, longitude=30.53,
                      profession="Doctor", profession_visible=False)
         user2.set_password("pass2")
-        user2_type = UserType(typology_name="Temporistics", type_value="Past, Current, Future, Eternity")
+        user2_type = create_user_type("Temporistics", "Past, Current, Future, Eternity", commit=False)
         user2.user_type = user2_type
 
         db.session.add_all([user1, user1_type, user2, user2_type])
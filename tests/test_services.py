@@ -325,3 +325,101 @@ def test_neutrality_relationship(app, test_db):
         assert comfort_score == 0
 
 
+
+
+def test_calculate_relationships_batch_matches_single_pair(app):
+    """Batch scoring must agree with calculate_relationship for every pair."""
+    import numpy as np
+    from app.services import calculate_relationships_batch
+    from app.typologies.matrix import get_relationship_matrix
+    from app.typologies.registry import get_type_names
+
+    with app.app_context():
+        for typology_name in ["Temporistics", "Psychosophia", "Socionics", "IQ", "Temperaments"]:
+            names = get_type_names(typology_name)
+            matrix = get_relationship_matrix(typology_name)
+            candidates = np.arange(len(names))
+            for code, name in enumerate(names):
+                relationships, scores = calculate_relationships_batch(
+                    name, candidates, typology_name
+                )
+                assert relationships.dtype == np.uint8
+                assert len(scores) == len(names)
+                for other, other_name in enumerate(names):
+                    expected = calculate_relationship(name, other_name, typology_name)
+                    assert matrix.relationship_names[relationships[other]] == expected[0]
+                    assert scores[other] == expected[1]
+
+
+def test_calculate_relationships_batch_invalid_input(app):
+    from app.services import calculate_relationships_batch
+
+    with app.app_context():
+        with pytest.raises(ValueError):
+            calculate_relationships_batch(0, [0, 24], "Temporistics")
+        with pytest.raises(ValueError):
+            calculate_relationships_batch("Past", [0], "NonExistentTypology")
+        relationships, scores = calculate_relationships_batch(0, [], "Temporistics")
+        assert len(relationships) == 0 and len(scores) == 0
+
+
+def test_calculate_relationship_pairs_matches_single(app):
+    from app.services import calculate_relationship, calculate_relationship_pairs, encode_types
+    with app.app_context():
+        types = get_types_by_typology("Temporistics")
+        relationships, scores = calculate_relationship_pairs(
+            [types[0], 3, types[10]], [types[4], types[4], 0], "Temporistics"
+        )
+        expected = [
+            calculate_relationship(types[0], types[4], "Temporistics"),
+            calculate_relationship(3, 4, "Temporistics"),
+            calculate_relationship(10, 0, "Temporistics"),
+        ]
+        assert list(zip(relationships, scores)) == expected
+        assert encode_types([types[1], 1], "Temporistics").tolist() == [1, 1]
+        with pytest.raises(ValueError):
+            encode_types([None], "Temporistics")
+        with pytest.raises(ValueError):
+            calculate_relationship_pairs([0], [0, 1], "Temporistics")
+
+
+def test_user_types_are_shared_and_not_mutated(app, test_db):
+    from app.services import assign_user_type, create_user_type
+
+    with app.app_context():
+        past = "Past, Current, Future, Eternity"
+        future = "Future, Past, Current, Eternity"
+        users = [
+            User(username=unique_username("shared"), email=unique_email("shared"))
+            for _ in range(3)
+        ]
+        db.session.add_all(users)
+        for user in users:
+            assign_user_type(user, "Temporistics", past, commit=False)
+        db.session.commit()
+        assert UserType.query.count() == 1
+        assert create_user_type("Temporistics", past).id == users[0].type_id
+
+        assign_user_type(users[0], "Temporistics", future)
+        assert UserType.query.count() == 2
+        assert users[1].user_type.type_value == past
+        assert users[0].user_type.type_value == future
+
+
+def test_translated_type_values_share_one_row(app, test_db, monkeypatch):
+    from app.services import create_user_type
+    from app.typologies.registry import get_type_names
+    from app.typologies.typology_socionics import TypologySocionics
+
+    with app.app_context():
+        names = get_type_names("Socionics")
+        # Imitate a locale where every type name is rendered differently
+        monkeypatch.setattr(
+            TypologySocionics, "get_all_types", lambda self: [name.upper() for name in names]
+        )
+        canonical = create_user_type("Socionics", names[0])
+        translated = create_user_type("Socionics", names[0].upper())
+
+        assert translated.id == canonical.id
+        assert translated.type_value == names[0]
+        assert UserType.query.filter_by(typology_name="Socionics").count() == 1
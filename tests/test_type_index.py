@@ -0,0 +1,124 @@
+import pytest
+
+from app.extensions import db
+from app.models import User
+from app.repositories.user_repository import get_nearby_candidates
+from app.services import assign_user_type, calculate_relationship_by_codes, create_user_type
+from app.type_index import compatible_user_ids, get_type_index
+from app.user_snapshot import clear_user_snapshot
+from app.typologies.registry import encode_type
+from tests.test_helpers import unique_username, unique_email
+
+PAST = "Past, Current, Future, Eternity"
+CURRENT = "Current, Past, Future, Eternity"
+ETERNITY = "Eternity, Future, Current, Past"
+
+
+def _user(prefix, type_value, **kwargs):
+    return User(
+        username=unique_username(prefix),
+        email=unique_email(prefix),
+        user_type=create_user_type("Temporistics", type_value, commit=False),
+        **kwargs,
+    )
+
+
+@pytest.fixture(autouse=True)
+def fresh_snapshot():
+    clear_user_snapshot()
+    yield
+    clear_user_snapshot()
+
+
+def test_index_follows_commits(app, test_db):
+    with app.app_context():
+        first = _user("first", PAST)
+        db.session.add(first)
+        db.session.commit()
+        past = encode_type("Temporistics", PAST)
+        current = encode_type("Temporistics", CURRENT)
+        assert get_type_index().bucket("Temporistics", past) == {first.id}
+
+        second = _user("second", PAST)
+        db.session.add(second)
+        db.session.commit()
+        assert get_type_index().bucket("Temporistics", past) == {first.id, second.id}
+
+        assign_user_type(second, "Temporistics", CURRENT)
+        assert get_type_index().bucket("Temporistics", past) == {first.id}
+        assert get_type_index().bucket("Temporistics", current) == {second.id}
+
+        db.session.delete(first)
+        db.session.commit()
+        index = get_type_index()
+        assert index.bucket("Temporistics", past) == set()
+        assert len(index) == 1
+
+        # Rolled back changes leave the index as it is
+        db.session.add(_user("third", PAST))
+        db.session.flush()
+        db.session.rollback()
+        assert get_type_index() is index
+
+
+def test_compatible_user_ids_match_pairwise_scores(app, test_db):
+    with app.app_context():
+        me = _user("me", PAST)
+        others = [_user(f"other{i}", value) for i, value in enumerate((PAST, CURRENT, ETERNITY, CURRENT))]
+        db.session.add_all([me] + others)
+        db.session.commit()
+
+        expected = {
+            other.id
+            for other in others
+            if calculate_relationship_by_codes(
+                me.user_type.type_code, other.user_type.type_code, "Temporistics"
+            )[1] > 50
+        }
+        assert compatible_user_ids(me) == expected
+        assert me.id not in compatible_user_ids(me)
+
+        app.config["TYPE_INDEX_ENABLED"] = False
+        try:
+            assert compatible_user_ids(me) is None
+        finally:
+            app.config["TYPE_INDEX_ENABLED"] = True
+
+
+def test_nearby_candidates_can_be_restricted_to_ids(app, test_db):
+    with app.app_context():
+        me = _user("me", PAST, latitude=50.45, longitude=30.52, max_distance=50.0)
+        near = [_user(f"near{i}", PAST, latitude=50.46, longitude=30.53) for i in range(3)]
+        far = _user("far", PAST, latitude=40.0, longitude=-74.0)
+        db.session.add_all([me, far] + near)
+        db.session.commit()
+
+        ids = {near[0].id, near[2].id, far.id}
+        found = get_nearby_candidates(me, user_ids=ids)
+        assert {user.id for user in found} == {near[0].id, near[2].id}
+        assert get_nearby_candidates(me, user_ids=set()) == []
+
+
+@pytest.mark.parametrize("use_index", [True, False])
+def test_nearby_compatibles_page_lists_compatible_users_by_distance(client, app, test_db, use_index):
+    app.config["TYPE_INDEX_ENABLED"] = use_index
+    try:
+        with app.app_context():
+            me = _user("me", PAST, latitude=50.45, longitude=30.52, max_distance=100.0)
+            near = _user("near", CURRENT, latitude=50.46, longitude=30.52)
+            farther = _user("farther", PAST, latitude=50.95, longitude=30.52)
+            incompatible = _user("incompatible", ETERNITY, latitude=50.45, longitude=30.52)
+            too_far = _user("toofar", CURRENT, latitude=52.0, longitude=30.52)
+            db.session.add_all([me, near, farther, incompatible, too_far])
+            db.session.commit()
+            with client.session_transaction() as session:
+                session["_user_id"] = str(me.id)
+                session["_fresh"] = True
+
+            page = client.get("/nearby_compatibles").get_data(as_text=True)
+            assert near.username in page and farther.username in page
+            assert page.index(near.username) < page.index(farther.username)
+            assert incompatible.username not in page
+            assert too_far.username not in page
+    finally:
+        app.config["TYPE_INDEX_ENABLED"] = True
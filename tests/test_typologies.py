@@ -92,6 +92,32 @@ def test_typology_socionics_basic(app):
         assert len(alpha_types) == 4
         assert len(quadras["Alpha"]["description"]) > 0
 
+def test_socionics_relation_table_matches_library():
+    import os
+    import runpy
+    from app.typologies import socionics_relations
+
+    script = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "scripts",
+        "generate_socionics_relations.py",
+    )
+    generator = runpy.run_path(script)
+    assert socionics_relations.TYPE_CODES == generator["TYPE_CODES"]
+    assert socionics_relations.RELATIONS == generator["compute_relations"]()
+
+def test_socionics_relationship_uses_codes_and_names(app):
+    from app.typologies.socionics_relations import TYPE_CODES
+    with app.test_request_context():
+        typ = TypologySocionics()
+        assert typ.determine_relationship_type("Seeker (ILE)", "Mediator (SEI)") == "Duality"
+        assert typ.determine_relationship_type("ILE", "SEI") == "Duality"
+        assert typ.determine_relationship_type("SEE", "ILE") == "Super-ego"
+        assert typ.determine_relationship_type("ILE", "XYZ") == "Unknown Relationship"
+        # The table is indexed in the same order as the displayed types
+        names = [str(t) for t in typ.get_all_types()]
+        assert tuple(n[n.rfind("(") + 1 : -1] for n in names) == TYPE_CODES
+
 def test_temporistics_are_types_homochronous():
     """Перевіряє, що метод TypologyTemporistics.are_types_homochronous правильно визначає гомохронність типів"""
     from app.typologies.typology_temporistics import TypologyTemporistics
@@ -217,3 +243,63 @@ def test_typology_temperaments_basic():
     assert typ.determine_relationship_type("Sanguine", "Choleric") == "Contrast"
     shortened = typ.shorten_type(all_types)
     assert shortened == ["S", "C", "M", "P"]
+
+
+def test_temporistics_pair_tables_match_rule_cascade():
+    """The precomputed 24x24 tables must agree with the rule cascade."""
+    typology = TypologyTemporistics()
+    all_types = typology.get_all_types()
+    assert list(typology.TYPES) == all_types
+    assert len(typology.PAIR_RELATIONSHIPS) == len(all_types) ** 2
+
+    for type1 in all_types:
+        for type2 in all_types:
+            expected = typology.get_intertype_relationship(
+                type1.split(", "), type2.split(", ")
+            )
+            id1 = typology.get_type_id(type1)
+            id2 = typology.get_type_id(type2)
+            assert typology.get_relationship_by_ids(id1, id2) == expected
+            assert typology.determine_relationship_type(type1, type2) == expected
+            assert (
+                typology.get_comfort_score_by_ids(id1, id2)
+                == typology.get_comfort_score(expected)[0]
+            )
+
+
+def test_temporistics_get_type_id_invalid():
+    typology = TypologyTemporistics()
+    assert typology.get_type_id("Past, Current, Future, Eternity") == 0
+    with pytest.raises(ValueError):
+        typology.get_type_id("Past, Past, Past, Past")
+
+
+def test_registry_type_codes_round_trip():
+    from app.typologies.registry import (
+        get_typology_classes,
+        get_type_codes,
+        get_type_names,
+        encode_type,
+        decode_type,
+    )
+
+    for name, typology_class in get_typology_classes().items():
+        names = get_type_names(name)
+        assert len(names) <= 256
+        assert [str(t) for t in typology_class().get_all_types()] == list(names)
+        for code, type_name in enumerate(names):
+            assert get_type_codes(name)[type_name] == code
+            assert encode_type(name, type_name) == code
+            assert decode_type(name, code) == type_name
+
+
+def test_registry_type_codes_invalid():
+    from app.typologies.registry import encode_type, decode_type
+
+    assert encode_type("Socionics", "Seeker (ILE)") == 0
+    with pytest.raises(ValueError):
+        encode_type("Temporistics", "BogusType")
+    with pytest.raises(ValueError):
+        decode_type("Temporistics", 24)
+    with pytest.raises(ValueError):
+        encode_type("NonExistentTypology", "Past")
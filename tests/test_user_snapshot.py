@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+
+import app.user_snapshot as user_snapshot
+from app.extensions import db
+from app.models import User
+from app.services import assign_user_type, create_user_type, get_users_distance
+from app.services import calculate_relationship_by_codes
+from app.user_snapshot import (
+    clear_user_snapshot,
+    get_user_snapshot,
+    get_user_snapshot_stats,
+)
+from tests.test_helpers import unique_username, unique_email
+
+PAST = "Past, Current, Future, Eternity"
+
+
+def _user(prefix, typology="Temporistics", type_value=PAST, **kwargs):
+    return User(
+        username=unique_username(prefix),
+        email=unique_email(prefix),
+        user_type=create_user_type(typology, type_value, commit=False) if type_value else None,
+        **kwargs,
+    )
+
+
+@pytest.fixture(autouse=True)
+def fresh_snapshot(app):
+    with app.app_context():
+        clear_user_snapshot()
+        yield
+        clear_user_snapshot()
+
+
+def test_snapshot_holds_match_fields(app, test_db):
+    located = _user("located", latitude=50.45, longitude=30.52, max_distance=10.0)
+    socionics = _user("socionics", "Psychosophia", "Emotion, Logic, Will, Physics")
+    untyped = _user("untyped", type_value=None)
+    db.session.add_all([located, socionics, untyped])
+    db.session.commit()
+
+    snapshot = get_user_snapshot()
+    assert snapshot.ids.tolist() == sorted([located.id, socionics.id, untyped.id])
+    row = snapshot.ids.tolist().index(located.id)
+    assert snapshot.codes("Temporistics")[row] == located.user_type.type_code
+    assert snapshot.codes("Psychosophia")[row] == -1
+    assert snapshot.codes("Psychosophia")[snapshot.ids.tolist().index(socionics.id)] >= 0
+    assert (snapshot.type_codes[snapshot.ids.tolist().index(untyped.id)] == -1).all()
+    assert snapshot.max_distances[row] == 10.0
+    assert np.isnan(snapshot.latitudes[snapshot.ids.tolist().index(untyped.id)])
+    assert snapshot.codes("Unknown") is None
+    with pytest.raises(ValueError):
+        snapshot.ids[0] = 1
+
+    stats = get_user_snapshot_stats()
+    assert stats["users"] == 3 and stats["memory_bytes"] == snapshot.nbytes > 0
+    assert stats["stale"] is False
+
+
+def test_snapshot_rebuilds_after_changes(app, test_db, monkeypatch):
+    me = _user("me")
+    db.session.add(me)
+    db.session.commit()
+    snapshot = get_user_snapshot()
+    assert get_user_snapshot() is snapshot
+
+    # Commits that do not touch match fields keep the snapshot
+    me.profession = "Engineer"
+    db.session.commit()
+    assert get_user_snapshot() is snapshot
+
+    app.config["USER_SNAPSHOT_MIN_REFRESH"] = 60.0
+    try:
+        db.session.add(_user("other"))
+        db.session.commit()
+        assert get_user_snapshot() is snapshot
+        stats = get_user_snapshot_stats()
+        assert stats["stale"] is True and stats["pending_local_changes"] == 1
+    finally:
+        app.config["USER_SNAPSHOT_MIN_REFRESH"] = 0.0
+    assert len(get_user_snapshot()) == 2
+
+    # Another process announced a change through the shared cache
+    snapshot = get_user_snapshot()
+    monkeypatch.setattr(user_snapshot.cache, "get", lambda key: "changed-elsewhere")
+    assert get_user_snapshot() is not snapshot
+
+
+
+def test_snapshot_rebuilds_after_max_age(app, test_db):
+    me = _user("me", latitude=50.45, longitude=30.52)
+    db.session.add(me)
+    db.session.commit()
+    snapshot = get_user_snapshot()
+
+    # Another process moved the user without a shared cache to announce it
+    db.session.execute(db.text("UPDATE users SET latitude = 10.0 WHERE id = :id"), {"id": me.id})
+    db.session.commit()
+    assert get_user_snapshot() is snapshot
+
+    snapshot.built_at -= app.config["USER_SNAPSHOT_MAX_AGE"]
+    assert get_user_snapshot_stats()["stale"] is True
+    assert get_user_snapshot().latitudes.tolist() == [10.0]
+
+def test_match_candidates_equal_pairwise_checks(app, test_db):
+    me = _user("me", latitude=50.45, longitude=30.52, max_distance=60.0)
+    others = []
+    for i, value in enumerate(
+        [PAST, "Current, Past, Future, Eternity", "Eternity, Future, Current, Past"] * 4
+    ):
+        others.append(_user(f"other{i}", type_value=value,
+                            latitude=50.45 + 0.2 * i, longitude=30.52 - 0.1 * i))
+    others.append(_user("nowhere"))
+    db.session.add_all([me] + others)
+    db.session.commit()
+    assign_user_type(others[0], "Temporistics", "Eternity, Future, Current, Past")
+
+    ids, codes, distances = get_user_snapshot().match_candidates(me)
+    expected = [
+        other.id
+        for other in others
+        if other.latitude is not None
+        and calculate_relationship_by_codes(
+            me.user_type.type_code, other.user_type.type_code, "Temporistics"
+        )[1] > 50
+        and get_users_distance(me, other) <= 60.0
+    ]
+    assert ids.tolist() == expected
+    by_id = {other.id: other for other in others}
+    for user_id, code, distance in zip(ids.tolist(), codes.tolist(), distances.tolist()):
+        assert code == by_id[user_id].user_type.type_code
+        assert distance == pytest.approx(get_users_distance(me, by_id[user_id]))
+
+
+def test_indexes_share_one_population_load(app, test_db):
+    from app.coverage_index import covering_user_ids
+    from app.type_index import compatible_user_ids
+
+    me = _user("me", latitude=50.45, longitude=30.52, max_distance=10.0)
+    other = _user("other", latitude=50.46, longitude=30.52, max_distance=10.0)
+    db.session.add_all([me, other])
+    db.session.commit()
+
+    builds = get_user_snapshot_stats()["builds"]
+    assert compatible_user_ids(me) == {other.id}
+    assert covering_user_ids(me) == {other.id}
+    assert get_user_snapshot().match_candidates(me)[0].tolist() == [other.id]
+    assert get_user_snapshot_stats()["builds"] == builds + 1
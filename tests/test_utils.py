@@ -121,4 +121,13 @@ def test_get_typology_instance(app):
         
         # Неіснуюча типологія
         typology = get_typology_instance("NonExistentTypology")
-        assert typology is None 
\ No newline at end of file
+        assert typology is None 
+
+def test_get_typology_instance_is_shared(app):
+    """Екземпляри типологій створюються один раз і повторно використовуються."""
+    with app.app_context():
+        assert get_typology_instance("Temporistics") is get_typology_instance("Temporistics")
+        socionics_en = get_typology_instance("Socionics", "en")
+        assert get_typology_instance("Socionics", "en") is socionics_en
+        assert get_typology_instance("Socionics", "uk") is not socionics_en
+        assert get_typology_instance("Socionics", "uk").__class__.__name__ == "TypologySocionics"